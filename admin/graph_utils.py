@@ -3,6 +3,14 @@ Centralized utilities for maintaining graph consistency
 """
 import json
 import os
+import sys
+
+# Full-text node search (backend/graph_search.py)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+try:
+    from graph_search import SearchIndex
+except ImportError:
+    SearchIndex = None
 
 # Core node IDs that must remain consistent
 CORE_NODE_IDS = {
@@ -135,11 +143,33 @@ def save_graph_safely(graph_data):
         with open(graph_path, "w") as f:
             json.dump(graph_data, f, indent=2)
 
+        # Keep the search index in step with what was saved
+        if _search_index is not None:
+            _search_index.sync(graph_data.get("nodes", []))
+
         return warnings
     except Exception as e:
         print(f"Error in save_graph_safely: {e}")
         raise
 
+_search_index = None
+
+def search_nodes(query, limit=10, types=None):
+    """
+    Find nodes by text (label, title, description, list attributes) without
+    scanning the graph. The index is built on first use from the saved graph
+    and updated incrementally by save_graph_safely.
+    """
+    global _search_index
+    if SearchIndex is None:
+        raise RuntimeError("graph_search not available; run from the repo checkout")
+    if _search_index is None:
+        graph_data, _, _ = load_and_normalize_graph()
+        index = SearchIndex()
+        index.build(graph_data.get("nodes", []))
+        _search_index = index
+    return _search_index.search(query, limit=limit, types=types)
+
 def merge_graph_updates(current_graph, new_data):
     """
     Safely merge new data into existing graph
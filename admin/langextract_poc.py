@@ -11,6 +11,7 @@ from __future__ import annotations
 import io
 import json
 import os
+import sys
 import requests
 from typing import Any, Dict, List, Optional
 
@@ -27,6 +28,18 @@ try:
 except Exception:
     PdfReader = None  # type: ignore
 
+# Shared parsed-text cache for PDFs (backend/doc_text_cache.py); Streamlit
+# reruns re-read the upload, and this makes them skip the parse
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+try:
+    from doc_text_cache import extract_pdf_pages
+except ImportError:
+    extract_pdf_pages = None  # type: ignore
+
+# Extraction -> graph mapping shared with tools/langextract_service.py
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from tools.graph_mapper import iter_extractions, map_extractions
+
 PROMPT = (
     """
     Extract a curriculum/resume knowledge graph:
@@ -50,89 +63,31 @@ EXAMPLES: List[Any] = []  # minimal; prompt should be enough for POC
 
 
 def extract_pdf_text(uploaded_pdf) -> str:
+    content = uploaded_pdf.read()
+    if extract_pdf_pages is not None:
+        return "\n".join(extract_pdf_pages(content))
     if not PdfReader:
         raise RuntimeError("PyPDF2 not installed. pip install PyPDF2")
-    content = uploaded_pdf.read()
     reader = PdfReader(io.BytesIO(content))
     text = "\n".join(page.extract_text() or "" for page in reader.pages)
     return text
 
 
 def map_lx_to_graph(raw: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
-    """Map LangExtract extractions to { nodes, edges }. Compact version."""
-    def iter_extractions():
-        if isinstance(raw.get("extractions"), list):
-            for ex in raw["extractions"]:
-                yield ex
-        for item in (raw.get("annotations") or raw.get("items") or []) or []:
-            for ex in item.get("extractions", []) if isinstance(item, dict) else []:
-                yield ex
-
-    nodes: List[Dict[str, Any]] = []
-    edges: List[Dict[str, Any]] = []
-    node_index: Dict[str, Dict[str, Any]] = {}
-
-    def slug(s: str) -> str:
-        return (s.lower().strip().replace(" ", "_").replace("/", "-")[:80]) or "node"
-
-    def add_node(ntype: str, label: str, extra: Dict[str, Any]):
-        node_id = str(extra.get("id") or slug(label) or slug(ntype + "_" + label))
-        if node_id in node_index:
-            node_index[node_id].update(extra)
-            return
-        node = {"id": node_id, "label": label or node_id, "type": ntype, **extra}
-        node_index[node_id] = node
-        nodes.append(node)
-
-    for ex in iter_extractions():
-        if not isinstance(ex, dict):
-            continue
-        clazz = str(ex.get("extraction_class") or ex.get("class") or "").strip()
-        text = str(ex.get("extraction_text") or ex.get("text") or "").strip()
-        attrs = ex.get("attributes") if isinstance(ex.get("attributes"), dict) else {}
-
-        if clazz in {"Person", "Education", "Experience", "Project", "Skill", "Group", "Status"}:
-            add_node(clazz, text or attrs.get("name") or attrs.get("full_name") or clazz, attrs)
-            continue
-
-        if clazz in {"Relation", "Edge"}:
-            rel = str(attrs.get("relation") or "related_to").strip()
-            sid, tid = attrs.get("sourceId"), attrs.get("targetId")
-            stext, ttext = attrs.get("source_text"), attrs.get("target_text")
-
-            def resolve(label_or_id: Optional[str]) -> Optional[str]:
-                if not label_or_id:
-                    return None
-                lid = str(label_or_id)
-                if lid in node_index:
-                    return lid
-                for n in nodes:
-                    if str(n.get("label")).lower() == lid.lower():
-                        return n["id"]
-                return slug(lid)
-
-            src = str(sid or resolve(stext) or "").strip()
-            tgt = str(tid or resolve(ttext) or "").strip()
-            if src and tgt and src != tgt:
-                edges.append({"id": f"{src}-{rel}-{tgt}", "source": src, "target": tgt, "relation": rel, "weight": 1})
-
-    return {"nodes": nodes, "edges": edges}
+    """Map LangExtract extractions to { nodes, edges } with the service's mapper, in knowledge-graph.json shape."""
+    mapped = map_extractions(raw, spans=False)
+    for edge in mapped["edges"]:
+        edge["weight"] = 1
+    return mapped
 
 
 def summarize_lx(raw: Dict[str, Any]) -> Dict[str, Any]:
-    def iter_extractions():
-        if isinstance(raw.get("extractions"), list):
-            for ex in raw["extractions"]:
-                yield ex
-        for item in (raw.get("annotations") or raw.get("items") or []) or []:
-            for ex in item.get("extractions", []) if isinstance(item, dict) else []:
-                yield ex
     cls_counts: Dict[str,int] = {}
     attrs_by_cls: Dict[str,set] = {}
     samples: List[Dict[str,Any]] = []
     relations: List[Dict[str,Any]] = []
     total = 0
-    for ex in iter_extractions():
+    for ex in iter_extractions(raw):
         if not isinstance(ex, dict):
             continue
         total += 1
@@ -4,7 +4,7 @@ import yaml
 import os
 import sys
 from pocketflow import Node
-from utils import call_llm
+from utils import call_llm, admit_llm_call, settle_llm_call
 
 # Add parent directory to path to import from main app
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -20,6 +20,13 @@ except ImportError:
         print("Warning: Could not import PDF processor. PDF-based graph generation will be limited.")
         queryVectorStore = None
 
+# Shared parsed-text cache for PDFs (backend/doc_text_cache.py)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+try:
+    from doc_text_cache import extract_pdf_pages
+except ImportError:
+    extract_pdf_pages = None
+
 class ProcessPDFsNode(Node):
     """Process multiple uploaded PDF files and extract content"""
 
@@ -39,16 +46,16 @@ class ProcessPDFsNode(Node):
 
                 # Try to read as PDF first
                 try:
-                    from PyPDF2 import PdfReader
-                    import io
-
                     # Read PDF content
                     file_content = uploaded_file.read()
-                    pdf_reader = PdfReader(io.BytesIO(file_content))
-                    text_content = ""
-
-                    for page in pdf_reader.pages:
-                        text_content += page.extract_text() + "\n"
+                    if extract_pdf_pages is not None:
+                        # Cached by content hash, so reruns skip the parse
+                        pages = extract_pdf_pages(file_content)
+                    else:
+                        from PyPDF2 import PdfReader
+                        import io
+                        pages = [page.extract_text() for page in PdfReader(io.BytesIO(file_content)).pages]
+                    text_content = "".join(page + "\n" for page in pages)
 
                     all_content.append({
                         "filename": filename,
@@ -674,24 +681,30 @@ def call_llm(prompt):
     import os
 
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    messages = [
+        {
+            "role": "system",
+            "content": "You are a knowledge graph architect. Return valid YAML format wrapped in ```yaml code blocks."
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
 
+    # Shared LLM budget with the backend and extraction service. Outside the try:
+    # AdmissionRejected is backpressure for the caller, not an LLM error to print
+    ticket = admit_llm_call(messages, 2000)
     try:
         response = client.chat.completions.create(
             model="gpt-4o-mini",  # Use smaller model to avoid token limits
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a knowledge graph architect. Return valid YAML format wrapped in ```yaml code blocks."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
+            messages=messages,
             temperature=0.3,
             max_tokens=2000  # Reduced token limit
         )
-        return response.choices[0].message.content
     except Exception as e:
+        settle_llm_call(ticket, None)
         print(f"Error calling LLM: {e}")
         return f"Error: {e}"
+    settle_llm_call(ticket, response)
+    return response.choices[0].message.content
@@ -4,9 +4,17 @@ Standalone extraction functions without dependencies on langextract_poc.py
 """
 import json
 import os
+import sys
 from typing import Dict, List, Any, Optional
 import openai
 
+# Shared parsed-text cache for PDFs (backend/doc_text_cache.py)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+try:
+    from doc_text_cache import extract_pdf_pages
+except ImportError:
+    extract_pdf_pages = None
+
 def extract_with_openai(text: str, model_id: str = "gpt-4o-mini") -> Dict[str, Any]:
     """Extract entities and relationships using OpenAI directly"""
     
@@ -188,14 +196,13 @@ def extract_from_file(file_content: bytes, filename: str) -> str:
     
     if filename.lower().endswith('.pdf'):
         try:
-            from PyPDF2 import PdfReader
-            import io
-            
-            reader = PdfReader(io.BytesIO(file_content))
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+            if extract_pdf_pages is not None:
+                pages = extract_pdf_pages(file_content)
+            else:
+                from PyPDF2 import PdfReader
+                import io
+                pages = [page.extract_text() for page in PdfReader(io.BytesIO(file_content)).pages]
+            return "".join(page + "\n" for page in pages)
         except Exception as e:
             return f"Error reading PDF: {e}"
     
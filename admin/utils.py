@@ -1,16 +1,47 @@
 # Simple LLM wrapper for PocketFlow
 import os
+import sys
 from openai import OpenAI
 
+# Shared LLM admission control (backend/admission.py): admin calls are batch work
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+try:
+    from admission import BATCH, AdmissionController, estimate_tokens
+    llm_admission = AdmissionController.from_env()
+except ImportError:
+    llm_admission = None
+
+def admit_llm_call(messages, max_tokens):
+    """Wait for LLM budget (LLM_RPM / LLM_TPM). Raises AdmissionRejected when over it."""
+    if llm_admission is None:
+        return None
+    return llm_admission.acquire_sync(estimate_tokens(messages, max_tokens), BATCH)
+
+def settle_llm_call(ticket, response):
+    """Charge the real usage; response=None (the call failed) gives the estimate back."""
+    if ticket is None:
+        return
+    if response is None:
+        ticket.settle(0)
+    elif getattr(response, "usage", None) is not None:
+        ticket.settle(response.usage.total_tokens)
+
 def call_llm(prompt):
     """Simple LLM wrapper using OpenAI API"""
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,
-        max_tokens=1000
-    )
+    messages = [{"role": "user", "content": prompt}]
+    ticket = admit_llm_call(messages, 1000)
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            temperature=0.3,
+            max_tokens=1000
+        )
+    except Exception:
+        settle_llm_call(ticket, None)
+        raise
+    settle_llm_call(ticket, response)
     return response.choices[0].message.content
 
 if __name__ == "__main__":
@@ -5,6 +5,10 @@ import path from "path";
 
 const BACKEND_URL = process.env.BACKEND_URL || "http://localhost:8000";
 
+// Last graph received from the backend; revalidated with If-None-Match so
+// unchanged graphs cost a 304 instead of a full download.
+let backendGraphCache: { etag: string; data: any } | null = null;
+
 export const loader: LoaderFunction = async () => {
   let graphData = { nodes: [], edges: [] };
   let source = "file";
@@ -14,18 +18,28 @@ export const loader: LoaderFunction = async () => {
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), 5000); // 5s timeout for graph fetch
 
+    const headers: Record<string, string> = {};
+    if (backendGraphCache) headers["If-None-Match"] = backendGraphCache.etag;
+
     const res = await fetch(`${BACKEND_URL}/graph`, {
-      signal: controller.signal
+      signal: controller.signal,
+      headers
     });
     clearTimeout(timeoutId);
 
-    if (res.ok) {
-      const data = await res.json();
-      if (data && data.nodes && data.nodes.length > 0) {
-        graphData = data;
-        source = "cognee";
-        console.log("Loaded graph from Cognee Backend");
-      }
+    let data: any = null;
+    if (res.status === 304 && backendGraphCache) {
+      data = backendGraphCache.data;
+    } else if (res.ok) {
+      data = await res.json();
+      const etag = res.headers.get("ETag");
+      backendGraphCache = etag ? { etag, data } : null;
+    }
+
+    if (data && data.nodes && data.nodes.length > 0) {
+      graphData = data;
+      source = "cognee";
+      console.log("Loaded graph from Cognee Backend");
     }
   } catch (e) {
     console.warn("Failed to fetch graph from backend, falling back to local file:", e);
@@ -18,7 +18,8 @@ export const action: ActionFunction = async ({ request }) => {
     });
     let out: any = null;
     try { out = await res.json(); } catch { out = { error: await res.text() }; }
-    return json(out, { status: res.status });
+    const cacheStatus = res.headers.get('x-cache');
+    return json(out, { status: res.status, headers: cacheStatus ? { 'X-Cache': cacheStatus } : undefined });
   } catch (err) {
     console.error('/api.langextract.extract error', err);
     return json({ error: 'LangExtract proxy failed' }, { status: 500 });
@@ -0,0 +1,368 @@
+"""
+Admission control for calls to the LLM provider.
+
+Visitor chats, ingestion, LangExtract extractions and the admin tools all
+spend the same OpenAI quota. Each process routes its calls through an
+AdmissionController, which:
+
+- meters requests and tokens per minute with two token buckets
+  (LLM_RPM, LLM_TPM), so a burst is spread out instead of triggering 429s;
+- queues callers by priority: "interactive" (visitor chat) is always
+  admitted before "batch" (ingest, extraction, admin). Within a class it is
+  first come, first served, and a large request at the head is not
+  overtaken by smaller ones behind it;
+- bounds the queue: a caller is rejected at once (AdmissionRejected, with a
+  Retry-After) when its class's queue is full (503) or when the estimated
+  wait exceeds the class's max wait (429), instead of piling up;
+- backs off for the provider's Retry-After when a 429 gets through anyway
+  (penalize()).
+
+Callers reserve an estimated token count up front and settle() the ticket
+with the provider-reported usage afterwards, which refunds or charges the
+difference.
+
+Quotas are per process: give each service its share of the account's
+limits through its environment. Standard library only, so the LangExtract
+service (`from backend.admission import ...`) and the admin scripts (with
+backend/ on sys.path) can import it. acquire() is for asyncio code,
+acquire_sync() for threads. Both can be used in the same process.
+
+Configuration (env, read by from_env()):
+- LLM_ADMISSION_ENABLED      "0" admits everything immediately (default: 1)
+- LLM_RPM                    requests per minute (default: 500)
+- LLM_TPM                    tokens per minute (default: 200000)
+- LLM_QUEUE_INTERACTIVE      max queued interactive calls (default: 64)
+- LLM_QUEUE_BATCH            max queued batch calls (default: 256)
+- LLM_MAX_WAIT_INTERACTIVE   max queue wait in seconds for interactive calls (default: 10)
+- LLM_MAX_WAIT_BATCH         max queue wait in seconds for batch calls (default: 600)
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+
+class AdmissionRejected(Exception):
+    """The call was not admitted. `status` is the HTTP status to answer with (429 or 503)."""
+
+    def __init__(self, message: str, status: int = 429, retry_after: float = 1.0):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        self._refill(now)
+        # A reservation larger than the bucket only has to wait for a full one
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate if self.rate > 0 else math.inf
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass(order=True)
+class _Waiter:
+    rank: int
+    seq: int
+    tokens: int = field(compare=False)
+    priority: str = field(compare=False)
+    enqueued: float = field(compare=False)
+    granted: bool = field(default=False, compare=False)
+    abandoned: bool = field(default=False, compare=False)
+    wake: Callable[[], None] = field(default=lambda: None, compare=False, repr=False)
+
+
+class Ticket:
+    """An admitted call. settle() with the real token usage once it is known."""
+
+    def __init__(self, controller: "AdmissionController", tokens: int, priority: str, waited: float):
+        self._controller = controller
+        self.tokens = tokens
+        self.priority = priority
+        self.waited = waited
+        self._settled = False
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        if self._settled or actual_tokens is None:
+            return
+        self._settled = True
+        self._controller._adjust(actual_tokens - self.tokens)
+
+
+WaitHook = Callable[[str, float, str], None]
+
+
+class AdmissionController:
+    def __init__(self, rpm: float = 500, tpm: float = 200_000, enabled: bool = True,
+                 max_queue: Optional[Dict[str, int]] = None, max_wait: Optional[Dict[str, float]] = None):
+        self.enabled = enabled
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_queue = {INTERACTIVE: 64, BATCH: 256, **(max_queue or {})}
+        self.max_wait = {INTERACTIVE: 10.0, BATCH: 600.0, **(max_wait or {})}
+        self._lock = threading.Lock()
+        self._heap: List[_Waiter] = []
+        self._queued = {p: 0 for p in PRIORITIES}
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        # Called as hook(priority, seconds waited, outcome) for every admission decision
+        self.on_wait: Optional[WaitHook] = None
+        self._counts: Dict[str, int] = {}
+        self._recent: Dict[str, Deque[float]] = {p: deque(maxlen=1000) for p in PRIORITIES}
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            rpm=float(os.getenv("LLM_RPM", "500")),
+            tpm=float(os.getenv("LLM_TPM", "200000")),
+            enabled=os.getenv("LLM_ADMISSION_ENABLED", "1") != "0",
+            max_queue={
+                INTERACTIVE: int(os.getenv("LLM_QUEUE_INTERACTIVE", "64")),
+                BATCH: int(os.getenv("LLM_QUEUE_BATCH", "256")),
+            },
+            max_wait={
+                INTERACTIVE: float(os.getenv("LLM_MAX_WAIT_INTERACTIVE", "10")),
+                BATCH: float(os.getenv("LLM_MAX_WAIT_BATCH", "600")),
+            },
+        )
+
+    # --------- core (all under self._lock) ---------
+    def _head_wait(self, waiter: _Waiter, now: float) -> float:
+        return max(
+            self._paused_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(waiter.tokens, now),
+        )
+
+    def _dispatch(self, now: float) -> float:
+        """Admit waiters from the head while the buckets allow; returns the head's remaining wait."""
+        while self._heap:
+            head = self._heap[0]
+            if head.abandoned:
+                heapq.heappop(self._heap)
+                continue
+            wait = self._head_wait(head, now)
+            if wait > 0:
+                return wait
+            heapq.heappop(self._heap)
+            self._queued[head.priority] -= 1
+            self.requests.take(1, now)
+            self.tokens.take(head.tokens, now)
+            head.granted = True
+            head.wake()
+        return 0.0
+
+    def _estimate_wait(self, tokens: int, rank: int, now: float) -> float:
+        """Rough time until a new caller at `rank` would be admitted."""
+        ahead = [w for w in self._heap if not w.abandoned and w.rank <= rank]
+        need_tokens = sum(w.tokens for w in ahead) + min(tokens, self.tokens.capacity)
+        need_requests = len(ahead) + 1
+        return max(
+            self._paused_until - now,
+            self.tokens.wait_time(need_tokens, now) if need_tokens <= self.tokens.capacity
+            else (need_tokens - self.tokens.level) / max(self.tokens.rate, 1e-9),
+            self.requests.wait_time(need_requests, now) if need_requests <= self.requests.capacity
+            else (need_requests - self.requests.level) / max(self.requests.rate, 1e-9),
+        )
+
+    def _enqueue(self, tokens: int, priority: str, wake: Callable[[], None]) -> _Waiter:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        tokens = max(0, int(tokens))
+        now = time.monotonic()
+        with self._lock:
+            rank = PRIORITIES[priority]
+            if self._queued[priority] >= self.max_queue[priority]:
+                self._record(priority, 0.0, "rejected_queue_full")
+                raise AdmissionRejected(f"LLM {priority} queue is full", status=503,
+                                        retry_after=max(1.0, self._estimate_wait(tokens, rank, now)))
+            estimate = self._estimate_wait(tokens, rank, now)
+            if estimate > self.max_wait[priority]:
+                self._record(priority, 0.0, "rejected_wait")
+                raise AdmissionRejected(f"LLM rate limit: estimated wait {estimate:.1f}s", status=429,
+                                        retry_after=estimate)
+            waiter = _Waiter(rank, next(self._seq), tokens, priority, now, wake=wake)
+            heapq.heappush(self._heap, waiter)
+            self._queued[priority] += 1
+            self._dispatch(now)
+            return waiter
+
+    def _poll(self, waiter: _Waiter) -> float:
+        """Try to admit; returns 0 once granted, else how long to sleep before retrying."""
+        with self._lock:
+            if waiter.granted:
+                return 0.0
+            wait = self._dispatch(time.monotonic())
+            return 0.0 if waiter.granted else max(0.001, wait)
+
+    def _give_up(self, waiter: _Waiter, outcome: str) -> None:
+        with self._lock:
+            if waiter.granted:
+                # Admitted while we were cancelling: hand the reservation back
+                self.requests.give(1)
+                self.tokens.give(waiter.tokens)
+            else:
+                waiter.abandoned = True
+                self._queued[waiter.priority] -= 1
+            self._record(waiter.priority, time.monotonic() - waiter.enqueued, outcome)
+            self._dispatch(time.monotonic())
+
+    def _admitted(self, waiter: _Waiter) -> Ticket:
+        waited = time.monotonic() - waiter.enqueued
+        with self._lock:
+            self._record(waiter.priority, waited, "admitted")
+        return Ticket(self, waiter.tokens, waiter.priority, waited)
+
+    def _adjust(self, delta_tokens: int) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if delta_tokens > 0:
+                self.tokens.take(delta_tokens, now)
+            else:
+                self.tokens.give(-delta_tokens)
+                self._dispatch(now)
+
+    def _record(self, priority: str, waited: float, outcome: str) -> None:
+        key = f"{priority}_{outcome}"
+        self._counts[key] = self._counts.get(key, 0) + 1
+        if outcome == "admitted":
+            self._recent[priority].append(waited)
+        if self.on_wait is not None:
+            try:
+                self.on_wait(priority, waited, outcome)
+            except Exception as e:
+                print(f"Admission: wait hook failed: {e}")
+
+    # --------- public API ---------
+    async def acquire(self, tokens: int = 0, priority: str = INTERACTIVE,
+                      timeout: Optional[float] = None) -> Ticket:
+        """Wait for admission. Raises AdmissionRejected if the call can't be admitted in time."""
+        if not self.enabled:
+            return Ticket(self, 0, priority, 0.0)
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = self._enqueue(tokens, priority, wake=lambda: loop.call_soon_threadsafe(event.set))
+        deadline = waiter.enqueued + (timeout if timeout is not None else self.max_wait[priority])
+        try:
+            while True:
+                wait = self._poll(waiter)
+                if wait == 0.0:
+                    return self._admitted(waiter)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AdmissionRejected(f"LLM {priority} queue wait timed out", status=429,
+                                            retry_after=wait)
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(wait, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        except AdmissionRejected:
+            self._give_up(waiter, "timed_out")
+            raise
+        except BaseException:
+            self._give_up(waiter, "cancelled")
+            raise
+
+    def acquire_sync(self, tokens: int = 0, priority: str = BATCH,
+                     timeout: Optional[float] = None) -> Ticket:
+        """Blocking acquire() for threads and scripts."""
+        if not self.enabled:
+            return Ticket(self, 0, priority, 0.0)
+        event = threading.Event()
+        waiter = self._enqueue(tokens, priority, wake=event.set)
+        deadline = waiter.enqueued + (timeout if timeout is not None else self.max_wait[priority])
+        try:
+            while True:
+                wait = self._poll(waiter)
+                if wait == 0.0:
+                    return self._admitted(waiter)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AdmissionRejected(f"LLM {priority} queue wait timed out", status=429,
+                                            retry_after=wait)
+                event.wait(min(wait, remaining))
+        except AdmissionRejected:
+            self._give_up(waiter, "timed_out")
+            raise
+        except BaseException:
+            self._give_up(waiter, "cancelled")
+            raise
+
+    def penalize(self, retry_after: float) -> None:
+        """The provider answered 429: admit nothing for `retry_after` seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, retry_after))
+            self._counts["upstream_429"] = self._counts.get("upstream_429", 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens._refill(now)
+            self.requests._refill(now)
+            waits = {}
+            for priority, recent in self._recent.items():
+                ordered = sorted(recent)
+                waits[priority] = {
+                    "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1) if ordered else 0.0,
+                    "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 1)
+                    if ordered else 0.0,
+                }
+            return {
+                "enabled": self.enabled,
+                "queued": dict(self._queued),
+                "requests_available": round(self.requests.level, 1),
+                "tokens_available": round(self.tokens.level),
+                "paused_sec": round(max(0.0, self._paused_until - now), 3),
+                "counts": dict(self._counts),
+                "wait": waits,
+            }
+
+
+def retry_after_from(error: Any, default: float = 1.0) -> float:
+    """Retry-After seconds from a provider error that carries an HTTP response, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", default))
+    except (TypeError, ValueError):
+        return default
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int] = None,
+                    default_completion: int = 512) -> int:
+    """Cheap up-front token estimate for a chat request (~4 characters per token)."""
+    chars = sum(len(str(m.get("content", ""))) for m in messages)
+    return chars // 4 + 4 * len(messages) + (max_tokens or default_completion)
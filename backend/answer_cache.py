@@ -0,0 +1,237 @@
+"""
+Answer cache for /chat.
+
+Lookups go through two layers, both scoped to a hash of the retrieved
+context, so an answer is only reused while retrieval still returns the same
+material (re-ingesting the resumes changes the context and misses the cache):
+
+1. exact: normalized question text
+2. near-duplicate: cosine similarity of hashed word/char-trigram vectors
+   against cached questions, above ANSWER_CACHE_SIMILARITY
+
+Entries are evicted LRU beyond ANSWER_CACHE_MAX_ENTRIES and expire after
+ANSWER_CACHE_TTL seconds. Every entry is written through to a SQLite file so
+the cache survives restarts.
+
+Configuration (env):
+- ANSWER_CACHE_ENABLED      "0" disables the cache (default: 1)
+- ANSWER_CACHE_PATH         SQLite file (default: backend/.cache/answers.sqlite3)
+- ANSWER_CACHE_MAX_ENTRIES  in-memory LRU size (default: 512)
+- ANSWER_CACHE_TTL          entry lifetime in seconds (default: 86400)
+- ANSWER_CACHE_SIMILARITY   near-duplicate threshold, 0-1 (default: 0.9)
+"""
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+VECTOR_DIMS = 1 << 18
+_NON_WORD = re.compile(r"[^a-z0-9\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", message or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def vectorize(normalized: str) -> Dict[int, float]:
+    """Hashing vectorizer: word unigrams + char trigrams, L2-normalized."""
+    counts: Dict[int, float] = {}
+    for word in normalized.split():
+        features = [f"w:{word}"]
+        padded = f" {word} "
+        features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        for feat in features:
+            h = zlib.crc32(feat.encode("utf-8")) % VECTOR_DIMS
+            counts[h] = counts.get(h, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {k: v / norm for k, v in counts.items()}
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+def context_key(search_results: Iterable[Any]) -> str:
+    """Stable hash of the retrieved context."""
+    h = hashlib.sha256()
+    for r in search_results:
+        h.update(str(r).encode("utf-8", "replace"))
+        h.update(b"\x00")
+    return h.hexdigest()[:32]
+
+
+@dataclass
+class CacheEntry:
+    normalized: str
+    context_hash: str
+    answer: str
+    created_at: float
+    vector: Dict[int, float] = field(default_factory=dict, repr=False)
+
+
+class AnswerCache:
+    def __init__(self, path: Optional[str], max_entries: int = 512, ttl: float = 86400.0,
+                 similarity: float = 0.9, enabled: bool = True):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.similarity = similarity
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits_exact = 0
+        self.hits_near = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "AnswerCache":
+        default_path = os.path.join(os.path.dirname(__file__), ".cache", "answers.sqlite3")
+        return cls(
+            path=os.getenv("ANSWER_CACHE_PATH", default_path) or None,
+            max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512")),
+            ttl=float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+            similarity=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.9")),
+            enabled=os.getenv("ANSWER_CACHE_ENABLED", "1") != "0",
+        )
+
+    # --------- persistence ---------
+    def load(self) -> None:
+        """Open the on-disk tier and warm memory with the newest live entries."""
+        if not self.enabled or not self.path or self._db is not None:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " normalized TEXT NOT NULL, context_hash TEXT NOT NULL,"
+                " answer TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (normalized, context_hash))"
+            )
+            self._db.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl,))
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT normalized, context_hash, answer, created_at FROM answers"
+                " ORDER BY created_at DESC LIMIT ?", (self.max_entries,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Answer cache: disk tier unavailable ({e}), running memory-only")
+            self._db = None
+            return
+        # Oldest first so the newest end up most recently used
+        for normalized, context_hash, answer, created_at in reversed(rows):
+            self._entries[(normalized, context_hash)] = CacheEntry(
+                normalized, context_hash, answer, created_at, vectorize(normalized)
+            )
+        print(f"Answer cache: loaded {len(rows)} entries from {self.path}")
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _disk(self, sql: str, params: tuple) -> None:
+        if self._db is None:
+            return
+        try:
+            self._db.execute(sql, params)
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Answer cache: disk write failed: {e}")
+
+    # --------- lookups ---------
+    def get(self, message: str, context_hash: str) -> Optional[Tuple[str, str]]:
+        """Return (answer, layer) where layer is "exact" or "near", or None on a miss."""
+        if not self.enabled:
+            return None
+        normalized = normalize_message(message)
+        now = time.time()
+
+        entry = self._entries.get((normalized, context_hash))
+        if entry is not None:
+            if now - entry.created_at <= self.ttl:
+                self._entries.move_to_end((normalized, context_hash))
+                self.hits_exact += 1
+                return entry.answer, "exact"
+            self._drop([entry])
+
+        vector = vectorize(normalized)
+        best: Optional[CacheEntry] = None
+        best_score = self.similarity
+        expired = []
+        for candidate in self._entries.values():
+            if candidate.context_hash != context_hash:
+                continue
+            if now - candidate.created_at > self.ttl:
+                expired.append(candidate)
+                continue
+            score = cosine(vector, candidate.vector)
+            if score >= best_score:
+                best, best_score = candidate, score
+        self._drop(expired)
+        if best is not None:
+            self._entries.move_to_end((best.normalized, best.context_hash))
+            self.hits_near += 1
+            return best.answer, "near"
+
+        self.misses += 1
+        return None
+
+    def put(self, message: str, context_hash: str, answer: str) -> None:
+        if not self.enabled or not answer:
+            return
+        normalized = normalize_message(message)
+        key = (normalized, context_hash)
+        now = time.time()
+        self._entries[key] = CacheEntry(normalized, context_hash, answer, now, vectorize(normalized))
+        self._entries.move_to_end(key)
+        self._disk(
+            "INSERT OR REPLACE INTO answers (normalized, context_hash, answer, created_at) VALUES (?, ?, ?, ?)",
+            (normalized, context_hash, answer, now),
+        )
+        while len(self._entries) > self.max_entries:
+            (old_norm, old_ctx), _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            self._disk("DELETE FROM answers WHERE normalized = ? AND context_hash = ?", (old_norm, old_ctx))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._disk("DELETE FROM answers", ())
+
+    def _drop(self, entries: Iterable[CacheEntry]) -> None:
+        for entry in entries:
+            self._entries.pop((entry.normalized, entry.context_hash), None)
+            self._disk(
+                "DELETE FROM answers WHERE normalized = ? AND context_hash = ?",
+                (entry.normalized, entry.context_hash),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits_exact + self.hits_near + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits_exact": self.hits_exact,
+            "hits_near": self.hits_near,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits_exact + self.hits_near) / lookups, 4) if lookups else 0.0,
+            "persistent": self._db is not None,
+        }
@@ -0,0 +1,93 @@
+"""
+Benchmark /chat latency against the local stub LLM.
+
+Starts bench/stub_llm.py and the backend (with fake Cognee) as subprocesses,
+then fires chats at 1, 10 and 100 concurrent clients and prints p50/p99.
+The answer cache is off and all state goes to a temporary directory, so
+every chat reaches the LLM and backend/.cache is left alone.
+
+Usage (from backend/):
+    python bench/bench_chat.py --latency-ms 300 --requests 200
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import httpx
+
+from common import percentile, spawn, state_env, stop, wait_http
+
+LLM_PORT = 8399
+API_PORT = 8400
+
+
+async def run_level(concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{API_PORT}", timeout=120, limits=limits) as client:
+        async def worker():
+            nonlocal errors
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                t0 = time.perf_counter()
+                try:
+                    r = await client.post("/chat", json={"message": f"What are Pedro's skills? #{i}"})
+                    r.raise_for_status()
+                    latencies.append(time.perf_counter() - t0)
+                except httpx.HTTPError:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "rps": total / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /chat against a stub LLM")
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--levels", default="1,10,100")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        stub = spawn("stub_llm.py", ["--port", str(LLM_PORT), "--latency-ms", str(args.latency_ms)])
+        # The questions differ only by a number, so the answer cache would serve most of them
+        api = spawn("serve_fake.py", ["--port", str(API_PORT)], env={
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{LLM_PORT}/v1",
+            "OPENAI_API_KEY": "stub",
+            "ANSWER_CACHE_ENABLED": "0",
+            **state_env(state_dir),
+        })
+        try:
+            wait_http(f"http://127.0.0.1:{LLM_PORT}/docs")
+            wait_http(f"http://127.0.0.1:{API_PORT}/")
+            print(f"stub LLM latency: {args.latency_ms:.0f} ms")
+            print(f"{'conc':>5} {'reqs':>6} {'err':>4} {'rps':>8} {'p50 ms':>9} {'p99 ms':>9}")
+            for level in [int(x) for x in args.levels.split(",") if x]:
+                res = asyncio.run(run_level(level, max(args.requests, level)))
+                print(f"{res['concurrency']:>5} {res['requests']:>6} {res['errors']:>4} "
+                      f"{res['rps']:>8.1f} {res['p50_ms']:>9.1f} {res['p99_ms']:>9.1f}")
+        finally:
+            stop(api, stub)
+
+
+if __name__ == "__main__":
+    main()
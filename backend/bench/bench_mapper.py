@@ -0,0 +1,129 @@
+"""
+Benchmark the LangExtract extraction -> graph mapper (tools/graph_mapper.py)
+on synthetic documents.
+
+Each document is --extractions extractions, about 40% entities and 60%
+relations naming their ends by text (random case), with --forward of the
+relations appearing before the entity they name and a few naming entities
+that never appear. The shared mapper is timed at every size; the previous
+mapper (a label scan per relation end, kept below for reference) only up to
+--legacy-max, since it is quadratic. Where both run, their graphs are
+compared.
+
+Usage (from backend/):
+    python bench/bench_mapper.py --extractions 1000,10000,100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(BENCH_DIR)))
+
+from tools.graph_mapper import NODE_CLASSES, iter_extractions, map_extractions, slug  # noqa: E402
+
+TYPES = sorted(NODE_CLASSES)
+RELATIONS = ["worked_at", "studied_at", "built", "used", "member_of", "collaborated_with"]
+
+
+def synthetic_document(count: int, forward: float = 0.2, seed: int = 7):
+    rnd = random.Random(seed)
+    n_entities = max(2, int(count * 0.4))
+    labels = [f"{TYPES[i % len(TYPES)]} entity {i}" for i in range(n_entities)]
+    entities = [
+        {"extraction_class": TYPES[i % len(TYPES)], "extraction_text": label, "attributes": {"rank": i}}
+        for i, label in enumerate(labels)
+    ]
+
+    def name(i: int) -> str:
+        label = labels[i]
+        return rnd.choice([label, label.upper(), label.title()])
+
+    extractions = []
+    relations = count - n_entities
+    seen = 0
+    for k in range(relations):
+        # Interleave entities and relations as a document would
+        target_seen = min(n_entities, (k + 1) * n_entities // relations)
+        extractions.extend(entities[seen:target_seen])
+        seen = target_seen
+        ahead = rnd.random() < forward and seen < n_entities
+        src = rnd.randrange(max(1, seen))
+        dst = rnd.randrange(seen, n_entities) if ahead else rnd.randrange(max(1, seen))
+        attrs = {"relation": rnd.choice(RELATIONS), "source_text": name(src), "target_text": name(dst)}
+        if rnd.random() < 0.01:
+            attrs["target_text"] = f"unseen entity {k}"
+        extractions.append({"extraction_class": "Relation", "extraction_text": "", "attributes": attrs})
+    extractions.extend(entities[seen:])
+    return {"extractions": extractions}
+
+
+def legacy_map(raw):
+    """The mapper before tools/graph_mapper.py: resolves text by scanning every node."""
+    nodes, edges, node_index, edge_ids = [], [], {}, set()
+    for ex in iter_extractions(raw):
+        clazz = str(ex.get("extraction_class") or "").strip()
+        text = str(ex.get("extraction_text") or "").strip()
+        attrs = ex.get("attributes") or {}
+        if clazz in NODE_CLASSES:
+            label = text or clazz
+            node_id = str(attrs.get("id") or slug(label))
+            if node_id in node_index:
+                node_index[node_id].update(attrs)
+                continue
+            node = {"id": node_id, "label": label, "type": clazz, **attrs}
+            node_index[node_id] = node
+            nodes.append(node)
+        elif clazz in {"Relation", "Edge"}:
+            def resolve(lid):
+                if not lid:
+                    return None
+                if lid in node_index:
+                    return lid
+                for n in nodes:
+                    if str(n.get("label")).lower() == lid.lower():
+                        return n["id"]
+                return slug(lid)
+
+            relation = attrs.get("relation") or "related_to"
+            src = str(attrs.get("sourceId") or resolve(attrs.get("source_text")) or "")
+            tgt = str(attrs.get("targetId") or resolve(attrs.get("target_text")) or "")
+            edge_id = f"{src}-{relation}-{tgt}"
+            if src and tgt and src != tgt and edge_id not in edge_ids:
+                edge_ids.add(edge_id)
+                edges.append({"id": edge_id, "source": src, "target": tgt, "relation": relation})
+    return {"nodes": nodes, "edges": edges}
+
+
+def timed(fn, raw):
+    t0 = time.perf_counter()
+    out = fn(raw)
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extraction -> graph mapper benchmark")
+    parser.add_argument("--extractions", default="1000,10000,100000", help="comma-separated document sizes")
+    parser.add_argument("--forward", type=float, default=0.2, help="share of relations naming a later entity")
+    parser.add_argument("--legacy-max", type=int, default=20000, help="largest size to run the old mapper on")
+    args = parser.parse_args()
+
+    print(f"{'extractions':>11} {'nodes':>7} {'edges':>7} {'mapper s':>9} {'legacy s':>9} {'speedup':>8}  same graph")
+    for size in [int(s) for s in args.extractions.split(",") if s.strip()]:
+        raw = synthetic_document(size, args.forward)
+        mapped, elapsed = timed(map_extractions, raw)
+        row = f"{size:>11} {len(mapped['nodes']):>7} {len(mapped['edges']):>7} {elapsed:>9.3f}"
+        if size <= args.legacy_max:
+            legacy, legacy_elapsed = timed(legacy_map, raw)
+            same = ({n["id"] for n in mapped["nodes"]} == {n["id"] for n in legacy["nodes"]}
+                    and {e["id"] for e in mapped["edges"]} == {e["id"] for e in legacy["edges"]})
+            row += f" {legacy_elapsed:>9.3f} {legacy_elapsed / elapsed:>7.0f}x  {'yes' if same else 'NO'}"
+        else:
+            row += f" {'-':>9} {'-':>8}  -"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark graph_search.SearchIndex on a synthetic graph.
+
+Generates --nodes nodes shaped like public/knowledge-graph.json (label,
+type, title, description, technologies), builds the index, then times
+queries (exact, multi-term and prefix) and an incremental sync.
+
+Usage (from backend/):
+    python bench/bench_search.py --nodes 1000000 --queries 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from common import percentile  # noqa: E402
+from graph_search import SearchIndex  # noqa: E402
+
+TYPES = ["Skill", "Technology", "Experience", "Project", "Education", "Certification"]
+WORDS = ("python react kubernetes docker postgres redis kafka spark airflow terraform rag llm agents "
+         "graph vision pipeline streaming analytics platform cloud gcp aws azure bigquery vertex "
+         "fastapi remix typescript rust golang pandas numpy pytorch tensorflow langchain cognee").split()
+
+
+def synthetic_nodes(count: int, seed: int = 7):
+    rnd = random.Random(seed)
+    for i in range(count):
+        yield {
+            "id": f"node-{i}",
+            "type": TYPES[i % len(TYPES)],
+            "title": " ".join(rnd.sample(WORDS, 2)) + f" {i % 5000}",
+            "description": " ".join(rnd.sample(WORDS, 6)),
+            "technologies": rnd.sample(WORDS, 3),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Graph full-text search benchmark")
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    nodes = list(synthetic_nodes(args.nodes))
+    index = SearchIndex()
+    t0 = time.perf_counter()
+    index.build(nodes)
+    print(f"build: {args.nodes} nodes in {time.perf_counter() - t0:.1f}s {index.stats()}")
+
+    rnd = random.Random(1)
+    kinds = {
+        "term": lambda: rnd.choice(WORDS),
+        "two terms": lambda: " ".join(rnd.sample(WORDS, 2)),
+        "prefix": lambda: rnd.choice(WORDS)[:3],
+        "id": lambda: f"node {rnd.randrange(args.nodes)}",
+    }
+    print(f"{'query':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, make in kinds.items():
+        latencies = []
+        for _ in range(args.queries):
+            q = make()
+            t0 = time.perf_counter()
+            index.search(q, limit=10)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        print(f"{name:>10} {percentile(latencies, 50):8.2f} {percentile(latencies, 99):8.2f}")
+
+    # Incremental sync: edit 0.1% of the nodes
+    for node in rnd.sample(nodes, max(1, args.nodes // 1000)):
+        node["description"] += " zeppelin"
+    t0 = time.perf_counter()
+    changes = index.sync(nodes)
+    print(f"sync: {changes} in {time.perf_counter() - t0:.1f}s {index.stats()}")
+    t0 = time.perf_counter()
+    hits = index.search("zeppelin", limit=10)
+    print(f"delta query: {len(hits)} hits in {(time.perf_counter() - t0) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark backend startup: time to liveness, to readiness and the latency of
+the first requests, with and without the background warm-up.
+
+Starts bench/stub_llm.py once, then the backend (fake Cognee, whose import
+is slowed down by --cognee-import-ms to stand in for the real package) once
+per mode, and prints one row per mode.
+
+Usage (from backend/):
+    python bench/bench_startup.py --cognee-import-ms 3000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import httpx
+
+from common import spawn, stop, wait_http
+
+LLM_PORT = 8399
+API_PORT = 8400
+
+
+def wait_status(url: str, status: int, timeout: float = 60.0) -> float:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == status:
+                return time.time()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    raise RuntimeError(f"{url} did not return {status} within {timeout}s")
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    r = fn()
+    r.raise_for_status()
+    return (time.perf_counter() - t0) * 1000
+
+
+def run_mode(warm: bool, import_ms: float, state_dir: str) -> dict:
+    env = {
+        "FAKE_COGNEE_IMPORT_MS": str(import_ms),
+        "WARMUP_ENABLED": "1" if warm else "0",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{LLM_PORT}/v1",
+        "OPENAI_API_KEY": "stub",
+        "ANSWER_CACHE_ENABLED": "0",
+        "GRAPH_STATE_PATH": os.path.join(state_dir, "graph_state.json"),
+    }
+    base = f"http://127.0.0.1:{API_PORT}"
+    t_spawn = time.time()
+    api = spawn("serve_fake.py", ["--port", str(API_PORT)], env)
+    try:
+        t_live = wait_status(f"{base}/healthz", 200)
+        t_ready = wait_status(f"{base}/readyz", 200)
+        if warm:
+            # The graph snapshot is optional and may still be building
+            deadline = time.time() + 30
+            while httpx.get(f"{base}/readyz").json()["steps"].get("graph", {}).get("status") in ("pending", "running"):
+                if time.time() > deadline:
+                    break
+                time.sleep(0.02)
+        first_graph = timed(lambda: httpx.get(f"{base}/graph", timeout=60))
+        first_chat = timed(lambda: httpx.post(f"{base}/chat", json={"message": "Where did Pedro work?"}, timeout=60))
+        second_chat = timed(lambda: httpx.post(f"{base}/chat", json={"message": "What are Pedro's skills?"}, timeout=60))
+    finally:
+        stop(api)
+    return {
+        "live": (t_live - t_spawn) * 1000,
+        "ready": (t_ready - t_spawn) * 1000,
+        "first_graph": first_graph,
+        "first_chat": first_chat,
+        "second_chat": second_chat,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backend startup benchmark")
+    parser.add_argument("--cognee-import-ms", type=float, default=3000)
+    parser.add_argument("--llm-latency-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    llm = spawn("stub_llm.py", ["--port", str(LLM_PORT)], {"STUB_LLM_LATENCY_MS": str(args.llm_latency_ms)})
+    try:
+        wait_http(f"http://127.0.0.1:{LLM_PORT}/docs")
+        print(f"fake cognee import: {args.cognee_import_ms:.0f}ms, stub LLM latency: {args.llm_latency_ms:.0f}ms")
+        print(f"{'mode':>8} {'live ms':>9} {'ready ms':>9} {'1st /graph':>11} {'1st /chat':>10} {'2nd /chat':>10}")
+        with tempfile.TemporaryDirectory() as state_dir:
+            for warm in (False, True):
+                r = run_mode(warm, args.cognee_import_ms, state_dir)
+                print(f"{'warm' if warm else 'cold':>8} {r['live']:9.0f} {r['ready']:9.0f} "
+                      f"{r['first_graph']:11.1f} {r['first_chat']:10.1f} {r['second_chat']:10.1f}")
+    finally:
+        stop(llm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+
+def state_env(state_dir: str) -> Dict[str, str]:
+    """Env pointing every on-disk cache and state file of the backend into state_dir, not backend/.cache."""
+    return {
+        "ANSWER_CACHE_PATH": os.path.join(state_dir, "answers.sqlite3"),
+        "GRAPH_STATE_PATH": os.path.join(state_dir, "graph_state.json"),
+        "INGEST_MANIFEST_PATH": os.path.join(state_dir, "ingest_manifest.json"),
+        "VECTOR_INDEX_DIR": os.path.join(state_dir, "vectors"),
+        "DOC_TEXT_CACHE_DIR": os.path.join(state_dir, "doc_text"),
+    }
+
+
+def spawn(script: str, args: List[str], env: Optional[Dict[str, str]] = None,
+          quiet: bool = False) -> subprocess.Popen:
+    """Start one of the bench scripts as a subprocess with backend/ as cwd (quiet: drop its stdout)."""
+    return subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, script), *args],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL if quiet else None,
+    )
+
+
+def wait_http(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def stop(*procs: subprocess.Popen) -> None:
+    for p in procs:
+        p.terminate()
+    for p in procs:
+        try:
+            p.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
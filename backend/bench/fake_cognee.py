@@ -0,0 +1,155 @@
+"""
+In-process stand-in for the `cognee` package, used by the benchmarks.
+
+install() makes `import cognee` resolve to this module so main.py can be
+imported and served without a real Cognee installation or graph database.
+The first import sleeps FAKE_COGNEE_IMPORT_MS, standing in for the real
+package's import time.
+
+With FAKE_COGNEE_NODES set, the graph engine returns a generated graph of
+that size instead of the three-node sample (deterministic for a given seed),
+so /graph, /graph/neighborhood and /graph/search can be measured at scale.
+
+Configuration (env):
+- FAKE_COGNEE_SEARCH_MS       latency of cognee.search in ms (default: 50)
+- FAKE_COGNEE_SEARCH_ERRORS   fraction of searches that raise, 0-1 (default: 0)
+- FAKE_COGNEE_IMPORT_MS       time the first `import cognee` takes in ms (default: 0)
+- FAKE_COGNEE_GRAPH_MS        latency of get_graph_data in ms (default: 0)
+- FAKE_COGNEE_ADD_MS          latency of cognee.add in ms (default: 0)
+- FAKE_COGNEE_COGNIFY_MS      latency of cognee.cognify in ms (default: 0)
+- FAKE_COGNEE_NODES           generated graph size; 0 keeps the sample graph (default: 0)
+- FAKE_COGNEE_EDGES_PER_NODE  average edges per generated node (default: 2)
+- FAKE_COGNEE_SEED            seed for the generated graph (default: 1)
+"""
+import asyncio
+import importlib.abc
+import importlib.machinery
+import os
+import random
+import sys
+import time
+import types
+
+SEARCH_MS = float(os.getenv("FAKE_COGNEE_SEARCH_MS", "50"))
+SEARCH_ERRORS = float(os.getenv("FAKE_COGNEE_SEARCH_ERRORS", "0"))
+IMPORT_MS = float(os.getenv("FAKE_COGNEE_IMPORT_MS", "0"))
+GRAPH_MS = float(os.getenv("FAKE_COGNEE_GRAPH_MS", "0"))
+ADD_MS = float(os.getenv("FAKE_COGNEE_ADD_MS", "0"))
+COGNIFY_MS = float(os.getenv("FAKE_COGNEE_COGNIFY_MS", "0"))
+NODES = int(os.getenv("FAKE_COGNEE_NODES", "0"))
+EDGES_PER_NODE = float(os.getenv("FAKE_COGNEE_EDGES_PER_NODE", "2"))
+SEED = int(os.getenv("FAKE_COGNEE_SEED", "1"))
+
+SEARCH_RESULTS = [
+    "Pedro Reichow worked at QI Tech as a Senior Software Engineer.",
+    "Pedro builds knowledge graph and LLM applications with Python and React.",
+    "Pedro studied Computer Science in Santa Catarina, Brazil.",
+]
+
+
+async def search(query_text, *args, **kwargs):
+    await asyncio.sleep(SEARCH_MS / 1000.0)
+    if SEARCH_ERRORS and random.random() < SEARCH_ERRORS:
+        raise RuntimeError("fake cognee: search failed")
+    return list(SEARCH_RESULTS)
+
+
+async def add(data, dataset_name=None, **kwargs):
+    await asyncio.sleep(ADD_MS / 1000.0)
+    return None
+
+
+async def cognify(*args, **kwargs):
+    await asyncio.sleep(COGNIFY_MS / 1000.0)
+    return None
+
+
+async def _prune_data():
+    return None
+
+
+prune = types.SimpleNamespace(prune_data=_prune_data)
+
+
+NODE_TYPES = ["Person", "Experience", "Skill", "Project", "Education", "Organization", "Technology"]
+RELATIONSHIPS = ["worked_at", "used", "built", "studied_at", "knows", "related_to"]
+WORDS = ["graph", "python", "react", "data", "platform", "search", "cloud", "api", "model",
+         "pipeline", "engine", "service", "analytics", "ontology", "agent", "stream"]
+
+
+def generate_graph(n_nodes, edges_per_node=2.0, seed=1):
+    """A random graph in Cognee's get_graph_data() shape: ([(id, props)], [(src, dst, props)])."""
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(n_nodes):
+        node_type = NODE_TYPES[i % len(NODE_TYPES)]
+        name = " ".join(rng.choice(WORDS) for _ in range(2)).title() + f" {i}"
+        nodes.append((f"n{i}", {
+            "name": name,
+            "type": node_type,
+            "description": f"{node_type} about " + ", ".join(rng.choice(WORDS) for _ in range(6)),
+        }))
+    edges = []
+    if n_nodes > 1:
+        for _ in range(int(n_nodes * edges_per_node)):
+            # Skewed towards low ids, so a few hubs get most of the edges
+            src = (int(rng.paretovariate(1.2)) - 1) % n_nodes
+            dst = rng.randrange(n_nodes)
+            if src != dst:
+                edges.append((f"n{src}", f"n{dst}", {"relationship": rng.choice(RELATIONSHIPS)}))
+    return nodes, edges
+
+
+class FakeGraphEngine:
+    def __init__(self):
+        self._generated = None
+
+    async def get_graph_data(self):
+        await asyncio.sleep(GRAPH_MS / 1000.0)
+        if NODES > 0:
+            if self._generated is None:
+                self._generated = generate_graph(NODES, EDGES_PER_NODE, SEED)
+            nodes, edges = self._generated
+            return list(nodes), list(edges)
+        nodes = [
+            ("pedro", {"name": "Pedro Reichow", "type": "Person"}),
+            ("qi_tech", {"name": "QI Tech", "type": "Experience"}),
+            ("python", {"name": "Python", "type": "Skill"}),
+        ]
+        edges = [
+            ("pedro", "qi_tech", {"relationship": "worked_at"}),
+            ("qi_tech", "python", {"relationship": "used"}),
+        ]
+        return nodes, edges
+
+
+_engine = FakeGraphEngine()
+
+
+async def get_graph_engine():
+    return _engine
+
+
+# cognee.infrastructure.databases.graph.get_graph_engine, as imported by the backend
+_SUBMODULES = ["infrastructure", "databases", "graph", "get_graph_engine"]
+
+
+class _Finder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def find_spec(self, fullname, path, target=None):
+        if fullname == "cognee" or fullname.startswith("cognee."):
+            return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        if spec.name == "cognee":
+            time.sleep(IMPORT_MS / 1000.0)
+            return sys.modules[__name__]
+        return types.ModuleType(spec.name)
+
+    def exec_module(self, module):
+        if module.__name__ == "cognee.infrastructure.databases.graph.get_graph_engine":
+            module.get_graph_engine = get_graph_engine
+
+
+def install():
+    sys.meta_path.insert(0, _Finder())
@@ -0,0 +1,302 @@
+"""
+Load generator for the backend: drives /chat, /graph, /graph/search and
+/ingest at fixed concurrencies and reports throughput and latency percentiles.
+
+By default it starts its own stack (bench/stub_llm.py plus the backend with
+fake Cognee, see serve_fake.py), sized and slowed down by the flags below,
+so runs are repeatable offline. --url points it at a running backend instead
+(e.g. the Docker Compose stack); the fake-stack flags are then ignored.
+
+Each scenario runs for --duration seconds per concurrency level with closed
+loop clients (each sends its next request when the previous one returns).
+The report also shows the mean time per backend stage, taken from the
+difference in /metrics before and after each run.
+
+--json writes the results; --baseline compares against an earlier --json
+file and exits 1 when a run's p99 grew or its throughput dropped by more
+than --max-regression.
+
+Usage (from backend/):
+    python bench/loadgen.py --scenarios chat,graph --levels 1,10,50 --duration 10
+    python bench/loadgen.py --nodes 50000 --scenarios graph,search --json before.json
+    python bench/loadgen.py --json after.json --baseline before.json
+    python bench/loadgen.py --url http://127.0.0.1:8000 --scenarios graph
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from common import percentile, spawn, state_env, stop, wait_http
+
+LLM_PORT = 8399
+API_PORT = 8400
+
+QUESTIONS = [
+    "Where did Pedro work?",
+    "What are Pedro's skills?",
+    "What did Pedro study?",
+    "Which projects used knowledge graphs?",
+    "What programming languages does Pedro know?",
+    "Tell me about Pedro's experience with React.",
+    "Has Pedro worked with LLMs?",
+    "Where is Pedro based?",
+]
+SEARCH_TERMS = ["graph", "python", "react data", "cloud platform", "ana", "ontology agent", "pipe", "api service"]
+
+STAGE_LINE = re.compile(
+    r'^backend_stage_duration_seconds_(sum|count)\{pipeline="([^"]*)",stage="([^"]*)"\} (\S+)$'
+)
+
+
+# --------- scenarios: (client, request number) -> response ---------
+async def chat(client: httpx.AsyncClient, i: int) -> httpx.Response:
+    # Distinct questions per request, so coalescing doesn't merge them. They are
+    # near-duplicates of each other, though: with --answer-cache most are cache hits
+    message = f"{QUESTIONS[i % len(QUESTIONS)]} (#{i})"
+    return await client.post("/chat", json={"message": message})
+
+
+async def graph(client: httpx.AsyncClient, i: int) -> httpx.Response:
+    return await client.get("/graph")
+
+
+async def search(client: httpx.AsyncClient, i: int) -> httpx.Response:
+    return await client.get("/graph/search", params={"q": SEARCH_TERMS[i % len(SEARCH_TERMS)], "limit": 20})
+
+
+class Ingest:
+    """
+    POST /ingest. With a docs directory (fake stack), every request first
+    appends a paragraph to one document, so each run has new chunks to add
+    instead of finding everything unchanged.
+    """
+
+    def __init__(self, docs_dir: Optional[str], force: bool):
+        self.docs_dir = docs_dir
+        self.force = force
+
+    async def __call__(self, client: httpx.AsyncClient, i: int) -> httpx.Response:
+        if self.docs_dir:
+            docs = sorted(os.listdir(self.docs_dir))
+            with open(os.path.join(self.docs_dir, docs[i % len(docs)]), "a", encoding="utf-8") as f:
+                f.write(f"\n\nUpdate {i}: Pedro shipped another release of the {SEARCH_TERMS[i % len(SEARCH_TERMS)]} work.\n")
+        return await client.post("/ingest", params={"force": str(self.force).lower()})
+
+
+def write_docs(docs_dir: str, count: int, paragraphs: int) -> None:
+    for d in range(count):
+        with open(os.path.join(docs_dir, f"doc_{d:03d}.md"), "w", encoding="utf-8") as f:
+            for p in range(paragraphs):
+                f.write(f"Document {d}, section {p}. Pedro worked on {SEARCH_TERMS[(d + p) % len(SEARCH_TERMS)]} "
+                        f"systems, building services in Python and interfaces in React.\n\n")
+
+
+# --------- measurement ---------
+async def stage_totals(client: httpx.AsyncClient) -> Dict[Tuple[str, str], List[float]]:
+    """(pipeline, stage) -> [sum seconds, count] from /metrics; empty if unavailable."""
+    totals: Dict[Tuple[str, str], List[float]] = {}
+    try:
+        r = await client.get("/metrics")
+        r.raise_for_status()
+    except httpx.HTTPError:
+        return totals
+    for line in r.text.splitlines():
+        m = STAGE_LINE.match(line)
+        if m:
+            kind, pipeline, stage, value = m.groups()
+            entry = totals.setdefault((pipeline, stage), [0.0, 0.0])
+            entry[0 if kind == "sum" else 1] = float(value)
+    return totals
+
+
+def stage_means(before, after) -> Dict[str, float]:
+    means = {}
+    for key, (total, count) in after.items():
+        prev_total, prev_count = before.get(key, (0.0, 0.0))
+        if count > prev_count:
+            means["/".join(key)] = round((total - prev_total) / (count - prev_count) * 1000, 2)
+    return means
+
+
+async def run_level(base_url: str, name: str, fn: Callable, concurrency: int, duration: float) -> dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = 0
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        before = await stage_totals(client)
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal counter
+            while time.perf_counter() < deadline:
+                i = counter
+                counter += 1
+                t0 = time.perf_counter()
+                try:
+                    r = await fn(client, i)
+                    if r.status_code >= 400:
+                        errors[str(r.status_code)] = errors.get(str(r.status_code), 0) + 1
+                        continue
+                    await r.aread()
+                    latencies.append(time.perf_counter() - t0)
+                except httpx.HTTPError as e:
+                    errors[e.__class__.__name__] = errors.get(e.__class__.__name__, 0) + 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+        after = await stage_totals(client)
+
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+        "stages_ms": stage_means(before, after),
+    }
+
+
+# --------- report ---------
+def print_header() -> None:
+    print(f"{'scenario':>9} {'conc':>5} {'reqs':>6} {'err':>5} {'rps':>8} "
+          f"{'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+
+
+def print_row(r: dict) -> None:
+    print(f"{r['scenario']:>9} {r['concurrency']:>5} {r['requests']:>6} {sum(r['errors'].values()):>5} "
+          f"{r['rps']:>8.1f} {r['p50_ms']:>9.1f} {r['p90_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f}")
+    if r["errors"]:
+        print(f"{'':>15} errors: " + ", ".join(f"{k}={v}" for k, v in sorted(r["errors"].items())))
+    if r["stages_ms"]:
+        print(f"{'':>15} stages: " + ", ".join(f"{k} {v}ms" for k, v in sorted(r["stages_ms"].items())))
+
+
+def compare(results: List[dict], baseline_path: str, tolerance: float) -> List[str]:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        base = baseline.get((r["scenario"], r["concurrency"]))
+        if base is None:
+            continue
+        label = f"{r['scenario']} x{r['concurrency']}"
+        if base["p99_ms"] and r["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p99 {base['p99_ms']:.1f} -> {r['p99_ms']:.1f} ms")
+        if base["rps"] and r["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: rps {base['rps']:.1f} -> {r['rps']:.1f}")
+    return regressions
+
+
+# --------- fake stack ---------
+def start_stack(args, state_dir: str, docs_dir: str):
+    llm = spawn("stub_llm.py", ["--port", str(LLM_PORT), "--latency-ms", str(args.llm_latency_ms),
+                                "--jitter-ms", str(args.llm_jitter_ms)], quiet=True)
+    api = spawn("serve_fake.py", ["--port", str(API_PORT)], env={
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{LLM_PORT}/v1",
+        "OPENAI_API_KEY": "stub",
+        "ANSWER_CACHE_ENABLED": "1" if args.answer_cache else "0",
+        **state_env(state_dir),
+        "INGEST_SOURCES": docs_dir,
+        "FAKE_COGNEE_NODES": str(args.nodes),
+        "FAKE_COGNEE_EDGES_PER_NODE": str(args.edges_per_node),
+        "FAKE_COGNEE_SEARCH_MS": str(args.search_ms),
+        "FAKE_COGNEE_SEARCH_ERRORS": str(args.search_errors),
+        "FAKE_COGNEE_GRAPH_MS": str(args.graph_ms),
+        "FAKE_COGNEE_COGNIFY_MS": str(args.cognify_ms),
+    }, quiet=not args.verbose)
+    return llm, api
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backend load generator")
+    parser.add_argument("--scenarios", default="chat,graph,ingest", help="comma-separated: chat, graph, search, ingest")
+    parser.add_argument("--levels", default="1,10,50", help="comma-separated concurrency levels")
+    parser.add_argument("--ingest-levels", default="1,4",
+                        help="concurrency levels for ingest (runs are single-flight, so keep these low)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario and level")
+    parser.add_argument("--url", help="target a running backend instead of starting the fake stack")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="earlier --json file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed relative p99 growth / rps drop against the baseline")
+    fake = parser.add_argument_group("fake stack")
+    fake.add_argument("--nodes", type=int, default=2000, help="generated graph size (0: three-node sample)")
+    fake.add_argument("--edges-per-node", type=float, default=2.0)
+    fake.add_argument("--search-ms", type=float, default=50, help="cognee.search latency")
+    fake.add_argument("--search-errors", type=float, default=0.0, help="fraction of cognee.search calls that fail")
+    fake.add_argument("--graph-ms", type=float, default=20, help="get_graph_data latency")
+    fake.add_argument("--cognify-ms", type=float, default=500, help="cognee.cognify latency")
+    fake.add_argument("--llm-latency-ms", type=float, default=300)
+    fake.add_argument("--llm-jitter-ms", type=float, default=50)
+    fake.add_argument("--answer-cache", action="store_true", help="leave the answer cache on")
+    fake.add_argument("--docs", type=int, default=4, help="synthetic documents for ingest")
+    fake.add_argument("--doc-paragraphs", type=int, default=20)
+    fake.add_argument("--ingest-force", action="store_true", help="full rebuild on every ingest request")
+    fake.add_argument("--verbose", action="store_true", help="show the backend's log output")
+    args = parser.parse_args()
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - {"chat", "graph", "search", "ingest"}
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    procs = ()
+    with tempfile.TemporaryDirectory() as state_dir:
+        docs_dir = None
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            docs_dir = os.path.join(state_dir, "docs")
+            os.makedirs(docs_dir)
+            write_docs(docs_dir, args.docs, args.doc_paragraphs)
+            procs = start_stack(args, state_dir, docs_dir)
+            base_url = f"http://127.0.0.1:{API_PORT}"
+            wait_http(f"http://127.0.0.1:{LLM_PORT}/docs")
+        try:
+            wait_http(f"{base_url}/healthz", timeout=60)
+            fns = {"chat": chat, "graph": graph, "search": search, "ingest": Ingest(docs_dir, args.ingest_force)}
+            config = {k: v for k, v in vars(args).items() if k not in ("json", "baseline")}
+            print("target: " + (base_url if args.url else
+                                f"fake stack, {args.nodes} nodes, LLM {args.llm_latency_ms:.0f}ms, "
+                                f"search {args.search_ms:.0f}ms, cognify {args.cognify_ms:.0f}ms"))
+            print_header()
+            results = []
+            for name in scenarios:
+                levels = args.ingest_levels if name == "ingest" else args.levels
+                for level in [int(x) for x in levels.split(",") if x]:
+                    result = asyncio.run(run_level(base_url, name, fns[name], level, args.duration))
+                    results.append(result)
+                    print_row(result)
+        finally:
+            stop(*procs)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "config": config, "results": results}, f, indent=2)
+        print(f"wrote {args.json}")
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        if regressions:
+            print(f"REGRESSIONS (> {args.max_regression:.0%}) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"no regressions (> {args.max_regression:.0%}) against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Serve backend/main.py with the fake Cognee installed.
+
+Usage (from backend/):
+    OPENAI_BASE_URL=http://127.0.0.1:8399/v1 OPENAI_API_KEY=stub \
+        python bench/serve_fake.py --port 8400
+"""
+import argparse
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import fake_cognee  # noqa: E402
+
+fake_cognee.install()
+
+import uvicorn  # noqa: E402
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backend with fake Cognee")
+    parser.add_argument("--port", type=int, default=8400)
+    args = parser.parse_args()
+
+    import main  # noqa: E402
+
+    uvicorn.run(main.app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,107 @@
+"""
+Local OpenAI-compatible stub server for benchmarks.
+
+Serves POST /v1/chat/completions with a canned answer after a fixed latency
+(streamed word by word when `stream` is set), so the backend can be
+load-tested without spending tokens.
+
+Usage:
+    python bench/stub_llm.py --port 8399 --latency-ms 300
+    OPENAI_BASE_URL=http://127.0.0.1:8399/v1 OPENAI_API_KEY=stub uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "300"))
+JITTER_MS = float(os.getenv("STUB_LLM_JITTER_MS", "0"))
+TOKEN_MS = float(os.getenv("STUB_LLM_TOKEN_MS", "20"))
+ANSWER = os.getenv(
+    "STUB_LLM_ANSWER",
+    "Pedro is a software engineer who has worked with Python, React and knowledge graphs.",
+)
+
+app = FastAPI()
+
+
+async def _sleep():
+    delay = LATENCY_MS + (random.uniform(-JITTER_MS, JITTER_MS) if JITTER_MS else 0.0)
+    await asyncio.sleep(max(0.0, delay) / 1000.0)
+
+
+def _usage(body: dict) -> dict:
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+    prompt_tokens = max(1, prompt_chars // 4)
+    completion_tokens = max(1, len(ANSWER) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+async def _stream(body: dict, completion_id: str):
+    # First token after the configured latency, then one word every TOKEN_MS
+    await _sleep()
+    words = ANSWER.split(" ")
+    for i, word in enumerate(words):
+        delta = {"content": word if i == 0 else " " + word}
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(TOKEN_MS / 1000.0)
+    if (body.get("stream_options") or {}).get("include_usage"):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [],
+            "usage": _usage(body),
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    if body.get("stream"):
+        return StreamingResponse(_stream(body, completion_id), media_type="text/event-stream")
+    await _sleep()
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": ANSWER},
+            "finish_reason": "stop",
+        }],
+        "usage": _usage(body),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM")
+    parser.add_argument("--port", type=int, default=8399)
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=JITTER_MS)
+    args = parser.parse_args()
+    LATENCY_MS, JITTER_MS = args.latency_ms, args.jitter_ms
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
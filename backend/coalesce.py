@@ -0,0 +1,51 @@
+"""
+Single-flight request coalescing.
+
+When many identical requests arrive at once (a link to the portfolio gets
+shared), only the first one for a key runs the upstream work; the others
+wait on the same task and get its result or exception. The key is freed as
+soon as the task finishes, so this never serves stale results. Caching
+across time is the answer cache's job.
+
+The shared task is shielded: a client that disconnects cancels only its own
+wait, not the computation the other callers are waiting on.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() for key, or join the call already in flight for it."""
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "upstream": self.calls - self.coalesced,
+            "in_flight": len(self._inflight),
+        }
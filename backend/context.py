@@ -0,0 +1,260 @@
+"""
+Prompt assembly for /chat under a token budget.
+
+cognee.search can return any number of results, and joining all of them
+into the system prompt makes prompt size (and so latency and cost) grow
+with the graph. Instead, results are:
+
+1. ranked by lexical overlap with the question (retrieval order breaks ties),
+2. deduplicated (identical text, or text contained in an item already kept),
+3. packed into CONTEXT_TOKEN_BUDGET tokens, best first.
+
+The recent turns of ChatRequest.history are then added, newest first, up to
+HISTORY_TOKEN_BUDGET tokens. Token counts use tiktoken when it is installed
+(cognee depends on it) and a characters/words heuristic otherwise. The
+encoding is loaded on first use (load_encoding(), called by the warm-up),
+since it may have to be downloaded.
+
+Configuration (env):
+- CONTEXT_TOKEN_BUDGET    tokens of retrieved context per prompt (default: 1500)
+- HISTORY_TOKEN_BUDGET    tokens of chat history per prompt (default: 600)
+- CONTEXT_MAX_ITEM_TOKENS longer results are truncated to this (default: 400)
+"""
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from answer_cache import normalize_message
+
+_encoding = None
+_encoding_loaded = False
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "600"))
+MAX_ITEM_TOKENS = int(os.getenv("CONTEXT_MAX_ITEM_TOKENS", "400"))
+
+# Chat-format overhead per message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_WORDS = re.compile(r"\w+|[^\w\s]")
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have he his how i in is it "
+    "of on or she that the their this to was were what when where which who why "
+    "with you your about can tell me".split()
+)
+
+SYSTEM_PROMPT = """You are an AI assistant for Pedro Reichow.
+        Use the following context to answer the user's question about Pedro.
+        If the answer is not in the context, say you don't know.
+
+        Context:
+        {context}
+        """
+
+
+def load_encoding():
+    """The tiktoken encoding, or None to use the heuristic. Loaded once."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # not installed, or the encoding file can't be fetched
+            _encoding = None
+        _encoding_loaded = True
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if load_encoding() is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # ~4 characters per token for English prose; punctuation-heavy text skews higher
+    return max(len(text) // 4, int(len(_WORDS.findall(text)) * 0.75)) + 1
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    return _truncate_counted(text, max_tokens)[0]
+
+
+def _truncate_counted(text: str, max_tokens: int) -> Tuple[str, int, int]:
+    """(text cut to max_tokens, its tokens, the original's tokens), encoding the text once."""
+    if load_encoding() is not None:
+        ids = _encoding.encode(text, disallowed_special=())
+        full = len(ids)
+    else:
+        full = estimate_tokens(text)
+    if max_tokens <= 0:
+        return "", 0, full
+    if full <= max_tokens:
+        return text, full, full
+    if _encoding is not None:
+        return _encoding.decode(ids[:max_tokens]), max_tokens, full
+    cut = text[:max_tokens * 4].rsplit(" ", 1)[0]
+    return cut, estimate_tokens(cut), full
+
+
+def _terms(normalized: str) -> set:
+    return {w for w in normalized.split() if w not in _STOPWORDS}
+
+
+def rank_results(message: str, results: List[Any]) -> List[str]:
+    """Results as text, most relevant first, with duplicates removed."""
+    query = _terms(normalize_message(message))
+    scored = []
+    for position, result in enumerate(results):
+        text = str(result).strip()
+        if not text:
+            continue
+        normalized = normalize_message(text)
+        terms = _terms(normalized)
+        overlap = len(query & terms) / len(query) if query else 0.0
+        scored.append((-overlap, position, text, normalized))
+    scored.sort(key=lambda s: (s[0], s[1]))
+
+    kept: List[str] = []
+    kept_normalized: List[str] = []
+    for _, _, text, normalized in scored:
+        if any(normalized in other for other in kept_normalized):
+            continue
+        kept.append(text)
+        kept_normalized.append(normalized)
+    return kept
+
+
+def history_messages(history: Optional[List[Any]], message: str) -> List[Dict[str, str]]:
+    """
+    Normalize ChatRequest.history to chat messages. Accepts {role, content}
+    dicts (also {sender, message}) and plain strings, which alternate
+    user/assistant ending with the assistant's last reply.
+    """
+    turns: List[Dict[str, str]] = []
+    items = list(history or [])
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            role = str(item.get("role") or item.get("sender") or "user").lower()
+            content = item.get("content") or item.get("message") or item.get("text") or ""
+        else:
+            role = "assistant" if (len(items) - i) % 2 == 1 else "user"
+            content = item
+        content = str(content).strip()
+        if content:
+            turns.append({"role": "assistant" if role in ("assistant", "bot", "ai") else "user", "content": content})
+    # Clients often include the message being asked as the last turn
+    if turns and turns[-1]["role"] == "user" and turns[-1]["content"] == message.strip():
+        turns.pop()
+    return turns
+
+
+@dataclass
+class AssembledPrompt:
+    messages: List[Dict[str, str]]
+    context: List[str]
+    history: List[Dict[str, str]]
+    prompt_tokens: int
+    context_tokens: int
+    history_tokens: int
+    dropped_results: int
+    dropped_turns: int
+    unbudgeted_tokens: int = 0
+
+    def cache_context(self) -> List[str]:
+        """What the answer depends on besides the question, for the answer cache key."""
+        return self.context + [f"{t['role']}: {t['content']}" for t in self.history]
+
+
+def assemble(message: str, search_results: List[Any], history: Optional[List[Any]] = None,
+             context_budget: Optional[int] = None, history_budget: Optional[int] = None) -> AssembledPrompt:
+    context_budget = CONTEXT_TOKEN_BUDGET if context_budget is None else context_budget
+    history_budget = HISTORY_TOKEN_BUDGET if history_budget is None else history_budget
+
+    ranked = rank_results(message, search_results)
+    context: List[str] = []
+    context_tokens = 0
+    all_context_tokens = 0  # every ranked result, untruncated: what joining them all would cost
+    for text in ranked:
+        text, tokens, full = _truncate_counted(text, MAX_ITEM_TOKENS)
+        cost = tokens + 1  # newline separator
+        all_context_tokens += full + 1
+        if context_tokens + cost > context_budget:
+            continue  # a shorter, lower-ranked item may still fit
+        context.append(text)
+        context_tokens += cost
+
+    turns = history_messages(history, message)
+    kept_turns: List[Dict[str, str]] = []
+    history_tokens = 0
+    for turn in reversed(turns):
+        cost = estimate_tokens(turn["content"]) + MESSAGE_OVERHEAD_TOKENS
+        if history_tokens + cost > history_budget:
+            break  # keep history contiguous: stop at the first turn that doesn't fit
+        kept_turns.append(turn)
+        history_tokens += cost
+    kept_turns.reverse()
+
+    system = SYSTEM_PROMPT.format(context="\n".join(context))
+    messages = [{"role": "system", "content": system}] + kept_turns + [{"role": "user", "content": message}]
+    prompt_tokens = sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+    # The same prompt without history and with every result: per-item counts, no second tokenizer pass
+    unbudgeted = prompt_tokens - history_tokens - context_tokens + all_context_tokens
+    return AssembledPrompt(
+        messages=messages,
+        context=context,
+        history=kept_turns,
+        prompt_tokens=prompt_tokens,
+        context_tokens=context_tokens,
+        history_tokens=history_tokens,
+        dropped_results=len(search_results) - len(context),
+        dropped_turns=len(turns) - len(kept_turns),
+        unbudgeted_tokens=unbudgeted,
+    )
+
+
+@dataclass
+class PromptStats:
+    """Per-request prompt sizes, reported under /stats."""
+    window: int = 1000
+    requests: int = 0
+    prompt_tokens: int = 0
+    tokens_saved: int = 0
+    dropped_results: int = 0
+    dropped_turns: int = 0
+    _recent: deque = field(default_factory=deque, repr=False)
+
+    def record(self, prompt: AssembledPrompt) -> None:
+        self.requests += 1
+        self.prompt_tokens += prompt.prompt_tokens
+        # History wasn't sent at all before, so compare without it
+        self.tokens_saved += max(0, prompt.unbudgeted_tokens - (prompt.prompt_tokens - prompt.history_tokens))
+        self.dropped_results += prompt.dropped_results
+        self.dropped_turns += prompt.dropped_turns
+        self._recent.append(prompt.prompt_tokens)
+        while len(self._recent) > self.window:
+            self._recent.popleft()
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self._recent)
+
+        def pct(p: float) -> int:
+            return recent[min(len(recent) - 1, int(p * len(recent)))] if recent else 0
+
+        return {
+            "estimator": "tiktoken" if load_encoding() is not None else "heuristic",
+            "context_token_budget": CONTEXT_TOKEN_BUDGET,
+            "history_token_budget": HISTORY_TOKEN_BUDGET,
+            "requests": self.requests,
+            "prompt_tokens_total": self.prompt_tokens,
+            "prompt_tokens_avg": round(self.prompt_tokens / self.requests, 1) if self.requests else 0.0,
+            "prompt_tokens_p50": pct(0.5),
+            "prompt_tokens_p95": pct(0.95),
+            # Versus joining every search result into the prompt
+            "tokens_saved_total": self.tokens_saved,
+            "dropped_results": self.dropped_results,
+            "dropped_history_turns": self.dropped_turns,
+        }
+
+
+prompt_stats = PromptStats()
@@ -0,0 +1,138 @@
+"""
+Parsed-text cache for PDFs, shared by backend ingestion and the admin tools.
+
+Entries are keyed by the SHA-256 of the file bytes plus the parser name and
+version, and hold the text of every page. They are stored gzip-compressed on
+disk and kept in a small in-process LRU, so re-extracting the same resume
+(another ingest run, a Streamlit rerun) costs a hash and a dict lookup
+instead of a full parse.
+
+Only the standard library and a PDF parser (pypdf, else PyPDF2) are needed,
+so admin scripts can import this module by adding backend/ to sys.path.
+
+Configuration (env):
+- DOC_TEXT_CACHE_DIR      cache directory (default: backend/.cache/doc_text)
+- DOC_TEXT_CACHE_MEMORY   documents kept in memory (default: 32)
+- DOC_TEXT_CACHE_ENABLED  "0" disables the cache (default: 1)
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Union
+
+try:
+    import pypdf as _pdf_lib
+except ImportError:  # admin environments only install PyPDF2
+    try:
+        import PyPDF2 as _pdf_lib  # type: ignore
+    except ImportError:
+        _pdf_lib = None  # type: ignore
+
+CACHE_DIR = os.getenv(
+    "DOC_TEXT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "doc_text"),
+)
+MEMORY_ENTRIES = int(os.getenv("DOC_TEXT_CACHE_MEMORY", "32"))
+ENABLED = os.getenv("DOC_TEXT_CACHE_ENABLED", "1") != "0"
+
+PdfSource = Union[bytes, str]
+
+_memory: "OrderedDict[str, List[str]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def parser_version() -> str:
+    if _pdf_lib is None:
+        return "none"
+    return f"{_pdf_lib.__name__}-{getattr(_pdf_lib, '__version__', '0')}"
+
+
+def content_hash(source: PdfSource) -> str:
+    h = hashlib.sha256()
+    if isinstance(source, bytes):
+        h.update(source)
+    else:
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def cache_key(digest: str) -> str:
+    return f"{digest}-{parser_version()}"
+
+
+def _path_for(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], key + ".json.gz")
+
+
+def get_pages(key: str) -> Optional[List[str]]:
+    if not ENABLED:
+        return None
+    with _lock:
+        pages = _memory.get(key)
+        if pages is not None:
+            _memory.move_to_end(key)
+            return pages
+    try:
+        with gzip.open(_path_for(key), "rt", encoding="utf-8") as f:
+            pages = json.load(f)["pages"]
+    except (OSError, ValueError, KeyError):
+        return None
+    _remember(key, pages)
+    return pages
+
+
+def put_pages(key: str, pages: List[str]) -> None:
+    if not ENABLED:
+        return
+    _remember(key, pages)
+    path = _path_for(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump({"parser": parser_version(), "pages": pages}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Doc text cache: could not write {path}: {e}")
+
+
+def _remember(key: str, pages: List[str]) -> None:
+    with _lock:
+        _memory[key] = pages
+        _memory.move_to_end(key)
+        while len(_memory) > max(0, MEMORY_ENTRIES):
+            _memory.popitem(last=False)
+
+
+# --------- parsing ---------
+def _reader(source: PdfSource):
+    if _pdf_lib is None:
+        raise RuntimeError("No PDF parser installed. pip install pypdf (or PyPDF2)")
+    return _pdf_lib.PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def page_count(source: PdfSource) -> int:
+    return len(_reader(source).pages)
+
+
+def parse_pages(source: PdfSource, start: int = 0, end: Optional[int] = None) -> List[str]:
+    """Parse pages [start, end) without touching the cache."""
+    reader = _reader(source)
+    end = len(reader.pages) if end is None else min(end, len(reader.pages))
+    return [(reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def extract_pdf_pages(source: PdfSource) -> List[str]:
+    """Per-page text of a PDF given as bytes or a path, served from the cache when possible."""
+    key = cache_key(content_hash(source))
+    pages = get_pages(key)
+    if pages is None:
+        pages = parse_pages(source)
+        put_pages(key, pages)
+    return pages
@@ -0,0 +1,146 @@
+"""
+Document text extraction for ingestion.
+
+Parsing (pypdf, BeautifulSoup) is CPU-bound and blocking, so it runs in a
+process pool: PDFs are split into page ranges that parse in parallel, other
+formats parse as one task. Parsed PDF pages go through doc_text_cache, so
+an unchanged PDF is only parsed once. Documents are yielded as soon as each
+finishes, so the caller can hand them to cognee.add while the rest are
+still parsing.
+
+Each document has a deadline (INGEST_EXTRACT_TIMEOUT). A document that misses
+it is reported as failed; the worker process finishes its current task in
+the background, since pool tasks can't be interrupted.
+
+Configuration (env):
+- INGEST_EXTRACT_WORKERS     worker processes (default: CPU count, max 8)
+- INGEST_EXTRACT_TIMEOUT     per-document timeout in seconds (default: 120)
+- INGEST_PDF_PAGES_PER_TASK  PDF pages parsed per pool task (default: 4)
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable, List, Optional
+
+import doc_text_cache
+
+PDF_SUFFIXES = {".pdf"}
+HTML_SUFFIXES = {".html", ".htm"}
+TEXT_SUFFIXES = {".txt", ".md"}
+SUPPORTED_SUFFIXES = PDF_SUFFIXES | HTML_SUFFIXES | TEXT_SUFFIXES
+
+
+@dataclass
+class ExtractedDocument:
+    path: str
+    text: str = ""
+    pages: int = 0
+    elapsed_sec: float = 0.0
+    error: Optional[str] = None
+
+
+def discover_sources(paths: Iterable[str]) -> List[str]:
+    """Expand files and directories (recursively) into supported document paths."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in SUPPORTED_SUFFIXES:
+                        found.append(os.path.join(root, name))
+        elif os.path.isfile(path):
+            found.append(path)
+        else:
+            print(f"Warning: source not found at {path}")
+    # Keep order, drop duplicates from overlapping arguments
+    return list(dict.fromkeys(os.path.abspath(p) for p in found))
+
+
+# --------- worker-process functions (module level so they pickle) ---------
+def _pdf_page_count(path: str) -> int:
+    return doc_text_cache.page_count(path)
+
+
+def _pdf_pages(path: str, start: int, end: int) -> List[str]:
+    return doc_text_cache.parse_pages(path, start, end)
+
+
+def _html_text(path: str) -> str:
+    from bs4 import BeautifulSoup
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        soup = BeautifulSoup(f, "html.parser")
+    # Get text with separator to avoid merging words
+    return soup.get_text(separator="\n")
+
+
+def _plain_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+class DocumentExtractor:
+    def __init__(self, workers: Optional[int] = None, timeout: Optional[float] = None,
+                 pages_per_task: Optional[int] = None):
+        self.workers = workers or int(os.getenv("INGEST_EXTRACT_WORKERS", min(8, os.cpu_count() or 1)))
+        self.timeout = timeout or float(os.getenv("INGEST_EXTRACT_TIMEOUT", "120"))
+        self.pages_per_task = max(1, pages_per_task or int(os.getenv("INGEST_PDF_PAGES_PER_TASK", "4")))
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "DocumentExtractor":
+        # forkserver: don't fork a process that has a running event loop and threads
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+        self._pool = ProcessPoolExecutor(max_workers=max(1, self.workers), mp_context=ctx)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._pool is not None:
+            # Don't block on tasks abandoned after a timeout
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def _extract(self, path: str) -> ExtractedDocument:
+        suffix = os.path.splitext(path)[1].lower()
+        if suffix in PDF_SUFFIXES:
+            key = doc_text_cache.cache_key(await asyncio.to_thread(doc_text_cache.content_hash, path))
+            pages = await asyncio.to_thread(doc_text_cache.get_pages, key)
+            if pages is None:
+                count = await self._run(_pdf_page_count, path)
+                ranges = [(s, min(count, s + self.pages_per_task)) for s in range(0, count, self.pages_per_task)]
+                parts = await asyncio.gather(*(self._run(_pdf_pages, path, s, e) for s, e in ranges))
+                pages = [page for part in parts for page in part]
+                await asyncio.to_thread(doc_text_cache.put_pages, key, pages)
+            return ExtractedDocument(path, "\n".join(pages) + "\n" if pages else "", len(pages))
+        if suffix in HTML_SUFFIXES:
+            return ExtractedDocument(path, await self._run(_html_text, path), 1)
+        return ExtractedDocument(path, await self._run(_plain_text, path), 1)
+
+    async def _extract_with_deadline(self, path: str) -> ExtractedDocument:
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        try:
+            doc = await asyncio.wait_for(self._extract(path), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            doc = ExtractedDocument(path, error=f"timed out after {self.timeout:.0f}s")
+        except Exception as e:
+            doc = ExtractedDocument(path, error=str(e) or e.__class__.__name__)
+        doc.elapsed_sec = round(loop.time() - t0, 3)
+        return doc
+
+    async def extract(self, paths: Iterable[str]) -> AsyncIterator[ExtractedDocument]:
+        """Yield documents in completion order."""
+        if self._pool is None:
+            raise RuntimeError("DocumentExtractor must be used as a context manager")
+        tasks = [asyncio.ensure_future(self._extract_with_deadline(p)) for p in paths]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
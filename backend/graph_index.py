@@ -0,0 +1,81 @@
+"""
+Adjacency index over a graph snapshot, for GET /graph/neighborhood.
+
+Built once per graph generation alongside the serialized /graph body (see
+graph_snapshot.py), so a neighborhood query is a bounded breadth-first
+search: it touches at most `limit` nodes and their adjacency lists, never
+the whole graph.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from models import GraphEdge, GraphNode
+
+
+@dataclass
+class Neighborhood:
+    nodes: List[GraphNode]
+    edges: List[GraphEdge]
+    depth: int
+    truncated: bool
+
+
+class GraphIndex:
+    def __init__(self, nodes: List[GraphNode], edges: List[GraphEdge]):
+        self.nodes: Dict[str, GraphNode] = {n.id: n for n in nodes}
+        self.edges = edges
+        # node id -> [(neighbor id, edge position)], both directions
+        self.adjacency: Dict[str, List[Tuple[str, int]]] = {}
+        for i, e in enumerate(edges):
+            self.adjacency.setdefault(e.source, []).append((e.target, i))
+            if e.target != e.source:
+                self.adjacency.setdefault(e.target, []).append((e.source, i))
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.nodes
+
+    def degree(self, node_id: str) -> int:
+        return len(self.adjacency.get(node_id, ()))
+
+    def neighborhood(self, node_id: str, depth: int = 1, types: Optional[Iterable[str]] = None,
+                     limit: int = 200) -> Neighborhood:
+        """
+        Nodes within `depth` hops of node_id (edges followed in both directions),
+        nearest first, at most `limit` of them. With `types`, only nodes of
+        those types are included and expanded; the center is always included.
+        Edges are those traversed between included nodes.
+        """
+        wanted: Optional[Set[str]] = {t.lower() for t in types} if types else None
+        center = self.nodes[node_id]
+        seen = {node_id}
+        result_nodes = [center]
+        edge_ids: Set[int] = set()
+        truncated = False
+        reached = 0
+        frontier = deque([(node_id, 0)])
+
+        while frontier:
+            current, dist = frontier.popleft()
+            if dist >= depth:
+                continue
+            for neighbor, edge_id in self.adjacency.get(current, ()):
+                if neighbor in seen:
+                    edge_ids.add(edge_id)
+                    continue
+                node = self.nodes.get(neighbor)
+                if node is None or (wanted is not None and node.type.lower() not in wanted):
+                    continue
+                if len(result_nodes) >= limit:
+                    truncated = True
+                    break
+                seen.add(neighbor)
+                result_nodes.append(node)
+                edge_ids.add(edge_id)
+                reached = max(reached, dist + 1)
+                frontier.append((neighbor, dist + 1))
+            if truncated:
+                break
+
+        edges = [self.edges[i] for i in sorted(edge_ids)]
+        return Neighborhood(nodes=result_nodes, edges=edges, depth=reached, truncated=truncated)
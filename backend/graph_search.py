@@ -0,0 +1,279 @@
+"""
+Full-text search over graph nodes.
+
+An inverted index over each node's label/id, title, description and
+list-of-string attributes (technologies, responsibilities, ...), scored
+with BM25 using per-field weights, with prefix matching so "kube" finds
+"kubernetes". Works on node dicts in either shape used in this repo:
+public/knowledge-graph.json nodes and GET /graph nodes (with a `data` dict).
+
+Layout, tuned for large graphs:
+- the main segment is built in bulk: per term, compact arrays of node
+  numbers and precomputed BM25 impacts, sorted by impact. A query reads
+  at most POSTINGS_DEPTH entries per term, so common terms cost the same
+  as rare ones;
+- the vocabulary is a sorted list, so prefix expansion is a bisect;
+- sync() diffs the nodes against what is indexed (by a per-node
+  fingerprint). Small changes go to a delta segment scored live, and
+  replaced or removed nodes are tombstoned. When the delta grows past
+  REBUILD_RATIO of the index, everything is rebuilt.
+
+Standard library only, so admin scripts can import it by adding backend/
+to sys.path. Methods are thread-safe: a full rebuild is prepared outside
+the lock and swapped in.
+"""
+import heapq
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from math import log
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+FIELD_WEIGHTS = {"label": 3.0, "id": 3.0, "title": 2.0, "list": 1.5, "description": 1.0, "type": 1.0}
+K1 = 1.2
+B = 0.75
+POSTINGS_DEPTH = 2000
+PREFIX_EXPANSIONS = 32
+PREFIX_WEIGHT = 0.6
+MIN_PREFIX = 2
+REBUILD_RATIO = 0.1
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    if text.isascii():
+        return _TOKEN.findall(text.lower())
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return _TOKEN.findall(text)
+
+
+def _strings(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [v for v in value if isinstance(v, str)]
+    return []
+
+
+def node_fields(node: Dict[str, Any]) -> Dict[str, str]:
+    """Searchable text of a node, per field."""
+    data = node.get("data") if isinstance(node.get("data"), dict) else {}
+    props = {**data, **node}
+    node_id = str(props.get("id", ""))
+    label = props.get("label") or props.get("name") or ""
+    description = " ".join(
+        s for key in ("description", "summary", "text") for s in _strings(props.get(key))
+    )
+    lists = " ".join(
+        s for key, value in props.items() if isinstance(value, list) for s in _strings(value)
+    )
+    return {
+        "label": str(label or node_id),
+        "id": node_id if node_id != label else "",
+        "title": props.get("title") if isinstance(props.get("title"), str) else "",
+        "description": description,
+        "list": lists,
+        "type": str(props.get("type") or ""),
+    }
+
+
+def _weighted_terms(fields: Dict[str, str]) -> Tuple[Dict[str, float], float]:
+    tf: Dict[str, float] = {}
+    length = 0.0
+    for name, text in fields.items():
+        weight = FIELD_WEIGHTS[name]
+        for token in tokenize(text):
+            tf[token] = tf.get(token, 0.0) + weight
+            length += weight
+    return tf, length
+
+
+class SearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        # Per node number: id, display label, type, weighted length
+        self._ids: List[str] = []
+        self._labels: List[str] = []
+        self._types: List[str] = []
+        self._lengths = array("f")
+        self._docno: Dict[str, int] = {}
+        self._fingerprints: Dict[str, int] = {}
+        self._dead: Set[int] = set()
+        self._total_length = 0.0
+        # Main segment: term -> (docnos, impacts) sorted by impact, plus document frequency
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._df: Dict[str, int] = {}
+        self._vocab: List[str] = []
+        # Delta segment: term -> {docno: weighted tf}
+        self._delta: Dict[str, Dict[int, float]] = {}
+        self._delta_vocab: List[str] = []
+        self._delta_docs = 0
+
+    def __len__(self) -> int:
+        return len(self._docno)
+
+    # --------- building ---------
+    def build(self, nodes: Iterable[Dict[str, Any]]) -> None:
+        """Index `nodes` from scratch."""
+        fresh = SearchIndex()
+        raw: Dict[str, Tuple[array, array]] = {}
+        for node in nodes:
+            node_id = str(node.get("id", ""))
+            if not node_id or node_id in fresh._docno:
+                continue
+            fields = node_fields(node)
+            tf, length = _weighted_terms(fields)
+            docno = fresh._add_doc(node_id, fields, length, hash(tuple(fields.values())))
+            for term, weight in tf.items():
+                entry = raw.get(term)
+                if entry is None:
+                    entry = raw[term] = (array("I"), array("f"))
+                entry[0].append(docno)
+                entry[1].append(weight)
+
+        n = max(1, len(fresh._ids))
+        avgdl = fresh._total_length / n or 1.0
+        lengths = fresh._lengths
+        for term, (docnos, tfs) in raw.items():
+            idf = log(1 + (n - len(docnos) + 0.5) / (len(docnos) + 0.5))
+            impacts = [
+                idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths[d] / avgdl))
+                for d, tf in zip(docnos, tfs)
+            ]
+            if len(docnos) > 1:
+                order = sorted(range(len(docnos)), key=impacts.__getitem__, reverse=True)
+                docnos = array("I", [docnos[i] for i in order])
+                impacts = [impacts[i] for i in order]
+            fresh._postings[term] = (docnos, array("f", impacts))
+            fresh._df[term] = len(docnos)
+        fresh._vocab = sorted(raw)
+        with self._lock:
+            self.__dict__.update({k: v for k, v in fresh.__dict__.items() if k != "_lock"})
+
+    def _add_doc(self, node_id: str, fields: Dict[str, str], length: float, fingerprint: int) -> int:
+        docno = len(self._ids)
+        self._ids.append(node_id)
+        self._labels.append(fields["label"])
+        self._types.append(fields["type"])
+        self._lengths.append(length)
+        self._docno[node_id] = docno
+        self._fingerprints[node_id] = fingerprint
+        self._total_length += length
+        return docno
+
+    def sync(self, nodes: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Bring the index in line with `nodes`, touching only nodes whose
+        searchable text changed. Returns counts of added/updated/removed.
+        """
+        nodes = list(nodes)
+        incoming: Dict[str, Tuple[Dict[str, str], int]] = {}
+        for node in nodes:
+            node_id = str(node.get("id", ""))
+            if node_id and node_id not in incoming:
+                fields = node_fields(node)
+                incoming[node_id] = (fields, hash(tuple(fields.values())))
+
+        with self._lock:
+            removed = [i for i in self._docno if i not in incoming]
+            added = [i for i in incoming if i not in self._docno]
+            updated = [i for i, (_, fp) in incoming.items()
+                       if i in self._fingerprints and self._fingerprints[i] != fp]
+            changes = {"added": len(added), "updated": len(updated), "removed": len(removed)}
+            pending = self._delta_docs + len(added) + len(updated)
+            if not self._ids or pending > REBUILD_RATIO * max(len(self._docno), len(incoming)) + 64:
+                rebuild = True
+            else:
+                rebuild = False
+                for node_id in removed + updated:
+                    self._remove(node_id)
+                for node_id in added + updated:
+                    fields, fp = incoming[node_id]
+                    self._add_delta(node_id, fields, fp)
+        if rebuild and (added or updated or removed or not self._ids):
+            self.build(nodes)
+        return changes
+
+    def _remove(self, node_id: str) -> None:
+        docno = self._docno.pop(node_id)
+        self._fingerprints.pop(node_id, None)
+        self._dead.add(docno)
+        self._total_length -= self._lengths[docno]
+
+    def _add_delta(self, node_id: str, fields: Dict[str, str], fingerprint: int) -> None:
+        tf, length = _weighted_terms(fields)
+        docno = self._add_doc(node_id, fields, length, fingerprint)
+        self._delta_docs += 1
+        for term, weight in tf.items():
+            postings = self._delta.get(term)
+            if postings is None:
+                postings = self._delta[term] = {}
+                if term not in self._df:
+                    insort(self._delta_vocab, term)
+            postings[docno] = weight
+
+    # --------- querying ---------
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        terms = []
+        if token in self._df or token in self._delta:
+            terms.append((token, 1.0))
+        if len(token) >= MIN_PREFIX:
+            for vocab in (self._vocab, self._delta_vocab):
+                i = bisect_left(vocab, token)
+                while i < len(vocab) and len(terms) < PREFIX_EXPANSIONS and vocab[i].startswith(token):
+                    if vocab[i] != token:
+                        terms.append((vocab[i], PREFIX_WEIGHT))
+                    i += 1
+        return terms
+
+    def search(self, query: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        wanted = {t.lower() for t in types} if types else None
+        with self._lock:
+            n = max(1, len(self._docno))
+            avgdl = self._total_length / n or 1.0
+            scores: Dict[int, float] = {}
+            dead = self._dead
+            for token in tokens:
+                for term, weight in self._expand(token):
+                    main = self._postings.get(term)
+                    if main is not None:
+                        docnos, impacts = main
+                        for j in range(min(len(docnos), POSTINGS_DEPTH)):
+                            d = docnos[j]
+                            if d not in dead:
+                                scores[d] = scores.get(d, 0.0) + weight * impacts[j]
+                    delta = self._delta.get(term)
+                    if delta:
+                        df = self._df.get(term, 0) + len(delta)
+                        idf = log(1 + (n - df + 0.5) / (df + 0.5))
+                        for d, tf in delta.items():
+                            if d in dead:
+                                continue
+                            norm = K1 * (1 - B + B * self._lengths[d] / avgdl)
+                            scores[d] = scores.get(d, 0.0) + weight * idf * tf * (K1 + 1) / (tf + norm)
+            if wanted is not None:
+                scores = {d: s for d, s in scores.items() if self._types[d].lower() in wanted}
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [
+                {"id": self._ids[d], "label": self._labels[d], "type": self._types[d], "score": round(s, 4)}
+                for d, s in top
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "nodes": len(self._docno),
+                "terms": len(self._df) + len(self._delta_vocab),
+                "delta_nodes": self._delta_docs,
+                "tombstones": len(self._dead),
+            }
@@ -0,0 +1,301 @@
+"""
+Versioned snapshot of the Cognee graph served by GET /graph.
+
+The graph only changes when ingestion runs, so the mapped response is built
+once per graph generation and kept as pre-serialized JSON plus a gzipped
+copy. /ingest bumps the generation; the next /graph request rebuilds.
+The mapped nodes and edges are also indexed for neighborhood queries
+(graph_index.py).
+
+GET /graph/search uses a full-text index (graph_search.py) kept in sync
+with the snapshot: each new generation is diffed into it, so only changed
+nodes are re-indexed. With no Cognee graph it indexes
+public/knowledge-graph.json instead, re-syncing when the file changes.
+
+The generation counter and its timestamp are persisted next to the answer
+cache (written on first start if there is no state file yet) so
+Last-Modified stays stable across restarts. ETags are derived from the
+serialized body, which includes that timestamp, so they stay valid across
+restarts too. The state file is also how an out-of-band `python ingest.py`
+reaches a running server: the CLI bumps the generation in the file, and
+the server picks the change up (one stat per /graph request) and rebuilds.
+
+Configuration (env):
+- GRAPH_STATE_PATH    JSON state file (default: backend/.cache/graph_state.json)
+- GRAPH_SEARCH_SOURCE "auto" (Cognee, else the JSON file), "cognee" or "file" (default: auto)
+- GRAPH_SEARCH_FILE   graph JSON for search (default: public/knowledge-graph.json)
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
+
+import metrics
+from graph_index import GraphIndex
+from graph_search import SearchIndex
+from models import GraphEdge, GraphNode, GraphResponse
+
+STATE_PATH = os.getenv(
+    "GRAPH_STATE_PATH",
+    os.path.join(os.path.dirname(__file__), ".cache", "graph_state.json"),
+)
+
+SEARCH_SOURCE = os.getenv("GRAPH_SEARCH_SOURCE", "auto")
+SEARCH_FILE = os.getenv("GRAPH_SEARCH_FILE")
+
+
+@dataclass
+class GraphSnapshot:
+    generation: int
+    updated_at: float
+    body: bytes
+    gzipped: bytes
+    etag: str
+    node_count: int
+    edge_count: int
+    index: GraphIndex
+
+
+_generation = 0
+_updated_at = time.time()
+_state_mtime: Optional[int] = None  # of the state file as last read or written here
+_snapshot: Optional[GraphSnapshot] = None
+_lock = asyncio.Lock()
+_search_index = SearchIndex()
+_search_key: Optional[tuple] = None
+_search_lock = asyncio.Lock()
+
+
+def load_state() -> None:
+    global _generation, _updated_at, _state_mtime
+    try:
+        _state_mtime = os.stat(STATE_PATH).st_mtime_ns
+        with open(STATE_PATH, "r") as f:
+            state = json.load(f)
+        _generation = int(state.get("generation", 0))
+        _updated_at = float(state.get("updated_at", _updated_at))
+    except FileNotFoundError:
+        # First start: keep this timestamp, or lastUpdated (and the ETag) would change on every restart
+        _save_state()
+    except (ValueError, OSError) as e:
+        print(f"Graph snapshot: ignoring unreadable state file: {e}")
+
+
+def _save_state() -> None:
+    global _state_mtime
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(STATE_PATH)), exist_ok=True)
+        with open(STATE_PATH, "w") as f:
+            json.dump({"generation": _generation, "updated_at": _updated_at}, f)
+        _state_mtime = os.stat(STATE_PATH).st_mtime_ns
+    except OSError as e:
+        print(f"Graph snapshot: could not persist state: {e}")
+
+
+def _reload_if_changed() -> None:
+    """Pick up a generation bumped by another process (the ingest.py CLI)."""
+    global _snapshot
+    try:
+        mtime = os.stat(STATE_PATH).st_mtime_ns
+    except OSError:
+        return
+    if mtime == _state_mtime:
+        return
+    before = (_generation, _updated_at)
+    load_state()
+    if (_generation, _updated_at) != before:
+        print(f"Graph snapshot: state file changed, now at generation {_generation}")
+        _snapshot = None
+
+
+def current_generation() -> int:
+    _reload_if_changed()
+    return _generation
+
+
+def bump_generation() -> int:
+    """Mark the graph as changed. Called after every successful ingestion."""
+    global _generation, _updated_at, _snapshot
+    _generation += 1
+    _updated_at = time.time()
+    _snapshot = None
+    _save_state()
+    return _generation
+
+
+def iso_timestamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def map_graph(graph_data: Any) -> Tuple[List[GraphNode], List[GraphEdge]]:
+    """Map Cognee's get_graph_data() output to response models."""
+    if isinstance(graph_data, tuple) and len(graph_data) == 2:
+        nodes_raw, edges_raw = graph_data
+    else:
+        nodes_raw = []
+        edges_raw = []
+
+    mapped_nodes = []
+    for n in nodes_raw:
+        # n is likely (id, properties_dict)
+        if isinstance(n, tuple) and len(n) >= 2:
+            node_id = n[0]
+            props = n[1] if isinstance(n[1], dict) else {}
+        else:
+            node_id = str(n.get("id", "unknown")) if isinstance(n, dict) else str(n)
+            props = n if isinstance(n, dict) else {}
+
+        mapped_nodes.append(GraphNode(
+            id=str(node_id),
+            label=props.get("name", props.get("title", str(node_id))),
+            type=props.get("type", "node"),
+            category=props.get("type", "node"),
+            title=props.get("name", props.get("title", str(node_id))),
+            description=props.get("description", props.get("text", "")),
+            data=props
+        ))
+
+    mapped_edges = []
+    for e in edges_raw:
+        # e is likely (source, target, properties_dict)
+        if isinstance(e, tuple) and len(e) >= 3:
+            source = e[0]
+            target = e[1]
+            props = e[2] if isinstance(e[2], dict) else {}
+        elif isinstance(e, tuple) and len(e) == 2:
+            # Maybe (source, target) without props?
+            source = e[0]
+            target = e[1]
+            props = {}
+        else:
+            source = str(e.get("source", "unknown")) if isinstance(e, dict) else "unknown"
+            target = str(e.get("target", "unknown")) if isinstance(e, dict) else "unknown"
+            props = e if isinstance(e, dict) else {}
+
+        mapped_edges.append(GraphEdge(
+            id=f"{source}_{target}",
+            source=str(source),
+            target=str(target),
+            relation=props.get("relationship", "related"),
+            type=props.get("relationship", "related"),
+            weight=props.get("weight", 1),
+            data=props
+        ))
+
+    return mapped_nodes, mapped_edges
+
+
+async def _build(generation: int) -> GraphSnapshot:
+    from cognee.infrastructure.databases.graph.get_graph_engine import get_graph_engine
+    with metrics.stage("graph", "get_graph_data"):
+        engine = await get_graph_engine()
+        # get_graph_data() returns a tuple (nodes, edges)
+        graph_data = await engine.get_graph_data()
+
+    with metrics.stage("graph", "map"):
+        nodes, edges = map_graph(graph_data)
+    with metrics.stage("graph", "serialize"):
+        response = GraphResponse(nodes=nodes, edges=edges, lastUpdated=iso_timestamp(_updated_at))
+        body = response.model_dump_json().encode("utf-8")
+        gzipped = gzip.compress(body, compresslevel=6)
+    with metrics.stage("graph", "index"):
+        index = GraphIndex(nodes, edges)
+    return GraphSnapshot(
+        generation=generation,
+        updated_at=_updated_at,
+        body=body,
+        gzipped=gzipped,
+        etag='"%s"' % hashlib.sha256(body).hexdigest()[:32],
+        node_count=len(nodes),
+        edge_count=len(edges),
+        index=index,
+    )
+
+
+def peek_snapshot() -> Optional[GraphSnapshot]:
+    """The last built snapshot, if any, without building one."""
+    return _snapshot
+
+
+async def get_snapshot() -> GraphSnapshot:
+    """Return the snapshot for the current generation, building it at most once."""
+    global _snapshot
+    _reload_if_changed()
+    snap = _snapshot
+    if snap is not None and snap.generation == _generation:
+        return snap
+    async with _lock:
+        # Another request may have built it while we waited
+        if _snapshot is None or _snapshot.generation != _generation:
+            generation = _generation
+            t0 = time.perf_counter()
+            built = await _build(generation)
+            print(f"Graph snapshot: built generation {generation} "
+                  f"({built.node_count} nodes, {built.edge_count} edges, "
+                  f"{len(built.body)} bytes) in {time.perf_counter() - t0:.2f}s")
+            # Only publish if no ingestion finished while we were building
+            if generation == _generation:
+                _snapshot = built
+            return built
+        return _snapshot
+
+
+def _search_file() -> str:
+    if SEARCH_FILE:
+        return SEARCH_FILE
+    here = os.path.dirname(os.path.abspath(__file__))
+    # public/ is mounted inside backend/ in the container, next to it in a checkout
+    for path in (os.path.join(here, "public", "knowledge-graph.json"),
+                 os.path.join(here, "..", "public", "knowledge-graph.json")):
+        if os.path.exists(path):
+            return path
+    return os.path.join(here, "..", "public", "knowledge-graph.json")
+
+
+def _load_file_nodes(path: str) -> List[dict]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("nodes", [])
+    except FileNotFoundError:
+        return []
+
+
+async def get_search_index() -> Tuple[SearchIndex, str]:
+    """The node search index, synced with the current graph. Returns (index, source)."""
+    global _search_key
+    snap = None
+    if SEARCH_SOURCE != "file":
+        try:
+            snap = await get_snapshot()
+        except Exception as e:
+            if SEARCH_SOURCE == "cognee":
+                raise
+            print(f"Graph search: Cognee graph unavailable, using the JSON file: {e}")
+
+    if snap is not None and (snap.node_count or SEARCH_SOURCE == "cognee"):
+        key = ("cognee", snap.generation)
+        load = lambda: [n.model_dump() for n in snap.index.nodes.values()]  # noqa: E731
+    else:
+        path = _search_file()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        key = ("file", path, mtime)
+        load = lambda: _load_file_nodes(path)  # noqa: E731
+
+    if key != _search_key:
+        async with _search_lock:
+            if key != _search_key:
+                t0 = time.perf_counter()
+                changes = await asyncio.to_thread(lambda: _search_index.sync(load()))
+                elapsed = time.perf_counter() - t0
+                metrics.STAGE_DURATION.labels("graph", "search_index_sync").observe(elapsed)
+                print(f"Graph search: synced from {key[0]} {changes} in {elapsed:.2f}s")
+                _search_key = key
+    return _search_index, key[0]
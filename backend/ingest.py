@@ -1,72 +1,307 @@
 import os
+import re
+import json
+import time
 import asyncio
-import asyncio
-from pypdf import PdfReader
-from bs4 import BeautifulSoup
+import hashlib
+import argparse
 from dotenv import load_dotenv
 
+from extraction import DocumentExtractor, discover_sources
+
 # Load env from root
 load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
 
 RESUME_PDF_PATH = os.path.join(os.path.dirname(__file__), 'assets/REICHOW, Pedro 2026.pdf')
 RESUME_HTML_PATH = os.path.join(os.path.dirname(__file__), 'assets/resume_v2.html')
 
-async def extract_text_from_pdf(pdf_path):
-    reader = PdfReader(pdf_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
-
-async def extract_text_from_html(html_path):
-    with open(html_path, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f, 'html.parser')
-        # Get text with separator to avoid merging words
-        text = soup.get_text(separator='\n')
-        return text
-
-async def main():
+# Content hashes of everything already in Cognee; lets a run skip unchanged
+# sources and only add/cognify new chunks. Delete it (or use --force) to rebuild.
+MANIFEST_PATH = os.getenv(
+    "INGEST_MANIFEST_PATH",
+    os.path.join(os.path.dirname(__file__), '.cache', 'ingest_manifest.json'),
+)
+MANIFEST_VERSION = 2
+CHUNK_MAX_CHARS = 1200
+# cognify sends every chunk through several LLM prompts; tokens charged per chunk token
+COGNIFY_TOKEN_FACTOR = float(os.getenv("INGEST_COGNIFY_TOKEN_FACTOR", "3"))
+
+# Sources ingested when no paths are given; INGEST_SOURCES (os.pathsep-separated
+# files or directories) or CLI arguments override this.
+DEFAULT_SOURCES = [RESUME_PDF_PATH, RESUME_HTML_PATH]
+# Dataset names for the original resume files; other documents get one from their filename
+DATASETS = {
+    os.path.abspath(RESUME_PDF_PATH): "resume_pdf",
+    os.path.abspath(RESUME_HTML_PATH): "resume_html",
+}
+
+def configured_sources():
+    env = os.getenv("INGEST_SOURCES")
+    return [p for p in env.split(os.pathsep) if p] if env else DEFAULT_SOURCES
+
+def dataset_for(path):
+    if path in DATASETS:
+        return DATASETS[path]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r'[^a-z0-9]+', '_', stem.lower()).strip('_') or "document"
+
+def source_key(path):
+    return os.path.relpath(path, os.path.dirname(os.path.abspath(__file__)))
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def chunk_text(text, max_chars=CHUNK_MAX_CHARS):
+    """
+    Split text into paragraph chunks (blank-line separated, long paragraphs
+    packed line by line up to max_chars). Boundaries only depend on the
+    paragraph itself, so an edit changes the hashes of the chunks it touches.
+    """
+    chunks = []
+    for para in re.split(r'\n\s*\n', text):
+        lines = [l.strip() for l in para.splitlines() if l.strip()]
+        current = []
+        size = 0
+        for line in lines:
+            if current and size + len(line) > max_chars:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(line)
+            size += len(line) + 1
+        if current:
+            chunks.append("\n".join(current))
+    return chunks
+
+def pack_new_chunks(chunks, is_new, max_chars=CHUNK_MAX_CHARS):
+    """
+    The new chunks as Cognee data items: runs of adjacent new paragraphs are
+    joined up to max_chars, so cognify extracts from a few document-sized
+    items with their neighbouring context instead of one item per paragraph.
+    """
+    items = []
+    current = []
+    size = 0
+    for chunk, new in zip(chunks, is_new):
+        if current and (not new or size + len(chunk) > max_chars):
+            items.append("\n\n".join(current))
+            current, size = [], 0
+        if new:
+            current.append(chunk)
+            size += len(chunk) + 2
+    if current:
+        items.append("\n\n".join(current))
+    return items
+
+def chunk_sha256(chunk):
+    return hashlib.sha256(" ".join(chunk.split()).encode('utf-8')).hexdigest()
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+        print("Ingest manifest has an old version, ignoring it.")
+    except FileNotFoundError:
+        pass
+    except (ValueError, OSError) as e:
+        print(f"Warning: could not read ingest manifest ({e}), doing a full rebuild.")
+    return None
+
+def save_manifest(manifest):
+    os.makedirs(os.path.dirname(os.path.abspath(MANIFEST_PATH)), exist_ok=True)
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, MANIFEST_PATH)
+
+def discard_manifest():
+    try:
+        os.remove(MANIFEST_PATH)
+    except FileNotFoundError:
+        pass
+
+def _no_progress(stage, progress):
+    pass
+
+async def reserve_cognify_budget(characters):
+    """
+    Account for cognify's LLM usage with the shared admission controller, as
+    batch work. Cognee makes its own LLM calls, so the estimated budget is
+    reserved up front, in slices, letting interactive chats go in between.
+    """
+    from admission import BATCH
+    from llm import admission
+    remaining = int(characters / 4 * COGNIFY_TOKEN_FACTOR)
+    slice_tokens = max(1, int(admission.tokens.capacity * 0.1))
+    while remaining > 0:
+        take = min(remaining, slice_tokens)
+        await admission.acquire(take, BATCH)
+        remaining -= take
+
+async def main(force=False, progress=None, paths=None):
+    """
+    Bring the Cognee graph up to date with the source documents.
+
+    With a manifest from a previous run, unchanged sources are skipped and
+    only new paragraph chunks are added and cognified. Without one, or with
+    force=True, Cognee is pruned and everything is rebuilt; the manifest is
+    removed before the prune and written again only once cognify succeeds.
+
+    Documents are parsed in a process pool (see extraction.py). Nothing in
+    Cognee changes until the cognify budget has been reserved: a rejection
+    leaves the graph as it was instead of half-added or pruned.
+
+    `progress(stage, fraction)` is called as the run moves through its stages
+    (extract, admission, prune, add, cognify); the background job API uses it
+    for polling.
+    """
+    report = progress or _no_progress
     print("Starting ingestion process...")
-    
+
     # Ensure API key is present
     openai_key = os.getenv("OPENAI_API_KEY").strip() if os.getenv("OPENAI_API_KEY") else None
     if not openai_key:
         print("Error: OPENAI_API_KEY not found in environment variables.")
-        return
-    
+        raise RuntimeError("OPENAI_API_KEY not found in environment variables")
+
     # Set LLM_API_KEY for Cognee if it expects that
     os.environ["LLM_API_KEY"] = openai_key
-    
+
     import cognee
 
-    print("Resetting Cognee state...")
-    await cognee.prune.prune_data()
-    # await cognee.prune.prune_system(metadata=True) # Cannot prune system when using volumes
-
-    # Ingest PDF
-    if os.path.exists(RESUME_PDF_PATH):
-        print(f"Extracting text from PDF resume at {RESUME_PDF_PATH}...")
-        pdf_text = await extract_text_from_pdf(RESUME_PDF_PATH)
-        print(f"Extracted {len(pdf_text)} characters from PDF.")
-        print("Adding PDF content to Cognee...")
-        await cognee.add(pdf_text, dataset_name="resume_pdf")
-    else:
-        print(f"Warning: PDF Resume not found at {RESUME_PDF_PATH}")
-
-    # Ingest HTML
-    if os.path.exists(RESUME_HTML_PATH):
-        print(f"Extracting text from HTML resume at {RESUME_HTML_PATH}...")
-        html_text = await extract_text_from_html(RESUME_HTML_PATH)
-        print(f"Extracted {len(html_text)} characters from HTML.")
-        print("Adding HTML content to Cognee...")
-        await cognee.add(html_text, dataset_name="resume_html")
-    else:
-        print(f"Warning: HTML Resume not found at {RESUME_HTML_PATH}")
+    paths = discover_sources(paths or configured_sources())
+    previous = None if force else load_manifest()
+    full_rebuild = previous is None
+    prev_sources = (previous or {}).get("sources", {})
+    # Sources outside this run's paths keep their entries
+    manifest = {"version": MANIFEST_VERSION, "sources": dict(prev_sources)}
+
+    report("extract", 0.0)
+    digests = await asyncio.to_thread(lambda: {p: file_sha256(p) for p in paths})
+
+    sources = []
+    to_extract = []
+    for path in paths:
+        prev = prev_sources.get(source_key(path))
+        if not full_rebuild and prev and prev.get("sha256") == digests[path]:
+            print(f"Unchanged, skipping: {source_key(path)}")
+            manifest["sources"][source_key(path)] = prev
+            sources.append({"path": path, "status": "unchanged"})
+        else:
+            to_extract.append(path)
+
+    changed_datasets = []
+    additions = []  # (key, dataset, data for cognee.add, new chunk count), added after admission
+    added_chars = 0
+    done = 0
+    with DocumentExtractor() as extractor:
+        if to_extract:
+            print(f"Extracting {len(to_extract)} document(s) with {extractor.workers} worker(s)...")
+        async for doc in extractor.extract(to_extract):
+            done += 1
+            path, key = doc.path, source_key(doc.path)
+            dataset = dataset_for(path)
+            prev = prev_sources.get(key)
+            if doc.error:
+                print(f"Warning: extraction failed for {key}: {doc.error}")
+                if prev:
+                    # Keep the old entry so the next run retries this file
+                    manifest["sources"][key] = prev
+                sources.append({"path": path, "status": "failed", "error": doc.error})
+                continue
 
-    print("Cognifying (building graph)...")
-    await cognee.cognify()
+            text = doc.text
+            chunks = chunk_text(text)
+            hashes = [chunk_sha256(c) for c in chunks]
+            print(f"Extracted {len(text)} characters ({len(chunks)} chunks) from {key} in {doc.elapsed_sec}s.")
+
+            if full_rebuild:
+                new_chunks = chunks
+            else:
+                known = set(prev.get("chunks", [])) if prev else set()
+                new_chunks = [c for c, h in zip(chunks, hashes) if h not in known]
+                items = pack_new_chunks(chunks, [h not in known for h in hashes])
+                removed = len(known - set(hashes))
+                if removed:
+                    # Cognee has no reliable per-chunk delete; stale facts stay until a --force rebuild
+                    print(f"Warning: {removed} chunk(s) removed from {key}; run with --force to drop them from the graph.")
+
+            report("extract", 0.2 * done / len(to_extract))
+            if new_chunks:
+                # A full rebuild adds the document whole, as before; increments add the new
+                # chunks, packed into as few items as keep adjacent paragraphs together
+                additions.append((key, dataset, text if full_rebuild else items, len(new_chunks)))
+                added_chars += len(text) if full_rebuild else sum(len(c) for c in new_chunks)
+                if dataset not in changed_datasets:
+                    changed_datasets.append(dataset)
+
+            manifest["sources"][key] = {
+                "dataset": dataset,
+                "sha256": digests[path],
+                "chunks": hashes,
+                "ingested_at": time.time(),
+            }
+            sources.append({
+                "path": path,
+                "status": "rebuilt" if full_rebuild else "updated",
+                "characters": len(text),
+                "pages": doc.pages,
+                "chunks": len(chunks),
+                "new_chunks": len(new_chunks),
+                "extract_sec": doc.elapsed_sec,
+            })
+
+    if changed_datasets:
+        report("admission", 0.2)
+        await reserve_cognify_budget(added_chars)
+
+    if full_rebuild:
+        report("prune", 0.22)
+        # The graph is about to be emptied: a manifest left behind by a failure below
+        # would make later runs skip every source as unchanged
+        discard_manifest()
+        print("Full rebuild: resetting Cognee state...")
+        await cognee.prune.prune_data()
+        # await cognee.prune.prune_system(metadata=True) # Cannot prune system when using volumes
+
+    for i, (key, dataset, data, count) in enumerate(additions):
+        report("add", 0.22 + 0.03 * i / len(additions))
+        print(f"Adding {count} chunk(s) from {key} to Cognee dataset '{dataset}'...")
+        await cognee.add(data, dataset_name=dataset)
+
+    if not changed_datasets:
+        save_manifest(manifest)
+        if full_rebuild:
+            print("No sources found; the graph is now empty.")
+        else:
+            print("Nothing changed since the last ingestion; skipping cognify.")
+        return {"changed": full_rebuild, "full_rebuild": full_rebuild, "sources": sources}
+
+    print(f"Cognifying (building graph) for {', '.join(changed_datasets)}...")
+    report("cognify", 0.25)
+    if full_rebuild:
+        await cognee.cognify()
+    else:
+        await cognee.cognify(datasets=changed_datasets)
 
+    # Only record hashes once they are actually in the graph
+    save_manifest(manifest)
     print("Ingestion complete!")
+    return {"changed": True, "full_rebuild": full_rebuild, "datasets": changed_datasets, "sources": sources}
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Ingest documents into Cognee")
+    parser.add_argument("paths", nargs="*", help="files or directories (default: the resume files)")
+    parser.add_argument("--force", action="store_true", help="prune Cognee and rebuild everything")
+    args = parser.parse_args()
+    result = asyncio.run(main(force=args.force, paths=args.paths or None))
+    if result.get("changed", True):
+        # A running server rebuilds its /graph snapshot when it sees the new generation
+        import graph_snapshot
+        graph_snapshot.load_state()
+        print(f"Graph generation is now {graph_snapshot.bump_generation()}.")
@@ -0,0 +1,160 @@
+"""
+Background ingestion jobs.
+
+POST /ingest/jobs starts ingest.main() as a task on the server's event loop
+and returns immediately; GET /ingest/jobs/{id} reports stage, progress and
+per-stage timings. Only one ingestion runs at a time: a trigger while a job
+is queued or running returns that job instead of starting a second cognify,
+if it asked for the same options. A trigger with different options (force
+during an incremental run, or the reverse) raises JobConflict, which the
+endpoints answer with 409.
+
+Configuration (env):
+- INGEST_JOBS_RETAIN   finished jobs kept for polling (default: 20)
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import metrics
+
+ACTIVE = ("queued", "running")
+
+
+@dataclass
+class IngestJob:
+    id: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    status: str = "queued"  # queued | running | succeeded | failed
+    stage: str = "queued"
+    progress: float = 0.0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    _stage_started: float = field(default=0.0, repr=False)
+
+    def report(self, stage: str, progress: float) -> None:
+        """Progress callback handed to ingest.main()."""
+        now = time.perf_counter()
+        if stage != self.stage:
+            if self._stage_started:
+                self.timings[self.stage] = round(
+                    self.timings.get(self.stage, 0.0) + now - self._stage_started, 3
+                )
+                metrics.STAGE_DURATION.labels("ingest", self.stage).observe(now - self._stage_started)
+            self.stage = stage
+            self._stage_started = now
+        self.progress = round(max(self.progress, min(1.0, progress)), 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "options": self.options,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_sec": round(end - self.started_at, 3) if self.started_at else None,
+            "timings": self.timings,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobConflict(Exception):
+    """An ingestion with different options is already queued or running."""
+
+    def __init__(self, job: "IngestJob"):
+        super().__init__(f"ingest job {job.id} is already {job.status} with options {job.options}")
+        self.job = job
+
+
+RunFn = Callable[[IngestJob], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class IngestJobManager:
+    def __init__(self, run: RunFn, retain: int = 20):
+        self._run_fn = run
+        self.retain = max(1, retain)
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_env(cls, run: RunFn) -> "IngestJobManager":
+        return cls(run, retain=int(os.getenv("INGEST_JOBS_RETAIN", "20")))
+
+    def active(self) -> Optional[IngestJob]:
+        for job in self._jobs.values():
+            if job.status in ACTIVE:
+                return job
+        return None
+
+    def submit(self, **options: Any) -> Tuple[IngestJob, bool]:
+        """
+        Start a job, or return the one already in flight if it has the same
+        options. Returns (job, created); raises JobConflict otherwise.
+        """
+        current = self.active()
+        if current is not None:
+            if current.options != options:
+                raise JobConflict(current)
+            return current, False
+        job = IngestJob(id=uuid.uuid4().hex[:12], options=options)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job))
+        self._trim()
+        return job, True
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return list(reversed(self._jobs.values()))
+
+    async def wait(self, job: IngestJob) -> IngestJob:
+        task = self._tasks.get(job.id)
+        if task is not None:
+            # Shield so a client hanging up on POST /ingest doesn't kill the job
+            await asyncio.shield(task)
+        return job
+
+    async def shutdown(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _run(self, job: IngestJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        job.report("starting", 0.0)
+        try:
+            job.result = await self._run_fn(job)
+            job.report("done", 1.0)
+            job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            print(f"Ingest job {job.id} failed in stage {job.stage}: {e}")
+            job.error = f"{job.stage}: {e}"
+            job.report("failed", job.progress)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            self._tasks.pop(job.id, None)
+
+    def _trim(self) -> None:
+        finished = [j for j in self._jobs.values() if j.status not in ACTIVE]
+        for job in finished[:max(0, len(finished) - self.retain)]:
+            self._jobs.pop(job.id, None)
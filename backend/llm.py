@@ -0,0 +1,206 @@
+"""
+Shared async OpenAI client for the backend.
+
+One AsyncOpenAI client (and its httpx connection pool) lives for the whole
+process instead of being rebuilt on every request. It is created and closed
+by the FastAPI lifespan in main.py. The openai and httpx packages are only
+imported by startup(), which keeps them off the service's import path.
+
+Configuration (env):
+- LLM_MODEL               chat model (default: gpt-4o)
+- OPENAI_BASE_URL         override the API base, e.g. a local stub server
+- LLM_TIMEOUT             total request timeout in seconds (default: 60)
+- LLM_CONNECT_TIMEOUT     connect timeout in seconds (default: 5)
+- LLM_MAX_CONNECTIONS     max pooled connections (default: 20)
+- LLM_MAX_KEEPALIVE       max idle keep-alive connections (default: 10)
+- LLM_MAX_CONCURRENCY     max in-flight completions per worker (default: 16)
+- LLM_MAX_RETRIES         SDK retries on transient errors (default: 2)
+- LLM_STREAM_USAGE        "0" stops asking for token usage on streams (default: 1)
+
+Completions and the token usage the provider reports are counted in
+metrics.py (backend_llm_requests_total, backend_llm_tokens_total).
+
+Every call first goes through the process's AdmissionController
+(admission.py; LLM_RPM, LLM_TPM and friends): /chat calls are
+"interactive" and ingestion is "batch". Queue waits and rejections are
+recorded in backend_llm_admission_wait_seconds.
+"""
+import asyncio
+import os
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+import metrics
+from admission import INTERACTIVE, AdmissionController, estimate_tokens, retry_after_from
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
+STREAM_USAGE = os.getenv("LLM_STREAM_USAGE", "1") != "0"
+
+ADMISSION_WAIT = metrics.histogram(
+    "backend_llm_admission_wait_seconds", "Time LLM calls waited for admission, by outcome",
+    ("priority", "outcome"),
+)
+
+admission = AdmissionController.from_env()
+admission.on_wait = lambda priority, waited, outcome: ADMISSION_WAIT.labels(priority, outcome).observe(waited)
+
+_client: Optional["AsyncOpenAI"] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _import_client():
+    import httpx
+    from openai import AsyncOpenAI
+    return httpx, AsyncOpenAI
+
+
+async def startup() -> "AsyncOpenAI":
+    """Create the shared client. Safe to call more than once."""
+    global _client, _semaphore
+    if _client is not None:
+        return _client
+
+    # Heavy imports (~0.5s+): done in a thread so the event loop keeps serving
+    httpx, AsyncOpenAI = await asyncio.to_thread(_import_client)
+
+    timeout = httpx.Timeout(
+        _env_float("LLM_TIMEOUT", 60.0),
+        connect=_env_float("LLM_CONNECT_TIMEOUT", 5.0),
+    )
+    limits = httpx.Limits(
+        max_connections=_env_int("LLM_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_env_int("LLM_MAX_KEEPALIVE", 10),
+    )
+    _client = AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
+        timeout=timeout,
+        max_retries=_env_int("LLM_MAX_RETRIES", 2),
+        http_client=httpx.AsyncClient(timeout=timeout, limits=limits),
+    )
+    _semaphore = asyncio.Semaphore(max(1, _env_int("LLM_MAX_CONCURRENCY", 16)))
+    return _client
+
+
+async def shutdown() -> None:
+    global _client, _semaphore
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _semaphore = None
+
+
+async def get_client() -> "AsyncOpenAI":
+    # Lazily start if the app was driven without its lifespan (tests, scripts)
+    return _client if _client is not None else await startup()
+
+
+async def complete(messages: List[Dict[str, Any]], model: Optional[str] = None,
+                   priority: str = INTERACTIVE, **kwargs: Any) -> str:
+    """
+    Run one chat completion on the shared client, bounded by LLM_MAX_CONCURRENCY.
+    Raises admission.AdmissionRejected when the call can't be admitted in time.
+    """
+    client = await get_client()
+    model = model or LLM_MODEL
+    ticket = await admission.acquire(estimate_tokens(messages, kwargs.get("max_tokens")), priority)
+    completion = None
+    try:
+        async with _semaphore:
+            try:
+                completion = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    **kwargs,
+                )
+            except Exception as e:
+                _on_error(e)
+                metrics.LLM_REQUESTS.labels(model, "complete", "error").inc()
+                raise
+    finally:
+        if completion is None:
+            # Failed or cancelled before a response: give the estimate back to the budget
+            ticket.settle(0)
+    metrics.LLM_REQUESTS.labels(model, "complete", "ok").inc()
+    _record_usage(model, completion.usage)
+    ticket.settle(completion.usage.total_tokens if completion.usage else None)
+    return completion.choices[0].message.content or ""
+
+
+def _on_error(error: Exception) -> None:
+    if getattr(error, "status_code", None) == 429:
+        # Rate limited upstream despite admission control (another client on the key?): back off
+        admission.penalize(retry_after_from(error))
+
+
+def _record_usage(model: str, usage: Any) -> None:
+    if usage is None:
+        return
+    metrics.LLM_TOKENS.labels(model, "prompt").inc(usage.prompt_tokens or 0)
+    metrics.LLM_TOKENS.labels(model, "completion").inc(usage.completion_tokens or 0)
+
+
+async def stream(messages: List[Dict[str, Any]], model: Optional[str] = None,
+                 priority: str = INTERACTIVE, **kwargs: Any) -> AsyncIterator[str]:
+    """
+    Stream a chat completion as text deltas.
+
+    Closing the generator early (client went away) closes the upstream HTTP
+    response, which cancels generation on the provider side.
+    """
+    client = await get_client()
+    model = model or LLM_MODEL
+    if STREAM_USAGE:
+        # Usage arrives in a final chunk with no choices
+        kwargs.setdefault("stream_options", {"include_usage": True})
+    status = "error"
+    ticket = await admission.acquire(estimate_tokens(messages, kwargs.get("max_tokens")), priority)
+    response = None
+    try:
+        async with _semaphore:
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    stream=True,
+                    **kwargs,
+                )
+            except Exception as e:
+                _on_error(e)
+                metrics.LLM_REQUESTS.labels(model, "stream", "error").inc()
+                raise
+            try:
+                async for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                    if getattr(chunk, "usage", None) is not None:
+                        _record_usage(model, chunk.usage)
+                        ticket.settle(chunk.usage.total_tokens)
+                status = "ok"
+            except (GeneratorExit, asyncio.CancelledError):
+                status = "cancelled"
+                raise
+            finally:
+                metrics.LLM_REQUESTS.labels(model, "stream", status).inc()
+                await response.close()
+    finally:
+        if response is None:
+            # Failed or cancelled before a response: give the estimate back to the budget
+            ticket.settle(0)
@@ -1,7 +1,12 @@
 import os
+import json
+import time
 import asyncio
-from typing import List, Dict, Any
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Dict, Any, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
@@ -14,11 +19,114 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
 if os.getenv("OPENAI_API_KEY"):
     os.environ["LLM_API_KEY"] = os.getenv("OPENAI_API_KEY").strip()
 
-import cognee
+from models import ChatRequest, ChatResponse, GraphResponse, NeighborhoodResponse
+import llm
+import metrics
+from admission import AdmissionRejected
+from answer_cache import AnswerCache, context_key, normalize_message
+from coalesce import SingleFlight
+import graph_snapshot
+import context
+from context import assemble, prompt_stats
+import vector_index
+import warmup
+from ingest_jobs import IngestJob, IngestJobManager, JobConflict
 
-from models import ChatRequest, ChatResponse, GraphResponse, GraphNode, GraphEdge
+_cognee = None
 
-app = FastAPI()
+
+def load_cognee():
+    """Import cognee on first use; it takes seconds, so the warm-up does it in a thread."""
+    global _cognee
+    if _cognee is None:
+        import cognee
+        _cognee = cognee
+    return _cognee
+
+
+answers = AnswerCache.from_env()
+# Concurrent identical questions/searches share one upstream call
+chat_flight = SingleFlight("chat")
+search_flight = SingleFlight("search")
+# Local retrieval over the resume chunks for when Cognee fails or is slow
+vectors = vector_index.VectorIndex.from_env()
+
+
+async def run_ingest_job(job: IngestJob):
+    import ingest
+    result = await ingest.main(force=job.options.get("force", False), progress=job.report)
+    if result.get("changed", True):
+        graph_snapshot.bump_generation()
+        try:
+            await _load_vectors()
+        except Exception as e:
+            # The ingest itself succeeded; a stale fallback index doesn't undo that
+            print(f"Ingest job {job.id}: vector index refresh failed: {e}")
+            result["vector_refresh_error"] = str(e) or e.__class__.__name__
+    return result
+
+
+ingest_jobs = IngestJobManager.from_env(run_ingest_job)
+
+NEIGHBORHOOD_MAX_DEPTH = int(os.getenv("GRAPH_NEIGHBORHOOD_MAX_DEPTH", "4"))
+NEIGHBORHOOD_MAX_LIMIT = int(os.getenv("GRAPH_NEIGHBORHOOD_MAX_LIMIT", "2000"))
+
+
+warm = warmup.WarmUp()
+
+
+async def _load_answer_cache():
+    answers.load()
+
+
+async def _load_cognee():
+    await asyncio.to_thread(load_cognee)
+
+
+async def _load_tokenizer():
+    await asyncio.to_thread(context.load_encoding)
+
+
+async def _load_vectors():
+    if vector_index.MODE == "off":
+        return
+    try:
+        await vectors.refresh()
+    except Exception as e:
+        # Keep serving the previous index; Cognee stays the primary source
+        print(f"Vector index: refresh failed: {e}")
+        if not vectors.ready:
+            raise
+
+
+async def _build_graph():
+    await graph_snapshot.get_snapshot()
+    await graph_snapshot.get_search_index()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    graph_snapshot.load_state()
+    # Serve immediately; heavy initialization runs in the background (see warmup.py)
+    # One pooled LLM client per worker process
+    warm.add("llm", llm.startup)
+    warm.add("answer_cache", _load_answer_cache, required=False)
+    warm.add("cognee", _load_cognee)
+    warm.add("tokenizer", _load_tokenizer, required=False)
+    warm.add("vectors", _load_vectors, required=False)
+    if warmup.WARM_GRAPH:
+        warm.add("graph", _build_graph, required=False)
+    warm.start()
+    try:
+        yield
+    finally:
+        await warm.stop()
+        await ingest_jobs.shutdown()
+        answers.close()
+        await llm.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -28,141 +136,363 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware, routes=app.router.routes)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    # LLM queue full or the wait would be too long: fail fast so clients back off
+    return JSONResponse({"detail": str(exc)}, status_code=exc.status, headers=exc.headers)
 
 @app.get("/")
 async def root():
     return {"status": "ok", "service": "Cognee Backend"}
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: warm-up has loaded cognee and the LLM client (503 until then)."""
+    state = warm.to_dict()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+async def retrieve(message: str) -> List[Any]:
+    """
+    Cognee search, with the local vector index (vector_index.py) standing in
+    when Cognee fails, misses its deadline or returns nothing. In hedge mode
+    the local index is also queried once Cognee has run for VECTOR_HEDGE_MS,
+    and whichever has something first is used.
+    """
+    if vector_index.MODE == "off":
+        return await load_cognee().search(message)
+    deadline = vector_index.SEARCH_TIMEOUT_SEC
+    t0 = time.perf_counter()
+    pending = asyncio.ensure_future(load_cognee().search(message))
+    local = None
+    if vector_index.MODE == "hedge":
+        done, _ = await asyncio.wait({pending}, timeout=vector_index.HEDGE_SEC)
+        if not done:
+            # The local index answers at once: it wins the race unless it has nothing,
+            # in which case Cognee keeps its full deadline
+            with metrics.stage("chat", "vector_search"):
+                local = vectors.search(message)
+            if local:
+                pending.cancel()
+                metrics.RETRIEVALS.labels("vectors", "hedged").inc()
+                return local
+    results: List[Any] = []
+    error: Optional[Exception] = None
+    try:
+        results = await asyncio.wait_for(pending, max(0.0, deadline - (time.perf_counter() - t0)))
+        reason = "empty"
+    except asyncio.TimeoutError as e:
+        error, reason = e, "timeout"
+    except Exception as e:
+        error, reason = e, "error"
+    if results:
+        metrics.RETRIEVALS.labels("cognee", "ok").inc()
+        return results
+
+    if local is None:
+        with metrics.stage("chat", "vector_search"):
+            local = vectors.search(message)
+    if not local:
+        metrics.RETRIEVALS.labels("none", reason).inc()
+        if error is not None:
+            raise error if reason == "error" else RuntimeError(f"Cognee search timed out after {deadline}s")
+        return results
+    metrics.RETRIEVALS.labels("vectors", reason).inc()
+    if error is not None:
+        print(f"Retrieval: Cognee {reason} ({error!r}), answering from {len(local)} local chunks")
+    return local
+
+async def search(message: str) -> List[Any]:
+    return await search_flight.do(normalize_message(message), lambda: retrieve(message))
+
+async def answer(message: str, history: List[Any]) -> str:
+    # Simple search using Cognee
+    # In a real RAG, we would use cognee.search to get context and then LLM to answer
+    # For now, assuming cognee.search returns relevant chunks
+    with metrics.stage("chat", "search"):
+        search_results = await search(message)
+    # Rank, dedupe and trim results and history to the prompt token budget
+    with metrics.stage("chat", "assemble"):
+        prompt = assemble(message, search_results, history)
+
+    # Reuse a cached answer while the prompt context stays the same
+    ctx_hash = context_key(prompt.cache_context())
+    with metrics.stage("chat", "answer_cache"):
+        cached = answers.get(message, ctx_hash)
+    if cached:
+        return cached[0]
+
+    # Generate the answer from the search results with the shared LLM client.
+    prompt_stats.record(prompt)
+    with metrics.stage("chat", "llm"):
+        text = await llm.complete(prompt.messages)
+    answers.put(message, ctx_hash, text)
+    return text
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     try:
-        # Simple search using Cognee
-        # In a real RAG, we would use cognee.search to get context and then LLM to answer
-        # For now, assuming cognee.search returns relevant chunks
-        
-        search_results = await cognee.search(request.message)
-        
-        # We need to pass this context to an LLM. 
-        # Since Cognee might have built-in RAG, let's check.
-        # If not, we'll do a simple manual RAG here using OpenAI directly if needed, 
-        # but Cognee usually handles the retrieval part.
-        
-        # For now, let's construct a simple answer or use an LLM if I had one configured.
-        # I will use the OpenAI client to generate the answer based on search results.
-        
-        from openai import OpenAI
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        context = "\n".join([str(r) for r in search_results])
-        
-        system_prompt = f"""You are an AI assistant for Pedro Reichow. 
-        Use the following context to answer the user's question about Pedro.
-        If the answer is not in the context, say you don't know.
-        
-        Context:
-        {context}
-        """
-        
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": request.message}
-            ]
-        )
-        
-        answer = completion.choices[0].message.content
-        return ChatResponse(response=answer)
+        # Same question with the same history: join the in-flight answer
+        key = (normalize_message(request.message), context_key(request.history or []))
+        text = await chat_flight.do(key, lambda: answer(request.message, request.history))
+        return ChatResponse(response=text)
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
         print(f"Chat error: {e}")
         # Fallback if Cognee fails (e.g. empty graph)
         return ChatResponse(response=f"I'm unable to access my memory right now. Error: {str(e)}")
 
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Server-sent events version of /chat.
+
+    Events: `meta` (retrieval info, sent as soon as search finishes), then one
+    `token` per text delta (a single one for cached answers), then `done`;
+    `error` replaces the rest on failure.
+    If the client disconnects, the upstream completion is closed.
+    """
+    async def events():
+        t0 = time.perf_counter()
+        try:
+            with metrics.stage("chat_stream", "search"):
+                search_results = await search(request.message)
+        except Exception as e:
+            print(f"Chat stream search error: {e}")
+            yield sse_event("error", {"message": f"I'm unable to access my memory right now. Error: {str(e)}"})
+            return
+
+        retrieval_ms = round((time.perf_counter() - t0) * 1000, 1)
+        with metrics.stage("chat_stream", "assemble"):
+            prompt = assemble(request.message, search_results, request.history)
+        ctx_hash = context_key(prompt.cache_context())
+        with metrics.stage("chat_stream", "answer_cache"):
+            cached = answers.get(request.message, ctx_hash)
+        yield sse_event("meta", {
+            "results": len(search_results),
+            "context_items": len(prompt.context),
+            "prompt_tokens": prompt.prompt_tokens,
+            "retrieval_ms": retrieval_ms,
+            "cached": cached[1] if cached else None,
+        })
+        if cached:
+            yield sse_event("token", {"text": cached[0]})
+            yield sse_event("done", {"total_ms": round((time.perf_counter() - t0) * 1000, 1)})
+            return
+
+        prompt_stats.record(prompt)
+        tokens = llm.stream(prompt.messages)
+        parts: List[str] = []
+        t_llm = time.perf_counter()
+        try:
+            async for delta in tokens:
+                if await http_request.is_disconnected():
+                    print("Chat stream: client disconnected, cancelling upstream completion")
+                    return
+                if not parts:
+                    metrics.STAGE_DURATION.labels("chat_stream", "llm_first_token").observe(time.perf_counter() - t_llm)
+                parts.append(delta)
+                yield sse_event("token", {"text": delta})
+            metrics.STAGE_DURATION.labels("chat_stream", "llm").observe(time.perf_counter() - t_llm)
+            answers.put(request.message, ctx_hash, "".join(parts))
+            yield sse_event("done", {"total_ms": round((time.perf_counter() - t0) * 1000, 1)})
+        except AdmissionRejected as e:
+            yield sse_event("error", {"message": str(e), "status": e.status, "retry_after": e.headers["Retry-After"]})
+        except Exception as e:
+            print(f"Chat stream error: {e}")
+            yield sse_event("error", {"message": str(e)})
+        finally:
+            # Runs on normal completion, early return and task cancellation alike
+            await tokens.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/stats")
+async def stats():
+    return {
+        "answer_cache": answers.stats(),
+        "prompt": prompt_stats.to_dict(),
+        "coalescing": {"chat": chat_flight.stats(), "search": search_flight.stats()},
+        "llm_admission": llm.admission.stats(),
+        "vectors": vectors.stats(),
+    }
+
+ANSWER_CACHE_LOOKUPS = metrics.counter("backend_answer_cache_lookups_total", "Answer cache lookups by result", ("result",))
+ANSWER_CACHE_ENTRIES = metrics.gauge("backend_answer_cache_entries", "Answers held in memory")
+PROMPT_TOKENS = metrics.counter("backend_prompt_tokens_total", "Estimated prompt tokens sent to the LLM", ("kind",))
+COALESCED = metrics.counter("backend_coalesced_calls_total", "Calls by whether they joined an in-flight one", ("flight", "result"))
+GRAPH_GENERATION = metrics.gauge("backend_graph_generation", "Current graph generation")
+GRAPH_SIZE = metrics.gauge("backend_graph_snapshot_size", "Size of the current graph snapshot", ("kind",))
+INGEST_ACTIVE = metrics.gauge("backend_ingest_jobs_active", "Ingestion jobs queued or running")
+
+
+def collect_stats() -> None:
+    # Counters kept by the components themselves, copied in at scrape time
+    cache = answers.stats()
+    ANSWER_CACHE_LOOKUPS.labels("exact").set(cache["hits_exact"])
+    ANSWER_CACHE_LOOKUPS.labels("near").set(cache["hits_near"])
+    ANSWER_CACHE_LOOKUPS.labels("miss").set(cache["misses"])
+    ANSWER_CACHE_ENTRIES.set(cache["entries"])
+    prompts = prompt_stats.to_dict()
+    PROMPT_TOKENS.labels("sent").set(prompts["prompt_tokens_total"])
+    PROMPT_TOKENS.labels("saved").set(prompts["tokens_saved_total"])
+    for flight in (chat_flight, search_flight):
+        flight_stats = flight.stats()
+        COALESCED.labels(flight.name, "upstream").set(flight_stats["upstream"])
+        COALESCED.labels(flight.name, "coalesced").set(flight_stats["coalesced"])
+    GRAPH_GENERATION.set(graph_snapshot.current_generation())
+    snap = graph_snapshot.peek_snapshot()
+    if snap is not None:
+        GRAPH_SIZE.labels("nodes").set(snap.node_count)
+        GRAPH_SIZE.labels("edges").set(snap.edge_count)
+        GRAPH_SIZE.labels("bytes").set(len(snap.body))
+    INGEST_ACTIVE.set(1 if ingest_jobs.active() else 0)
+
+
+metrics.REGISTRY.on_collect(collect_stats)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition; see metrics.py."""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+def submit_ingest_job(force: bool):
+    try:
+        return ingest_jobs.submit(force=force)
+    except JobConflict as e:
+        # Waiting on, or answering with, a run that won't do what was asked would be wrong
+        raise HTTPException(status_code=409, detail={"error": str(e), "job": e.job.to_dict()})
+
 @app.post("/ingest")
-async def run_ingestion():
+async def run_ingestion(force: bool = False):
+    # Runs through the job manager so it shares single-flight with /ingest/jobs
+    job, _ = submit_ingest_job(force)
+    await ingest_jobs.wait(job)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=500, detail=job.error or "Ingestion failed")
+    return {"status": "Ingestion completed", "graph_generation": graph_snapshot.current_generation()}
+
+@app.post("/ingest/jobs", status_code=202)
+async def create_ingest_job(force: bool = False):
+    # force=true prunes Cognee and rebuilds instead of ingesting only changed chunks
+    job, created = submit_ingest_job(force)
+    return {**job.to_dict(), "deduplicated": not created}
+
+@app.get("/ingest/jobs")
+async def list_ingest_jobs():
+    return {"jobs": [job.to_dict() for job in ingest_jobs.list()]}
+
+@app.get("/ingest/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+def not_modified(request: Request, snap: graph_snapshot.GraphSnapshot) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or any(t.removeprefix("W/") == snap.etag for t in tags)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(snap.updated_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+@app.get("/graph", response_model=GraphResponse)
+async def get_graph(request: Request):
     try:
-        import ingest
-        await ingest.main()
-        return {"status": "Ingestion completed"}
+        # Mapped and serialized once per graph generation; see graph_snapshot.py
+        snap = await graph_snapshot.get_snapshot()
     except Exception as e:
+        print(f"Graph error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/graph", response_model=GraphResponse)
-async def get_graph():
-    try:
-        # Retrieve graph data. 
-        # Since Cognee doesn't have a simple "dump graph" method in the quickstart,
-        # We will search for key entities to build a subgraph.
-        # Or we can try to access the internal graph storage if possible.
-        
-        # Retrieve graph data using the engine directly
-        from cognee.infrastructure.databases.graph.get_graph_engine import get_graph_engine
-        engine = await get_graph_engine()
-        
-        # Try to get the full graph
-        # get_graph_data() returns a tuple (nodes, edges)
-        graph_data = await engine.get_graph_data()
-        
-        if isinstance(graph_data, tuple) and len(graph_data) == 2:
-            nodes_raw, edges_raw = graph_data
-        else:
-            nodes_raw = []
-            edges_raw = []
-        
-        # Map to response model
-        mapped_nodes = []
-        for n in nodes_raw:
-            # n is likely (id, properties_dict)
-            if isinstance(n, tuple) and len(n) >= 2:
-                node_id = n[0]
-                props = n[1] if isinstance(n[1], dict) else {}
-            else:
-                node_id = str(n.get("id", "unknown")) if isinstance(n, dict) else str(n)
-                props = n if isinstance(n, dict) else {}
-
-            mapped_nodes.append(GraphNode(
-                id=str(node_id),
-                label=props.get("name", props.get("title", str(node_id))),
-                type=props.get("type", "node"),
-                category=props.get("type", "node"),
-                title=props.get("name", props.get("title", str(node_id))),
-                description=props.get("description", props.get("text", "")),
-                data=props
-            ))
-            
-        mapped_edges = []
-        for e in edges_raw:
-            # e is likely (source, target, properties_dict)
-            if isinstance(e, tuple) and len(e) >= 3:
-                source = e[0]
-                target = e[1]
-                props = e[2] if isinstance(e[2], dict) else {}
-            elif isinstance(e, tuple) and len(e) == 2:
-                 # Maybe (source, target) without props?
-                 source = e[0]
-                 target = e[1]
-                 props = {}
-            else:
-                source = str(e.get("source", "unknown")) if isinstance(e, dict) else "unknown"
-                target = str(e.get("target", "unknown")) if isinstance(e, dict) else "unknown"
-                props = e if isinstance(e, dict) else {}
-
-            mapped_edges.append(GraphEdge(
-                id=f"{source}_{target}",
-                source=str(source),
-                target=str(target),
-                relation=props.get("relationship", "related"),
-                type=props.get("relationship", "related"),
-                weight=props.get("weight", 1),
-                data=props
-            ))
-
-        return GraphResponse(nodes=mapped_nodes, edges=mapped_edges, lastUpdated="2025-11-25")
+    headers = {
+        "ETag": snap.etag,
+        "Last-Modified": formatdate(snap.updated_at, usegmt=True),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if not_modified(request, snap):
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(snap.gzipped, media_type="application/json",
+                        headers={**headers, "Content-Encoding": "gzip"})
+    return Response(snap.body, media_type="application/json", headers=headers)
 
+@app.get("/graph/neighborhood", response_model=NeighborhoodResponse)
+async def graph_neighborhood(
+    id: str,
+    depth: int = Query(1, ge=0, le=NEIGHBORHOOD_MAX_DEPTH),
+    types: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=NEIGHBORHOOD_MAX_LIMIT),
+):
+    """
+    k-hop subgraph around one node, from the adjacency index of the current
+    graph snapshot. `types` is a comma-separated list of node types to keep.
+    """
+    try:
+        snap = await graph_snapshot.get_snapshot()
     except Exception as e:
         print(f"Graph error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    if id not in snap.index:
+        raise HTTPException(status_code=404, detail=f"Node not found: {id}")
+
+    type_list = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    with metrics.stage("graph", "neighborhood"):
+        hood = snap.index.neighborhood(id, depth=depth, types=type_list, limit=limit)
+    return NeighborhoodResponse(
+        nodes=hood.nodes,
+        edges=hood.edges,
+        lastUpdated=graph_snapshot.iso_timestamp(snap.updated_at),
+        center=id,
+        depth=hood.depth,
+        truncated=hood.truncated,
+    )
+
+@app.get("/graph/search")
+async def graph_search(
+    q: str,
+    limit: int = Query(10, ge=1, le=100),
+    types: Optional[str] = None,
+):
+    """Full-text node search (label, title, description, list attributes), BM25-ranked with prefix matching."""
+    try:
+        index, source = await graph_snapshot.get_search_index()
+    except Exception as e:
+        print(f"Graph search error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    t0 = time.perf_counter()
+    type_list = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    results = index.search(q, limit=limit, types=type_list)
+    metrics.STAGE_DURATION.labels("graph", "search").observe(time.perf_counter() - t0)
+    return {
+        "query": q,
+        "source": source,
+        "results": results,
+        "took_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,312 @@
+"""
+Prometheus-style metrics for the backend, served as text by GET /metrics.
+
+A small in-process registry (counters, gauges, histograms with labels) so
+the service needs no extra dependency. Recording is a dict lookup and a
+float add under an uncontended lock, cheap enough for the per-request hot
+path. The lock (one per metric, shared by its children) is needed because
+not everything is recorded from the event loop: admission waits are
+observed from acquire_sync callers, the LangExtract service's queue waits
+from executor worker threads, and scrapes render on whichever thread
+serves /metrics.
+
+Metrics that already exist elsewhere (answer cache, coalescing, prompt
+sizes) are copied into gauges by collect callbacks at scrape time, rather
+than being counted twice.
+
+Label values should stay low-cardinality: route templates, stage names,
+never user input.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from starlette.routing import Match
+
+# Seconds; covers cache hits (sub-ms) through slow cognify runs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Child for these label values (strings), created on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def _snapshot(self) -> List[Tuple[LabelValues, object]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self, lock: threading.Lock):
+        self.value = 0.0
+        self._lock = lock
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value(self._lock)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._snapshot():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Sequence[float], lock: threading.Lock):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = lock
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def read(self) -> Tuple[List[int], float, int]:
+        """(bucket counts, sum, count), consistent with each other."""
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "t0")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.child.observe(time.perf_counter() - self.t0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets, self._lock)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._snapshot():
+            counts, total, observed = child.read()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {observed}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def on_collect(self, callback: Callable[[], None]) -> None:
+        """Run callback before every scrape, e.g. to copy stats into gauges."""
+        self._collectors.append(callback)
+
+    def render(self) -> str:
+        for callback in self._collectors:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Metrics: collect callback failed: {e}")
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labelnames))
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = counter("backend_http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+HTTP_DURATION = histogram("backend_http_request_duration_seconds", "HTTP request latency, until the body is sent",
+                          ("method", "route"))
+HTTP_IN_FLIGHT = gauge("backend_http_requests_in_flight", "HTTP requests being handled", ("route",))
+STAGE_DURATION = histogram("backend_stage_duration_seconds", "Latency of pipeline stages",
+                           ("pipeline", "stage"))
+RETRIEVALS = counter("backend_chat_retrievals_total",
+                     "Chat retrievals by source (cognee, vectors, none) and why Cognee wasn't used",
+                     ("source", "reason"))
+LLM_REQUESTS = counter("backend_llm_requests_total", "LLM completions", ("model", "mode", "status"))
+LLM_TOKENS = counter("backend_llm_tokens_total", "LLM tokens reported by the provider", ("model", "kind"))
+
+
+def stage(pipeline: str, name: str):
+    """Context manager timing one pipeline stage: `with metrics.stage("chat", "search"): ...`"""
+    return STAGE_DURATION.labels(pipeline, name).time()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests per route template, with latency and
+    in-flight gauges. Pure ASGI (not BaseHTTPMiddleware) so streaming
+    responses pass through untouched.
+
+    `routes` is the app's route list (app.router.routes); it is matched up
+    front so in-flight requests are labelled by template too.
+    """
+
+    def __init__(self, app, routes: Sequence = (), skip: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.routes = routes
+        self.skip = set(skip)
+        self._templates: Dict[Tuple[str, str], str] = {}
+
+    def _route_for(self, scope) -> str:
+        key = (scope.get("method", ""), scope.get("path", ""))
+        template = self._templates.get(key)
+        if template is None:
+            template = "unmatched"  # keeps scanners from inflating label cardinality
+            for route in self.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    template = route.path
+                    break
+                if match == Match.PARTIAL and template == "unmatched":
+                    template = route.path  # right path, wrong method
+            if len(self._templates) < 10_000:
+                self._templates[key] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip:
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        method = scope.get("method", "GET")
+        route = self._route_for(scope)
+        in_flight = HTTP_IN_FLIGHT.labels(route)
+        in_flight.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            HTTP_DURATION.labels(method, route).observe(time.perf_counter() - t0)
@@ -30,3 +30,8 @@ class GraphResponse(BaseModel):
     nodes: List[GraphNode]
     edges: List[GraphEdge]
     lastUpdated: str
+
+class NeighborhoodResponse(GraphResponse):
+    center: str
+    depth: int
+    truncated: bool
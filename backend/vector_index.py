@@ -0,0 +1,283 @@
+"""
+In-process vector retrieval over the resume documents, used when Cognee
+search fails, times out or finds nothing.
+
+The ingest sources (by default the resume PDF and HTML in backend/assets)
+are chunked and embedded into a float32 NumPy matrix, one L2-normalized row
+per chunk. Embeddings are local TF-IDF vectors over the corpus vocabulary
+(stemmed word unigrams and bigrams), so both building and querying work
+without the network, which is the point of a fallback. Query words that
+are not in the vocabulary are ignored. A query is one matrix-vector product
+plus a top-k partition: well under a millisecond for resume-sized corpora.
+
+The matrix is saved under VECTOR_INDEX_DIR and opened with mmap_mode="r",
+so workers share the page cache instead of each holding a copy. meta.json
+holds the vocabulary, chunk texts and source hashes, and names the matrix
+file of its build, so a half-written build is never picked up. The index
+is rebuilt when a source changes (checked at warm-up and after ingestion).
+
+VECTOR_FALLBACK picks how chat retrieval uses it (see retrieve() in main.py):
+- "fallback": wait for Cognee up to COGNEE_SEARCH_TIMEOUT, then use the
+  local index if Cognee failed, timed out or returned nothing
+- "hedge": a hedged request. Cognee runs alone for VECTOR_HEDGE_MS; if it
+  hasn't answered by then the local index is queried too and, since it
+  answers at once, used if it has anything (Cognee is cancelled).
+  Otherwise Cognee keeps running up to COGNEE_SEARCH_TIMEOUT, as above
+- "off": Cognee only, as before
+
+Configuration (env):
+- VECTOR_FALLBACK        "fallback", "hedge" or "off" (default: fallback)
+- VECTOR_HEDGE_MS        how long Cognee runs alone in hedge mode, ms (default: 1500)
+- COGNEE_SEARCH_TIMEOUT  Cognee deadline, seconds (default: 10)
+- VECTOR_INDEX_DIR       where the matrix is persisted (default: backend/.cache/vectors)
+- VECTOR_CHUNK_CHARS     chunk size; short paragraphs are packed up to it (default: 800)
+- VECTOR_TOP_K           chunks returned per query (default: 5)
+- VECTOR_MIN_SCORE       minimum cosine similarity of a returned chunk (default: 0.05)
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from answer_cache import normalize_message
+
+MODE = os.getenv("VECTOR_FALLBACK", "fallback")
+HEDGE_SEC = float(os.getenv("VECTOR_HEDGE_MS", "1500")) / 1000.0
+SEARCH_TIMEOUT_SEC = float(os.getenv("COGNEE_SEARCH_TIMEOUT", "10"))
+INDEX_DIR = os.getenv(
+    "VECTOR_INDEX_DIR",
+    os.path.join(os.path.dirname(__file__), ".cache", "vectors"),
+)
+INDEX_VERSION = 1
+
+# Too common to carry signal; questions are phrased around them
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from had has have he her his how i in is it its "
+    "me my of on or our she so that the their them they this to was were what when where which "
+    "who why will with you your about tell".split()
+)
+SUFFIXES = ("ations", "ation", "ings", "ing", "ies", "ed", "es", "er", "ly", "s")
+
+
+def stem(word: str) -> str:
+    """Crude suffix stripping, enough to match "worked" with "work" and "skills" with "skill"."""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def features(text: str) -> Dict[str, int]:
+    """Stemmed word unigram and bigram counts of the normalized text, stopwords dropped."""
+    words = [stem(w) for w in normalize_message(text).split() if w not in STOPWORDS]
+    counts: Dict[str, int] = {}
+    for i, word in enumerate(words):
+        counts[word] = counts.get(word, 0) + 1
+        if i:
+            bigram = words[i - 1] + " " + word
+            counts[bigram] = counts.get(bigram, 0) + 1
+    return counts
+
+
+def pack_chunks(chunks: Sequence[str], max_chars: int) -> List[str]:
+    """Merge consecutive short chunks (headings, single lines) up to max_chars."""
+    packed: List[str] = []
+    current: List[str] = []
+    size = 0
+    for chunk in chunks:
+        if current and size + len(chunk) > max_chars:
+            packed.append("\n".join(current))
+            current, size = [], 0
+        current.append(chunk)
+        size += len(chunk) + 1
+    if current:
+        packed.append("\n".join(current))
+    return packed
+
+
+@dataclass
+class VectorIndex:
+    chunk_chars: int = 800
+    top_k: int = 5
+    min_score: float = 0.05
+    path: str = INDEX_DIR
+    chunks: List[Dict[str, Any]] = field(default_factory=list)
+    sources: Dict[str, str] = field(default_factory=dict)
+    vocabulary: Dict[str, int] = field(default_factory=dict)
+    idf: Optional[np.ndarray] = None
+    matrix: Optional[np.ndarray] = None
+    built_at: Optional[float] = None
+    queries: int = 0
+    hits: int = 0
+
+    @classmethod
+    def from_env(cls) -> "VectorIndex":
+        return cls(
+            chunk_chars=int(os.getenv("VECTOR_CHUNK_CHARS", "800")),
+            top_k=int(os.getenv("VECTOR_TOP_K", "5")),
+            min_score=float(os.getenv("VECTOR_MIN_SCORE", "0.05")),
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.matrix is not None and len(self.chunks) > 0
+
+    # --------- embedding ---------
+    def _embed(self, counts: Dict[str, int]) -> np.ndarray:
+        vec = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for feat, tf in counts.items():
+            col = self.vocabulary.get(feat)
+            if col is not None:
+                vec[col] = (1.0 + math.log(tf)) * self.idf[col]
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    # --------- build / persist ---------
+    def build(self, documents: Dict[str, str], digests: Dict[str, str]) -> None:
+        """Chunk and embed documents ({source key: text}); replaces the current index."""
+        import ingest
+
+        chunks: List[Dict[str, Any]] = []
+        for source, text in documents.items():
+            for chunk in pack_chunks(ingest.chunk_text(text), self.chunk_chars):
+                chunks.append({"source": source, "text": chunk})
+
+        counts = [features(c["text"]) for c in chunks]
+        df: Dict[str, int] = {}
+        for c in counts:
+            for feat in c:
+                df[feat] = df.get(feat, 0) + 1
+        vocabulary = {feat: col for col, feat in enumerate(sorted(df))}
+        idf = np.zeros(len(vocabulary), dtype=np.float32)
+        for feat, col in vocabulary.items():
+            idf[col] = math.log((len(chunks) + 1) / (df[feat] + 1)) + 1.0
+
+        self.vocabulary, self.idf = vocabulary, idf
+        matrix = np.zeros((len(chunks), len(vocabulary)), dtype=np.float32)
+        for row, c in enumerate(counts):
+            matrix[row] = self._embed(c)
+
+        self.chunks, self.sources, self.matrix = chunks, dict(digests), matrix
+        self.built_at = time.time()
+
+    def save(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        # Each build writes its own matrix file; replacing meta.json switches
+        # to it atomically, then older matrices are removed
+        name = f"embeddings-{int(self.built_at * 1000)}.npy"
+        tmp = os.path.join(self.path, name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(self.matrix))
+        os.replace(tmp, os.path.join(self.path, name))
+        meta = {
+            "version": INDEX_VERSION,
+            "chunk_chars": self.chunk_chars,
+            "built_at": self.built_at,
+            "matrix": name,
+            "sources": self.sources,
+            "vocabulary": self.vocabulary,
+            "idf": self.idf.tolist(),
+            "chunks": self.chunks,
+        }
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+        for old in os.listdir(self.path):
+            if old.startswith("embeddings-") and old != name:
+                try:
+                    os.remove(os.path.join(self.path, old))
+                except OSError:
+                    pass
+
+    def load(self, digests: Optional[Dict[str, str]] = None) -> bool:
+        """Open a saved index (memory-mapped); False if missing, stale or built with other settings."""
+        try:
+            with open(os.path.join(self.path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if (meta.get("version"), meta.get("chunk_chars")) != (INDEX_VERSION, self.chunk_chars):
+                return False
+            if digests is not None and meta.get("sources") != digests:
+                return False
+            matrix = np.load(os.path.join(self.path, meta["matrix"]), mmap_mode="r")
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Vector index: could not load ({e}), rebuilding.")
+            return False
+        if matrix.shape != (len(meta["chunks"]), len(meta["vocabulary"])):
+            return False
+        self.chunks, self.sources, self.vocabulary = meta["chunks"], meta["sources"], meta["vocabulary"]
+        self.idf = np.asarray(meta["idf"], dtype=np.float32)
+        self.matrix, self.built_at = matrix, meta.get("built_at")
+        return True
+
+    async def refresh(self, paths: Optional[List[str]] = None) -> str:
+        """
+        Make the index match the ingest sources: reuse the saved one if the
+        sources are unchanged, else extract, embed and save. Returns
+        "current", "loaded" or "built"; raises if no document could be read.
+        """
+        import ingest
+        from extraction import DocumentExtractor, discover_sources
+
+        paths = discover_sources(paths or ingest.configured_sources())
+        digests = await asyncio.to_thread(lambda: {ingest.source_key(p): ingest.file_sha256(p) for p in paths})
+        if self.ready and self.sources == digests:
+            return "current"
+        if await asyncio.to_thread(self.load, digests):
+            print(f"Vector index: loaded {len(self.chunks)} chunks from {self.path}")
+            return "loaded"
+
+        t0 = time.perf_counter()
+        documents: Dict[str, str] = {}
+        with DocumentExtractor() as extractor:
+            async for doc in extractor.extract(paths):
+                if doc.error:
+                    print(f"Vector index: extraction failed for {doc.path}: {doc.error}")
+                    # Left out of the digests, so the next refresh retries it
+                    digests.pop(ingest.source_key(doc.path), None)
+                    continue
+                documents[ingest.source_key(doc.path)] = doc.text
+        if not any(text.strip() for text in documents.values()):
+            raise RuntimeError("no source text to index")
+        await asyncio.to_thread(self.build, documents, digests)
+        await asyncio.to_thread(self.save)
+        print(f"Vector index: built {len(self.chunks)} chunks ({len(self.vocabulary)} terms) "
+              f"from {len(documents)} document(s) in {time.perf_counter() - t0:.2f}s")
+        return "built"
+
+    # --------- query ---------
+    def search(self, text: str, k: Optional[int] = None) -> List[str]:
+        """Texts of the top-k chunks by cosine similarity; empty if nothing matches."""
+        self.queries += 1
+        if not self.ready:
+            return []
+        query = self._embed(features(text))
+        if not query.any():
+            return []
+        scores = self.matrix @ query
+        k = min(k or self.top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        results = [self.chunks[i]["text"] for i in top if scores[i] >= self.min_score]
+        if results:
+            self.hits += 1
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": MODE,
+            "ready": self.ready,
+            "chunks": len(self.chunks),
+            "terms": len(self.vocabulary),
+            "sources": len(self.sources),
+            "built_at": self.built_at,
+            "queries": self.queries,
+            "hits": self.hits,
+        }
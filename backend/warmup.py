@@ -0,0 +1,106 @@
+"""
+Background warm-up for the backend.
+
+Importing cognee, creating the LLM client and building the first graph
+snapshot all take seconds. The service used to pay for them before it
+could answer anything (the module-level `import cognee`) and again on the
+first /graph request. Now the app starts serving right away, and these
+steps run in a background task started by the lifespan:
+
+- GET /healthz answers as soon as the process is up (liveness)
+- GET /readyz returns 503 until the required steps have finished (readiness)
+
+Requests that arrive before warm-up finishes still work; they just pay for
+whatever hasn't been loaded yet. An optional step that fails (an empty
+graph, say) is reported but doesn't hold back readiness.
+
+Configuration (env):
+- WARMUP_ENABLED   "0" skips warm-up; /readyz is then ready at once (default: 1)
+- WARMUP_GRAPH     "0" skips building the graph snapshot and search index (default: 1)
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+ENABLED = os.getenv("WARMUP_ENABLED", "1") != "0"
+WARM_GRAPH = os.getenv("WARMUP_GRAPH", "1") != "0"
+
+
+@dataclass
+class Step:
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    required: bool = True
+    status: str = "pending"  # pending | running | ok | failed | skipped
+    elapsed_sec: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "required": self.required,
+            "elapsed_sec": self.elapsed_sec,
+            "error": self.error,
+        }
+
+
+@dataclass
+class WarmUp:
+    steps: List[Step] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    _task: Optional[asyncio.Task] = None
+
+    def add(self, name: str, run: Callable[[], Awaitable[Any]], required: bool = True) -> None:
+        self.steps.append(Step(name, run, required))
+
+    def start(self) -> None:
+        if not ENABLED:
+            for step in self.steps:
+                step.status = "skipped"
+            self.finished_at = time.time()
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        t_all = time.perf_counter()
+        for step in self.steps:
+            step.status = "running"
+            t0 = time.perf_counter()
+            try:
+                await step.run()
+                step.status = "ok"
+            except asyncio.CancelledError:
+                step.status = "failed"
+                step.error = "cancelled"
+                raise
+            except Exception as e:
+                step.status = "failed"
+                step.error = str(e) or e.__class__.__name__
+                print(f"Warm-up: {step.name} failed: {step.error}")
+            finally:
+                step.elapsed_sec = round(time.perf_counter() - t0, 3)
+        self.finished_at = time.time()
+        print(f"Warm-up: done in {time.perf_counter() - t_all:.2f}s "
+              + ", ".join(f"{s.name}={s.status} {s.elapsed_sec}s" for s in self.steps))
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None and all(
+            s.status in ("ok", "skipped") for s in self.steps if s.required
+        )
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "uptime_sec": round(time.time() - self.started_at, 3),
+            "warmup_sec": round(self.finished_at - self.started_at, 3) if self.finished_at else None,
+            "steps": {s.name: s.to_dict() for s in self.steps},
+        }
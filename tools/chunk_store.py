@@ -0,0 +1,147 @@
+"""
+Chunk-level extraction store for the LangExtract service.
+
+Resumes, cover letters and portfolio pages repeat whole paragraphs, so most
+chunks of a new document were often extracted before as part of another
+one. The result cache (tools/extract_cache.py) only helps when the whole
+document matches; this store remembers each chunk's extractions under
+
+    sha256(normalized chunk text, model_id, extraction_passes, max_char_buffer, prompt version)
+
+where normalizing collapses whitespace runs and trims the ends, so the same
+paragraph re-indented or spaced differently is still a hit. With
+content-defined chunk boundaries (chunking.content_chunks) shared text
+yields the same chunks in every document, and LLM calls scale with the
+novel text.
+
+Spans are stored in normalized-text coordinates. On a hit they are mapped
+through the new chunk's own whitespace layout, so they point at the same
+words in the new text even where spacing differs; the caller then shifts
+them to document offsets as for a fresh extraction.
+
+Values live in a second SQLite file with the same LRU bound and format as
+the result cache (it is an ExtractCache underneath).
+
+Configuration (env):
+- LANGEXTRACT_CHUNK_STORE_ENABLED  "0" disables the store (default: 1)
+- LANGEXTRACT_CHUNK_STORE_PATH     SQLite file (default: tools/.cache/chunk_store.sqlite3)
+- LANGEXTRACT_CHUNK_STORE_MAX_MB   size bound of the stored values (default: 256)
+"""
+import os
+import re
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Optional
+
+from tools.extract_cache import ExtractCache, cache_key, content_hash
+
+_TOKEN = re.compile(r"\S+")
+_START_KEYS = ("start_pos", "start")
+_END_KEYS = ("end_pos", "end")
+
+
+class _Layout:
+    """Where each whitespace-separated token of a text sits, raw and normalized."""
+
+    def __init__(self, text: str):
+        spans = [(m.start(), m.end()) for m in _TOKEN.finditer(text)]
+        self.raw_starts = [s for s, _ in spans]
+        self.lengths = [e - s for s, e in spans]
+        self.norm_starts: List[int] = []
+        pos = 0
+        for length in self.lengths:
+            self.norm_starts.append(pos)
+            pos += length + 1
+        self.normalized = " ".join(text[s:e] for s, e in spans)
+
+    def _map(self, pos: int, end: bool, src: List[int], dst: List[int]) -> int:
+        if not src:
+            return 0
+        # An end offset belongs to the token it closes, a start to the token it opens
+        i = max(0, bisect_right(src, pos - 1 if end else pos) - 1)
+        offset = pos - src[i]
+        if offset > self.lengths[i]:
+            # In the whitespace after token i: starts move to the next token, ends stay at this one
+            if not end and i + 1 < len(src):
+                return dst[i + 1]
+            offset = self.lengths[i]
+        return dst[i] + max(0, offset)
+
+    def to_normalized(self, pos: int, end: bool = False) -> int:
+        return self._map(pos, end, self.raw_starts, self.norm_starts)
+
+    def to_raw(self, pos: int, end: bool = False) -> int:
+        return self._map(pos, end, self.norm_starts, self.raw_starts)
+
+
+def _map_interval(interval: Any, fn: Callable[[int, bool], int]) -> Any:
+    if not isinstance(interval, dict):
+        return interval
+    mapped = dict(interval)
+    for keys, end in ((_START_KEYS, False), (_END_KEYS, True)):
+        for key in keys:
+            if isinstance(mapped.get(key), int):
+                mapped[key] = fn(mapped[key], end)
+    return mapped
+
+
+def remap_extractions(extractions: List[Dict[str, Any]], fn: Callable[[int, bool], int]) -> List[Dict[str, Any]]:
+    """Copies of the extractions with char_interval/spans offsets passed through fn(pos, is_end)."""
+    out = []
+    for ex in extractions:
+        if not isinstance(ex, dict):
+            continue
+        ex = dict(ex)
+        if "char_interval" in ex:
+            ex["char_interval"] = _map_interval(ex["char_interval"], fn)
+        if isinstance(ex.get("spans"), list):
+            ex["spans"] = [_map_interval(s, fn) for s in ex["spans"]]
+        out.append(ex)
+    return out
+
+
+class ChunkStore:
+    def __init__(self, cache: ExtractCache):
+        self.cache = cache
+
+    @classmethod
+    def from_env(cls) -> "ChunkStore":
+        default_path = os.path.join(os.path.dirname(__file__), ".cache", "chunk_store.sqlite3")
+        return cls(ExtractCache(
+            path=os.getenv("LANGEXTRACT_CHUNK_STORE_PATH", default_path) or None,
+            max_bytes=int(float(os.getenv("LANGEXTRACT_CHUNK_STORE_MAX_MB", "256")) * (1 << 20)),
+            enabled=os.getenv("LANGEXTRACT_CHUNK_STORE_ENABLED", "1") != "0",
+        ))
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache.enabled
+
+    @staticmethod
+    def key(normalized: str, settings: Dict[str, Any], prompt_version: str) -> str:
+        return cache_key(content_hash(normalized), settings["model_id"], settings["passes"],
+                         settings["max_char_buffer"], prompt_version)
+
+    def get(self, text: str, settings: Dict[str, Any], prompt_version: str) -> Optional[List[Dict[str, Any]]]:
+        """Stored extractions for a chunk, with spans relative to this text; None on a miss."""
+        if not self.enabled:
+            return None
+        layout = _Layout(text)
+        entry = self.cache.get(self.key(layout.normalized, settings, prompt_version))
+        if entry is None:
+            return None
+        return remap_extractions(entry["raw"].get("extractions", []), layout.to_raw)
+
+    def put(self, text: str, settings: Dict[str, Any], prompt_version: str,
+            extractions: List[Dict[str, Any]], elapsed_sec: float) -> None:
+        """Store a chunk's extractions (spans relative to text)."""
+        if not self.enabled:
+            return
+        layout = _Layout(text)
+        normalized = remap_extractions(extractions, layout.to_normalized)
+        self.cache.put(self.key(layout.normalized, settings, prompt_version), {"extractions": normalized}, elapsed_sec)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
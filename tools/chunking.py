@@ -0,0 +1,135 @@
+"""
+Split documents into extraction chunks that keep their character offsets.
+
+Long documents are extracted chunk by chunk so jobs can report progress and
+partial results, and so one failed LLM call doesn't lose the whole run.
+content_chunks() places boundaries by content rather than by position, so
+text shared between documents is chunked the same way in each. A line too
+long for one chunk is cut at a sentence end, else at whitespace; mid-word
+only when there is nothing else.
+
+Every chunk records its [start, end) offsets in the source text, and
+shift_extractions() moves LangExtract's chunk-relative spans back into
+document coordinates, so spans from a chunked run point at the same text
+as spans from a single lx.extract over the whole document.
+"""
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List
+
+# Tried in order when looking for a place to cut
+_BREAKS = [re.compile(r"\n\s*\n"), re.compile(r"\n"), re.compile(r"[.!?]\s"), re.compile(r"\s")]
+# content_chunks: about one non-blank line in this many can end a chunk
+ANCHOR_EVERY = 3
+
+
+@dataclass(frozen=True)
+class Chunk:
+    index: int
+    start: int
+    end: int
+    text: str
+
+
+def _cut(text: str, start: int, limit: int) -> int:
+    """End offset for a chunk starting at start: the last good break within limit chars."""
+    if len(text) - start <= limit:
+        return len(text)
+    window = text[start:start + limit]
+    for pattern in _BREAKS:
+        last = None
+        for last in pattern.finditer(window):
+            pass
+        # Don't accept a break in the first half: tiny chunks cost a full prompt each
+        if last is not None and last.end() > limit // 2:
+            return start + last.end()
+    return start + limit
+
+
+def _squeezed(line: str) -> str:
+    return " ".join(line.split())
+
+
+def _anchor(line: str) -> bool:
+    """Blank lines, and about one line in ANCHOR_EVERY chosen by content, may end a chunk."""
+    return not line or zlib.crc32(line.encode("utf-8", "replace")) % ANCHOR_EVERY == 0
+
+
+def content_chunks(text: str, max_chars: int = 4000) -> List[Chunk]:
+    """
+    Chunks whose boundaries depend on the lines around them, not on where the
+    document starts. Packing greedily from offset 0, one extra line at the
+    top would move every later boundary; here a chunk ends after an anchor
+    line once it has 3/4 of max_chars, so two documents sharing a run of
+    lines soon fall back into step and produce the same chunks from there on
+    (which the chunk store in tools/chunk_store.py can then reuse). Anchors
+    and sizes are judged on whitespace-squeezed lines, so re-indented copies
+    step the same way; re-wrapped ones don't, as their lines differ. A chunk
+    is closed before a line that would take it past max_chars, and a line
+    longer than that is cut at the best break (_cut).
+
+    Each chunk is one LLM call with the full prompt and examples, so the
+    minimum is a cost/reuse tradeoff. Measured on synthetic resumes (12k
+    chars, max_chars=1000, a copy with two new lines on top): 3/4 gives
+    chunks of 0.83 max_chars on average, 1.2x the calls of full-size
+    chunks, with 76% of the copy's chunks reused; 1/4 gave 0.46 (2.1x the
+    calls) and 95% reused.
+    """
+    max_chars = max(1, max_chars)
+    min_chars = max_chars * 3 // 4
+    bounds: List[int] = []
+    start = 0
+    pos = 0
+    size = 0  # squeezed length of the current chunk
+    while pos < len(text):
+        newline = text.find("\n", pos)
+        line_end = len(text) if newline < 0 else newline + 1
+        if line_end - start > max_chars:
+            if pos > start:
+                bounds.append(pos)  # close before the line that doesn't fit
+                start = pos
+            while line_end - start > max_chars:
+                start = _cut(text, start, max_chars)
+                bounds.append(start)
+            size = 0
+        line = _squeezed(text[max(start, pos):line_end])
+        size += len(line) + 1
+        if size >= min_chars and _anchor(line):
+            bounds.append(line_end)
+            start = line_end
+            size = 0
+        pos = line_end
+
+    chunks: List[Chunk] = []
+    start = 0
+    for end in bounds + [len(text)]:
+        if end > start and text[start:end].strip():
+            chunks.append(Chunk(len(chunks), start, end, text[start:end]))
+        start = max(start, end)
+    return chunks
+
+
+def _shift_interval(interval: Any, offset: int) -> Any:
+    if isinstance(interval, dict):
+        shifted = dict(interval)
+        for key in ("start_pos", "end_pos", "start", "end"):
+            if isinstance(shifted.get(key), int):
+                shifted[key] += offset
+        return shifted
+    return interval
+
+
+def shift_extractions(extractions: Iterable[Dict[str, Any]], offset: int) -> List[Dict[str, Any]]:
+    """Copies of the extractions with char_interval/spans moved by offset."""
+    shifted = []
+    for ex in extractions:
+        if not isinstance(ex, dict):
+            continue
+        ex = dict(ex)
+        if "char_interval" in ex:
+            ex["char_interval"] = _shift_interval(ex["char_interval"], offset)
+        if isinstance(ex.get("spans"), list):
+            ex["spans"] = [_shift_interval(s, offset) for s in ex["spans"]]
+        shifted.append(ex)
+    return shifted
@@ -0,0 +1,166 @@
+"""
+Persistent result cache for the LangExtract service.
+
+A multi-pass lx.extract over a resume takes tens of seconds and several LLM
+calls, and the admin tools re-submit the same documents all the time. Results
+are stored in SQLite under a content address:
+
+    sha256(content hash, model_id, extraction_passes, max_char_buffer, prompt version[, chunk size])
+
+(the chunk size is part of the key for whole-document results, since the
+service's chunking changes what is extracted), so the same text (or the same downloaded URL content) with the same settings
+and the same PROMPT/EXAMPLES is a hit, and editing the prompt invalidates
+everything at once. Values are the raw LangExtract result as zlib-compressed
+JSON; the graph mapping is cheap and re-run on every hit.
+
+The file is bounded by LANGEXTRACT_CACHE_MAX_MB: least recently used entries
+are evicted past it. Several workers can share the file (WAL mode).
+
+Configuration (env):
+- LANGEXTRACT_CACHE_ENABLED  "0" disables the cache (default: 1)
+- LANGEXTRACT_CACHE_PATH     SQLite file (default: tools/.cache/extract_cache.sqlite3)
+- LANGEXTRACT_CACHE_MAX_MB   size bound of the stored values (default: 256)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()
+
+
+def cache_key(content_sha256: str, model_id: str, passes: int, max_char_buffer: int, prompt_version: str,
+              chunk_chars: Optional[int] = None) -> str:
+    parts = [content_sha256, model_id, str(passes), str(max_char_buffer), prompt_version]
+    if chunk_chars is not None:
+        parts.append(str(chunk_chars))
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+class ExtractCache:
+    def __init__(self, path: Optional[str], max_bytes: int = 256 << 20, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled and bool(path)
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()  # the sync endpoint runs in FastAPI's threadpool
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ExtractCache":
+        default_path = os.path.join(os.path.dirname(__file__), ".cache", "extract_cache.sqlite3")
+        return cls(
+            path=os.getenv("LANGEXTRACT_CACHE_PATH", default_path) or None,
+            max_bytes=int(float(os.getenv("LANGEXTRACT_CACHE_MAX_MB", "256")) * (1 << 20)),
+            enabled=os.getenv("LANGEXTRACT_CACHE_ENABLED", "1") != "0",
+        )
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.enabled:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                    " created_at REAL NOT NULL, accessed_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+                db.commit()
+                self._bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+                self._db = db
+            except sqlite3.Error as e:
+                print(f"Extract cache: unavailable ({e}), running uncached")
+                self.enabled = False
+        return self._db
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached entry ({"raw", "elapsed_sec", "created_at"}) or None."""
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return None
+            try:
+                row = db.execute("SELECT value, created_at FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                db.execute("UPDATE results SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+                db.commit()
+                entry = json.loads(zlib.decompress(row[0]))
+            except (sqlite3.Error, zlib.error, ValueError) as e:
+                print(f"Extract cache: read failed: {e}")
+                self.misses += 1
+                return None
+            self.hits += 1
+            return {**entry, "created_at": row[1]}
+
+    def put(self, key: str, raw: Dict[str, Any], elapsed_sec: float) -> None:
+        value = zlib.compress(json.dumps({"raw": raw, "elapsed_sec": elapsed_sec}, default=str).encode("utf-8"))
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return
+            now = time.time()
+            try:
+                old = db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now),
+                )
+                self._bytes += len(value) - (old[0] if old else 0)
+                if self._bytes > self.max_bytes:
+                    self._evict(db)
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"Extract cache: write failed: {e}")
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        # Other workers write to the same file; start from the real total
+        self._bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        rows = db.execute("SELECT key, size FROM results ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if self._bytes <= self.max_bytes:
+                break
+            db.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._bytes -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            db = self._conn()
+            if db is not None:
+                db.execute("DELETE FROM results")
+                db.commit()
+                self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            db = self._conn()
+            entries = db.execute("SELECT COUNT(*) FROM results").fetchone()[0] if db is not None else 0
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,223 @@
+"""
+The LangExtract service's one executor for LLM work.
+
+Every extraction call in the service (/extract, stream, job and batch
+chunks) runs here, so LANGEXTRACT_LLM_CONCURRENCY is the limit on LLM calls
+in flight for the whole process, whatever each request asks for. Before,
+/extract ran lx.extract on Starlette's threadpool with the request's own
+max_workers fan-out: ten requests at max_workers=6 meant sixty calls.
+
+- Fairness: queued calls are grouped by owner (one per request or job) and
+  slots are handed out round-robin across owners, so a 50-chunk batch
+  doesn't starve a one-chunk /extract queued behind it. An owner can also
+  be capped below the global limit (a request's max_workers).
+- Backpressure: past LANGEXTRACT_LLM_QUEUE queued calls, submit() raises
+  QueueFull (the endpoints answer 503) instead of queueing without bound.
+  A request's calls are admitted all or nothing. A call cancelled while
+  queued leaves the queue at once, so it doesn't hold room until a worker
+  would have reached it.
+- Observability: queue depth, running calls and queue wait times, for
+  GET /metrics.
+
+Configuration (env):
+- LANGEXTRACT_LLM_CONCURRENCY  LLM calls in flight (default: LANGEXTRACT_CHUNK_WORKERS or 8)
+- LANGEXTRACT_LLM_QUEUE        calls waiting for a slot before requests are rejected (default: 256)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import partial
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from tools.extract_jobs import QueueFull
+
+Call = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+
+class _Owner:
+    __slots__ = ("queue", "running", "limit")
+
+    def __init__(self, limit: Optional[int]):
+        self.queue: Deque[Tuple[Future, Callable[..., Any], Tuple[Any, ...], float]] = deque()
+        self.running = 0
+        self.limit = limit
+
+    @property
+    def runnable(self) -> bool:
+        return bool(self.queue) and (self.limit is None or self.running < self.limit)
+
+
+class ExtractExecutor:
+    def __init__(self, slots: int = 8, max_queue: int = 256,
+                 on_wait: Optional[Callable[[float], None]] = None):
+        self.slots = max(1, slots)
+        self.max_queue = max(1, max_queue)
+        self.on_wait = on_wait  # called with each call's queue wait (seconds), under the lock
+        self._owners: "OrderedDict[str, _Owner]" = OrderedDict()
+        self._queued = 0
+        self._running = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self._workers = [
+            threading.Thread(target=self._work, name=f"extract-llm-{i}", daemon=True) for i in range(self.slots)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @classmethod
+    def from_env(cls, on_wait: Optional[Callable[[float], None]] = None) -> "ExtractExecutor":
+        return cls(
+            slots=int(os.getenv("LANGEXTRACT_LLM_CONCURRENCY", os.getenv("LANGEXTRACT_CHUNK_WORKERS", "8"))),
+            max_queue=int(os.getenv("LANGEXTRACT_LLM_QUEUE", "256")),
+            on_wait=on_wait,
+        )
+
+    def submit(self, owner: str, fn: Callable[..., Any], *args: Any, limit: Optional[int] = None) -> Future:
+        return self.submit_many(owner, [(fn, args)], limit=limit)[0]
+
+    def submit_many(self, owner: str, calls: Sequence[Call], limit: Optional[int] = None,
+                    block: bool = False) -> List[Future]:
+        """
+        Queue calls for owner; returns one Future per call. Raises QueueFull
+        if they don't all fit, or with block=True waits for room instead
+        (for background jobs, which have their own queue limit).
+        """
+        futures: List[Future] = []
+        with self._cond:
+            # A request larger than the whole queue still gets in once the queue is empty
+            while self._queued and self._queued + len(calls) > self.max_queue:
+                if not block:
+                    self.rejected += len(calls)
+                    raise QueueFull(f"{self._queued} LLM calls already queued")
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("executor is shut down")
+            state = self._owners.get(owner)
+            if state is None:
+                state = self._owners[owner] = _Owner(max(1, limit) if limit else None)
+            now = time.perf_counter()
+            for fn, args in calls:
+                future: Future = Future()
+                state.queue.append((future, fn, args, now))
+                future.add_done_callback(partial(self._drop_cancelled, owner))
+                futures.append(future)
+            self._queued += len(calls)
+            self.submitted += len(calls)
+            self._cond.notify_all()
+        return futures
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            owners = list(self._owners.values())
+            self._owners.clear()
+            self._queued = 0
+            for state in owners:
+                for future, _, _, _ in state.queue:
+                    future.cancel()
+            self._cond.notify_all()
+
+    def _drop_cancelled(self, owner: str, future: Future) -> None:
+        # Done callback of every queued future; only cancellation while still queued matters here
+        if not future.cancelled():
+            return
+        with self._cond:
+            state = self._owners.get(owner)
+            if state is None:
+                return
+            for entry in state.queue:
+                if entry[0] is future:
+                    state.queue.remove(entry)
+                    break
+            else:
+                return  # already popped by a worker, which counts it
+            self._queued -= 1
+            self.cancelled += 1
+            self._release(owner, state, ran=False)
+
+    # --------- workers ---------
+    def _next(self) -> Optional[Tuple[str, _Owner, Future, Callable[..., Any], Tuple[Any, ...]]]:
+        # Caller holds the lock. Round-robin: the owner served goes to the back of the line
+        while True:
+            for owner, state in self._owners.items():
+                if state.runnable:
+                    break
+            else:
+                return None
+            future, fn, args, queued_at = state.queue.popleft()
+            self._queued -= 1
+            self._owners.move_to_end(owner)
+            self._cond.notify_all()  # room in the queue for blocked submitters
+            if not future.set_running_or_notify_cancel():
+                self.cancelled += 1
+                self._release(owner, state, ran=False)
+                continue
+            wait = time.perf_counter() - queued_at
+            self.wait_sum += wait
+            self.wait_max = max(self.wait_max, wait)
+            if self.on_wait is not None:
+                self.on_wait(wait)
+            state.running += 1
+            self._running += 1
+            return owner, state, future, fn, args
+
+    def _release(self, owner: str, state: _Owner, ran: bool = True) -> None:
+        # Caller holds the lock
+        if ran:
+            state.running -= 1
+            self._running -= 1
+        if not state.queue and not state.running and self._owners.get(owner) is state:
+            del self._owners[owner]
+        self._cond.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                task = self._next()
+                while task is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    task = self._next()
+            owner, state, future, fn, args = task
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+                ok = False
+            else:
+                future.set_result(result)
+                ok = True
+            with self._cond:
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._release(owner, state)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            started = self.completed + self.failed + self._running
+            return {
+                "slots": self.slots,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._queued,
+                "owners": len(self._owners),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "wait_avg_sec": round(self.wait_sum / started, 4) if started else 0.0,
+                "wait_max_sec": round(self.wait_max, 4),
+            }
@@ -0,0 +1,191 @@
+"""
+Background extraction jobs for the LangExtract service.
+
+POST /extract/jobs queues an extraction and returns at once; GET
+/extract/jobs/{id} reports status, chunk progress and the extractions found
+so far. Jobs run on a bounded thread pool (lx.extract is blocking), so
+long documents no longer hold an HTTP connection open behind the proxy.
+
+- Deduplication: a job whose cache key (content, model, passes, buffer,
+  prompt) and cache bypass match a queued or running job returns that job
+  instead; a no_cache submit never gets a job that may answer from cache.
+- Backpressure: past LANGEXTRACT_JOBS_QUEUE waiting jobs, submit() raises
+  QueueFull and the endpoint answers 503.
+- Retention: finished jobs are kept for polling up to LANGEXTRACT_JOBS_RETAIN
+  jobs and LANGEXTRACT_JOBS_TTL seconds, whichever is hit first.
+
+Configuration (env):
+- LANGEXTRACT_JOBS_WORKERS  jobs running at once (default: 2)
+- LANGEXTRACT_JOBS_QUEUE    jobs waiting for a worker before submits are rejected (default: 32)
+- LANGEXTRACT_JOBS_RETAIN   finished jobs kept (default: 50)
+- LANGEXTRACT_JOBS_TTL      seconds a finished job is kept (default: 3600)
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ACTIVE = ("queued", "running")
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass
+class ExtractJob:
+    id: str
+    key: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    text: str = field(default="", repr=False)
+    status: str = "queued"  # queued | running | succeeded | failed
+    chunks_total: int = 0
+    chunks_done: int = 0
+    chunks_reused: int = 0
+    chunk_errors: List[Dict[str, Any]] = field(default_factory=list)
+    extractions: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    cache: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def progress(self) -> float:
+        if self.status == "succeeded":
+            return 1.0
+        return round(self.chunks_done / self.chunks_total, 3) if self.chunks_total else 0.0
+
+    def add_chunk(self, extractions: List[Dict[str, Any]]) -> None:
+        """Called by the runner as each chunk finishes (from the worker thread)."""
+        self.extractions.extend(extractions)
+        self.chunks_done += 1
+
+    def fail_chunk(self, index: int, error: str) -> None:
+        self.chunk_errors.append({"chunk": index, "error": error})
+        self.chunks_done += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "chunks_total": self.chunks_total,
+            "chunks_done": self.chunks_done,
+            "chunks_reused": self.chunks_reused,
+            "chunk_errors": list(self.chunk_errors),
+            "cache": self.cache,
+            "options": self.options,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_sec": round(end - self.started_at, 3) if self.started_at else None,
+            "error": self.error,
+        }
+
+
+RunFn = Callable[[ExtractJob], Dict[str, Any]]
+
+
+class ExtractJobManager:
+    def __init__(self, run: RunFn, workers: int = 2, max_queue: int = 32,
+                 retain: int = 50, ttl: float = 3600.0):
+        self._run_fn = run
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.retain = max(1, retain)
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, ExtractJob]" = OrderedDict()
+        self._active: Dict[Tuple[str, bool], ExtractJob] = {}  # (cache key, no_cache) -> queued/running job
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="extract-job")
+        self.deduplicated = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls, run: RunFn) -> "ExtractJobManager":
+        return cls(
+            run,
+            workers=int(os.getenv("LANGEXTRACT_JOBS_WORKERS", "2")),
+            max_queue=int(os.getenv("LANGEXTRACT_JOBS_QUEUE", "32")),
+            retain=int(os.getenv("LANGEXTRACT_JOBS_RETAIN", "50")),
+            ttl=float(os.getenv("LANGEXTRACT_JOBS_TTL", "3600")),
+        )
+
+    def submit(self, key: str, text: str, options: Dict[str, Any]) -> Tuple[ExtractJob, bool]:
+        """Queue a job, or return the in-flight one with the same key and no_cache. Returns (job, created)."""
+        active_key = (key, bool(options.get("no_cache")))
+        with self._lock:
+            current = self._active.get(active_key)
+            if current is not None:
+                self.deduplicated += 1
+                return current, False
+            waiting = sum(1 for j in self._active.values() if j.status == "queued")
+            if waiting >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f"{waiting} extraction jobs already waiting")
+            job = ExtractJob(id=uuid.uuid4().hex[:12], key=key, options=options, text=text)
+            self._jobs[job.id] = job
+            self._active[active_key] = job
+            self._trim()
+        self._pool.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[ExtractJob]:
+        with self._lock:
+            self._trim()
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[ExtractJob]:
+        with self._lock:
+            self._trim()
+            return list(reversed(self._jobs.values()))
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses: Dict[str, int] = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "jobs": statuses,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected,
+        }
+
+    def _run(self, job: ExtractJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = self._run_fn(job)
+            job.status = "succeeded"
+        except Exception as e:
+            print(f"Extract job {job.id} failed: {e}")
+            job.error = str(e) or e.__class__.__name__
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            job.text = ""  # the result has what clients need; don't retain the document twice
+            with self._lock:
+                active_key = (job.key, bool(job.options.get("no_cache")))
+                if self._active.get(active_key) is job:
+                    del self._active[active_key]
+
+    def _trim(self) -> None:
+        # Caller holds the lock
+        now = time.time()
+        finished = [j for j in self._jobs.values() if j.status not in ACTIVE]
+        excess = max(0, len(finished) - self.retain)
+        for i, job in enumerate(finished):
+            if i < excess or now - (job.finished_at or now) > self.ttl:
+                self._jobs.pop(job.id, None)
@@ -0,0 +1,196 @@
+"""
+Map LangExtract extractions to graph nodes and edges.
+
+Shared by the LangExtract service and the admin POC. One pass over the
+extractions, O(extractions) overall:
+
+- Entity extractions become nodes, keyed by their `id` attribute or a slug
+  of their text; a repeated id merges attributes into the first node.
+- Relation extractions name their ends by id (sourceId/targetId) or by text
+  (source_text/target_text). Text is looked up in a hash index of
+  normalized labels (casefolded, whitespace collapsed) instead of scanning
+  the node list.
+- Forward references: a relation whose end hasn't appeared yet is held back
+  and emitted as soon as a node with that id or label arrives. Ends that
+  never appear fall back to the slug of their text when finish() is called,
+  so those edges still point where a later merge would put the node.
+
+GraphBuilder is incremental: add() returns what each call changed, which
+is what /extract/stream sends per chunk.
+"""
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+NODE_CLASSES = frozenset({"Person", "Education", "Experience", "Project", "Skill", "Group", "Status"})
+RELATION_CLASSES = frozenset({"Relation", "Edge"})
+EDGE_META_KEYS = frozenset({"relation", "sourceId", "targetId", "source_text", "target_text"})
+
+_SLUG = str.maketrans({" ": "_", "/": "-", "|": "-"})
+_SPACES = re.compile(r"\s+")
+
+
+def iter_extractions(raw: Dict[str, Any]) -> Iterator[Any]:
+    """Extractions from raw["extractions"] or raw["annotations"|"items"][i]["extractions"]."""
+    if isinstance(raw.get("extractions"), list):
+        yield from raw["extractions"]
+    for item in raw.get("annotations") or raw.get("items") or []:
+        if isinstance(item, dict):
+            yield from item.get("extractions", [])
+
+
+def slug(s: str) -> str:
+    return s.lower().strip().translate(_SLUG)[:80] or "node"
+
+
+def normalize_label(s: str) -> str:
+    return _SPACES.sub(" ", s.casefold()).strip()
+
+
+class _PendingEdge:
+    __slots__ = ("relation", "ends", "texts", "spans", "data")
+
+    def __init__(self, relation: str, ends: List[Optional[str]], texts: List[str], spans: list, data: dict):
+        self.relation = relation
+        self.ends = ends      # [source id, target id]; None while unresolved
+        self.texts = texts    # the text each end was named by
+        self.spans = spans
+        self.data = data
+
+
+class GraphBuilder:
+    def __init__(self, spans: bool = True):
+        self.spans = spans  # the service's fuller output: sourceSpans on nodes and edges, edge data
+        self.nodes: List[Dict[str, Any]] = []
+        self.edges: List[Dict[str, Any]] = []
+        self.node_index: Dict[str, Dict[str, Any]] = {}
+        self.label_index: Dict[str, str] = {}  # normalized label or id -> node id
+        self.edge_ids: set = set()
+        self._pending: Dict[str, List[_PendingEdge]] = {}  # normalized text -> edges waiting for it
+        self._delta: Dict[str, Any] = {}
+
+    # --------- public ---------
+    def add(self, extractions: Iterable[Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Map more extractions; returns {"nodes": new, "updated_nodes": merged into, "edges": new}."""
+        self._start_delta()
+        for ex in extractions:
+            if not isinstance(ex, dict):
+                continue
+            clazz = str(ex.get("extraction_class") or ex.get("class") or "").strip()
+            if clazz in NODE_CLASSES:
+                self._add_node(clazz, ex)
+            elif clazz in RELATION_CLASSES:
+                self._add_relation(ex)
+        return self._end_delta()
+
+    def finish(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Emit edges still waiting for an end, pointing at the slug of its text."""
+        self._start_delta()
+        seen = set()
+        for waiting in self._pending.values():
+            for edge in waiting:
+                if id(edge) in seen:
+                    continue
+                seen.add(id(edge))
+                ends = [e if e is not None else slug(t) for e, t in zip(edge.ends, edge.texts)]
+                self._emit(edge, ends)
+        self._pending.clear()
+        return self._end_delta()
+
+    def graph(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {"nodes": self.nodes, "edges": self.edges}
+
+    # --------- internals ---------
+    def _start_delta(self) -> None:
+        self._delta = {"nodes": [], "updated": {}, "new_ids": set(), "edges": []}
+
+    def _end_delta(self) -> Dict[str, List[Dict[str, Any]]]:
+        d = self._delta
+        return {"nodes": d["nodes"], "updated_nodes": list(d["updated"].values()), "edges": d["edges"]}
+
+    def _add_node(self, ntype: str, ex: Dict[str, Any]) -> None:
+        text = str(ex.get("extraction_text") or ex.get("text") or "").strip()
+        attrs = ex.get("attributes") if isinstance(ex.get("attributes"), dict) else {}
+        label = text or attrs.get("name") or attrs.get("full_name") or ntype
+        node_id = str(attrs.get("id") or slug(label) or slug(ntype + "_" + label))
+
+        node = self.node_index.get(node_id)
+        if node is not None:
+            node.update(attrs)
+            if attrs and node_id not in self._delta["new_ids"]:
+                self._delta["updated"][node_id] = node
+            return
+
+        node = {"id": node_id, "label": label or node_id, "type": ntype}
+        if self.spans:
+            node["sourceSpans"] = ex.get("spans") if isinstance(ex.get("spans"), list) else []
+        node.update(attrs)
+        self.node_index[node_id] = node
+        self.nodes.append(node)
+        self._delta["nodes"].append(node)
+        self._delta["new_ids"].add(node_id)
+
+        for key in {node_id, normalize_label(node_id), normalize_label(str(label))}:
+            self.label_index.setdefault(key, node_id)
+            for edge in self._pending.pop(key, ()):
+                self._resolve_end(edge, key, node_id)
+
+    def _lookup(self, ref: str) -> Optional[str]:
+        if ref in self.node_index:
+            return ref
+        return self.label_index.get(normalize_label(ref))
+
+    def _add_relation(self, ex: Dict[str, Any]) -> None:
+        attrs = ex.get("attributes") if isinstance(ex.get("attributes"), dict) else {}
+        relation = str(attrs.get("relation") or "").strip() or "related_to"
+        ends: List[Optional[str]] = []
+        texts: List[str] = []
+        for id_key, text_key in (("sourceId", "source_text"), ("targetId", "target_text")):
+            explicit = attrs.get(id_key)
+            ref = str(attrs.get(text_key) or "").strip()
+            if explicit:
+                ends.append(str(explicit).strip())
+            elif ref:
+                ends.append(self._lookup(ref))
+            else:
+                return  # an end with neither id nor text: not an edge
+            texts.append(ref)
+
+        edge = _PendingEdge(
+            relation, ends, texts,
+            ex.get("spans") if isinstance(ex.get("spans"), list) else [],
+            {k: v for k, v in attrs.items() if k not in EDGE_META_KEYS},
+        )
+        if None in ends:
+            for end, text in zip(ends, texts):
+                if end is None:
+                    self._pending.setdefault(normalize_label(text), []).append(edge)
+            return
+        self._emit(edge, ends)
+
+    def _resolve_end(self, edge: _PendingEdge, key: str, node_id: str) -> None:
+        for i, (end, text) in enumerate(zip(edge.ends, edge.texts)):
+            if end is None and normalize_label(text) == key:
+                edge.ends[i] = node_id
+        if None not in edge.ends:
+            self._emit(edge, edge.ends)
+
+    def _emit(self, edge: _PendingEdge, ends: List[str]) -> None:
+        src, tgt = ends
+        edge_id = f"{src}-{edge.relation}-{tgt}"
+        if not src or not tgt or src == tgt or edge_id in self.edge_ids:
+            return
+        out = {"id": edge_id, "source": src, "target": tgt, "relation": edge.relation}
+        if self.spans:
+            out["sourceSpans"] = edge.spans
+            out["data"] = edge.data
+        self.edge_ids.add(edge_id)
+        self.edges.append(out)
+        self._delta["edges"].append(out)
+
+
+def map_extractions(raw: Dict[str, Any], spans: bool = True) -> Dict[str, List[Dict[str, Any]]]:
+    """Map a whole LangExtract result (dict) to {"nodes": [...], "edges": [...]}."""
+    builder = GraphBuilder(spans=spans)
+    builder.add(iter_extractions(raw))
+    builder.finish()
+    return builder.graph()
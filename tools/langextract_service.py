@@ -1,6 +1,14 @@
 """
 LangExtract FastAPI microservice (Option A friendly):
 - POST /extract: run LangExtract on text or URL
+- POST /extract/jobs, GET /extract/jobs/{id}: the same as a background job,
+  extracted chunk by chunk with progress and partial results (tools/extract_jobs.py)
+- POST /extract/stream: NDJSON events as each chunk finishes (new nodes and
+  edges, deduplicated across the stream, plus progress)
+- POST /extract/batch: many documents in one call, returning per-document
+  graphs and optionally one merged graph
+- GET /extract/visualization/{key}: HTML view of an /extract result, linked
+  from its visualization_url and rendered in memory (tools/visualize.py)
 - Returns: {
     raw: <AnnotatedDocument-ish dict>,
     nodes: [...],
@@ -12,23 +20,98 @@ LangExtract FastAPI microservice (Option A friendly):
 Notes:
 - Uses OpenAI by default (your OPENAI_API_KEY). You can change model_id to Gemini later.
 - Keeps code compact and defensive. Designed for local-only deployments.
+- Results are cached by content address (tools/extract_cache.py): the same
+  text or URL content with the same model, passes, buffer and prompt is
+  served from disk. Below that, each chunk's extractions are kept by
+  normalized chunk text (tools/chunk_store.py), so paragraphs shared between
+  documents are extracted once. Responses carry X-Cache: HIT | MISS | BYPASS; send
+  no_cache=true (or Cache-Control: no-cache) to force a fresh run, which
+  also refreshes the cached entry.
+- Every endpoint splits documents into chunks of one LangExtract buffer and
+  runs them on one executor (tools/extract_executor.py), which caps LLM calls
+  in flight for the whole service (LANGEXTRACT_LLM_CONCURRENCY), shares them
+  fairly between requests and answers 503 when its queue is full. A
+  request's max_workers caps its own share. GET /metrics has the queue
+  depth and wait times.
+- Extractions are batch work for the shared LLM admission controller
+  (backend/admission.py, configured with LLM_RPM / LLM_TPM): over budget they
+  get a fast 429/503 with Retry-After instead of hammering the provider.
 """
 from __future__ import annotations
+import contextlib
+import hashlib
+import json
 import os
 import time
-from typing import Any, Dict, List, Optional
+import urllib.request
+import uuid
+from concurrent.futures import Future, as_completed
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from fastapi import FastAPI, HTTPException, Request, status
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import HTMLResponse, StreamingResponse
 from pydantic import BaseModel
 
 # LangExtract imports (with OpenAI provider)
 import langextract as lx  # type: ignore
 
-app = FastAPI(title="LangExtract Service", version="0.1")
+from tools.chunk_store import ChunkStore
+from tools.chunking import Chunk, content_chunks, shift_extractions
+from tools.extract_cache import ExtractCache, cache_key, content_hash
+from tools.extract_executor import ExtractExecutor
+from tools.extract_jobs import ExtractJob, ExtractJobManager, QueueFull
+from tools.graph_mapper import GraphBuilder, iter_extractions, map_extractions
+from tools.visualize import RENDER_VERSION, VisualizationCache, render_html
+
+try:
+    from backend.admission import BATCH, AdmissionController, AdmissionRejected
+except ImportError:  # running without the backend package alongside
+    AdmissionController = None  # type: ignore
+
+try:
+    from backend import metrics
+except ImportError:
+    metrics = None  # type: ignore
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    jobs.shutdown()
+    executor.shutdown()
+
+
+app = FastAPI(title="LangExtract Service", version="0.1", lifespan=lifespan)
 
 # Optional bearer token for simple auth when exposed behind a proxy
 SERVICE_TOKEN = os.environ.get("LANGEXTRACT_SERVICE_TOKEN")
 
+admission = AdmissionController.from_env() if AdmissionController else None
+cache = ExtractCache.from_env()
+chunk_store = ChunkStore.from_env()
+visuals = VisualizationCache.from_env()
+
+BATCH_MAX_DOCUMENTS = int(os.environ.get("LANGEXTRACT_BATCH_MAX_DOCUMENTS", "50"))
+
+# The service's own registry (backend/metrics.py types); served by GET /metrics
+REGISTRY = metrics.Registry() if metrics else None
+if REGISTRY is not None:
+    LLM_WAIT = REGISTRY.register(metrics.Histogram(
+        "langextract_llm_queue_wait_seconds", "Time LLM calls waited for an executor slot"))
+    LLM_SLOTS = REGISTRY.register(metrics.Gauge("langextract_llm_slots", "LLM calls allowed in flight"))
+    LLM_RUNNING = REGISTRY.register(metrics.Gauge("langextract_llm_running", "LLM calls in flight"))
+    LLM_QUEUED = REGISTRY.register(metrics.Gauge("langextract_llm_queue_depth", "LLM calls waiting for a slot"))
+    LLM_OWNERS = REGISTRY.register(metrics.Gauge(
+        "langextract_llm_queue_owners", "Requests and jobs with LLM calls queued or running"))
+    LLM_CALLS = REGISTRY.register(metrics.Counter(
+        "langextract_llm_calls_total", "LLM calls by outcome (completed, failed, cancelled, rejected)", ("status",)))
+    CACHE_LOOKUPS = REGISTRY.register(metrics.Counter(
+        "langextract_cache_lookups_total", "Result cache lookups by outcome", ("result",)))
+    CHUNK_LOOKUPS = REGISTRY.register(metrics.Counter(
+        "langextract_chunk_store_lookups_total", "Chunk store lookups by outcome; hits are LLM calls saved", ("result",)))
+
+# Every LLM call in the service goes through it: the global concurrency limit
+executor = ExtractExecutor.from_env(on_wait=LLM_WAIT.observe if REGISTRY is not None else None)
+
 
 # --------- Pydantic models ---------
 class ExtractRequest(BaseModel):
@@ -39,6 +122,28 @@ class ExtractRequest(BaseModel):
     max_workers: Optional[int] = 6
     max_char_buffer: Optional[int] = 1200
     include_visualization: Optional[bool] = False
+    no_cache: Optional[bool] = False  # skip the cache lookup; the fresh result is still stored
+
+
+class ExtractJobRequest(ExtractRequest):
+    # Document chunk per lx.extract call (default: max_char_buffer); progress is per chunk
+    chunk_chars: Optional[int] = None
+
+
+class BatchDocument(BaseModel):
+    id: Optional[str] = None  # echoed back; defaults to the position in the batch
+    text: Optional[str] = None
+    url: Optional[str] = None
+
+
+class ExtractBatchRequest(BaseModel):
+    documents: List[BatchDocument]
+    model_id: Optional[str] = "gpt-4o-mini"
+    extraction_passes: Optional[int] = 2
+    max_char_buffer: Optional[int] = 1200
+    chunk_chars: Optional[int] = None
+    merge: Optional[bool] = True  # also return one graph merged across documents
+    no_cache: Optional[bool] = False
 
 
 class ExtractResponse(BaseModel):
@@ -48,6 +153,7 @@ class ExtractResponse(BaseModel):
     proposed_changes: List[Dict[str, Any]]
     meta: Dict[str, Any]
     visualization_html: Optional[str] = None
+    visualization_url: Optional[str] = None  # GET it for the same HTML, rendered on demand
 
 
 # --------- Prompt & examples (resume ontology) ---------
@@ -117,14 +223,11 @@ EXAMPLES = [
     )
 ]
 
-
-# --------- Utilities ---------
-def _slug(s: str) -> str:
-    return (
-        s.lower().strip().replace(" ", "_").replace("/", "-").replace("|", "-")
-    )[:80]
+# Part of every cache key: editing PROMPT or EXAMPLES invalidates cached results
+PROMPT_VERSION = hashlib.sha256((PROMPT + repr(EXAMPLES)).encode("utf-8")).hexdigest()[:16]
 
 
+# --------- Utilities ---------
 def _result_to_dict(doc: Any) -> Dict[str, Any]:
     """LangExtract returns an AnnotatedDocument-like object. Convert to dict defensively."""
     try:
@@ -138,89 +241,6 @@ def _result_to_dict(doc: Any) -> Dict[str, Any]:
             return {"raw": str(doc)}
 
 
-def _map_extractions_to_graph(raw: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
-    """
-    Map LangExtract extractions to nodes/edges.
-    Expects raw["extractions"] or raw["annotations"][i]["extractions"]. Skips invalids gracefully.
-    """
-    def iter_extractions():
-        # 1) direct top-level
-        if isinstance(raw.get("extractions"), list):
-            for ex in raw["extractions"]:
-                yield ex
-        # 2) nested under annotated_documents/items
-        ann = raw.get("annotations") or raw.get("items") or []
-        for item in ann or []:
-            for ex in item.get("extractions", []) if isinstance(item, dict) else []:
-                yield ex
-
-    nodes: List[Dict[str, Any]] = []
-    edges: List[Dict[str, Any]] = []
-    node_index: Dict[str, Dict[str, Any]] = {}
-
-    for ex in iter_extractions():
-        if not isinstance(ex, dict):
-            continue
-        clazz = str(ex.get("extraction_class") or ex.get("class") or "").strip()
-        text = str(ex.get("extraction_text") or ex.get("text") or "").strip()
-        attrs = ex.get("attributes") if isinstance(ex.get("attributes"), dict) else {}
-        spans = ex.get("spans") if isinstance(ex.get("spans"), list) else []
-
-        def add_node(ntype: str, label: str, extra: Dict[str, Any]):
-            node_id = str(extra.get("id") or _slug(label) or _slug(ntype + "_" + label))
-            if node_id in node_index:
-                node_index[node_id].update(extra)
-                return
-            node = {
-                "id": node_id,
-                "label": label or node_id,
-                "type": ntype,
-                "sourceSpans": spans,
-                **extra,
-            }
-            node_index[node_id] = node
-            nodes.append(node)
-
-        if clazz in {"Person", "Education", "Experience", "Project", "Skill", "Group", "Status"}:
-            add_node(clazz, text or attrs.get("name") or attrs.get("full_name") or clazz, attrs)
-            continue
-
-        if clazz in {"Relation", "Edge"}:
-            # Expect attributes with relation and either explicit ids or text names
-            relation = str(attrs.get("relation") or "").strip() or "related_to"
-            sid = attrs.get("sourceId")
-            tid = attrs.get("targetId")
-            stext = attrs.get("source_text")
-            ttext = attrs.get("target_text")
-            # Try to resolve nodes if text was seen earlier
-            def resolve(label_or_id: Optional[str]) -> Optional[str]:
-                if not label_or_id:
-                    return None
-                lid = str(label_or_id)
-                if lid in node_index:
-                    return lid
-                # match by label
-                for n in nodes:
-                    if str(n.get("label")).lower() == lid.lower():
-                        return n["id"]
-                # fallback
-                return _slug(lid)
-
-            src = str(sid or resolve(stext) or "").strip()
-            tgt = str(tid or resolve(ttext) or "").strip()
-            if src and tgt and src != tgt:
-                edges.append({
-                    "id": f"{src}-{relation}-{tgt}",
-                    "source": src,
-                    "target": tgt,
-                    "relation": relation,
-                    "sourceSpans": spans,
-                    "data": {k: v for k, v in attrs.items() if k not in {"relation","sourceId","targetId","source_text","target_text"}},
-                })
-
-    return {"nodes": nodes, "edges": edges}
-
-
 def _auth_check(request: Request):
     # Simple bearer token check for optional protection
     if SERVICE_TOKEN:
@@ -229,6 +249,82 @@ def _auth_check(request: Request):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
 
+def _fetch_text(url: str) -> str:
+    """Download URL content once, so it can be hashed for the cache and then extracted."""
+    download = getattr(getattr(lx, "io", None), "download_text_from_url", None)
+    try:
+        if download is not None:
+            return download(url, show_progress=False)
+        with urllib.request.urlopen(url, timeout=30) as resp:  # noqa: S310 - admin-supplied URL
+            return resp.read().decode(resp.headers.get_content_charset() or "utf-8", "replace")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not fetch url: {e}")
+
+
+def _estimate_tokens(req: ExtractRequest, text: str) -> int:
+    # Every chunk of every pass is sent with the prompt and examples
+    chars = len(text)
+    buffer = max(500, int(req.max_char_buffer or 1000))
+    chunks = max(1, -(-chars // buffer))
+    passes = max(1, int(req.extraction_passes or 1))
+    return passes * (chars // 4 + chunks * (len(PROMPT) // 4 + 600))
+
+
+def _admit(req: ExtractRequest, text: str):
+    if admission is None:
+        return None
+    try:
+        return admission.acquire_sync(_estimate_tokens(req, text), BATCH)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status, detail=str(e), headers=e.headers)
+
+
+def _api_key() -> str:
+    # Provider key: OpenAI path uses OPENAI_API_KEY; for Gemini, LANGEXTRACT_API_KEY
+    api_key = os.environ.get("OPENAI_API_KEY") or os.environ.get("LANGEXTRACT_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=500, detail="Missing OPENAI_API_KEY or LANGEXTRACT_API_KEY")
+    return api_key
+
+
+def _settings(req: ExtractRequest, text: str) -> Dict[str, Any]:
+    """Normalized extraction settings plus the content-addressed cache key."""
+    model_id = req.model_id or "gpt-4o-mini"
+    passes = max(1, int(req.extraction_passes or 1))
+    max_char_buffer = max(500, int(req.max_char_buffer or 1000))
+    # Document chunk per executor call; it changes the extractions, so it is part of the key
+    chunk_chars = max(500, int(getattr(req, "chunk_chars", None) or max_char_buffer))
+    return {
+        "model_id": model_id,
+        "passes": passes,
+        "max_char_buffer": max_char_buffer,
+        "chunk_chars": chunk_chars,
+        "max_workers": max(1, int(getattr(req, "max_workers", None) or 1)),
+        "key": cache_key(content_hash(text), model_id, passes, max_char_buffer, PROMPT_VERSION, chunk_chars),
+    }
+
+
+def _run_lx(text: str, settings: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+    doc = lx.extract(
+        text_or_documents=text,
+        prompt_description=PROMPT,
+        examples=EXAMPLES,
+        model_id=settings["model_id"],
+        api_key=api_key,
+        language_model_type=lx.inference.OpenAILanguageModel,
+        extraction_passes=settings["passes"],
+        max_workers=settings["max_workers"],
+        max_char_buffer=settings["max_char_buffer"],
+        fence_output=True,               # required for OpenAI in LangExtract
+        use_schema_constraints=False,    # OpenAI path
+    )
+    return _result_to_dict(doc)
+
+
+def _bypass_cache(req: ExtractRequest, request: Request) -> bool:
+    return bool(req.no_cache) or "no-cache" in (request.headers.get("cache-control") or "").lower()
+
+
 def _to_proposed_changes(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     changes: List[Dict[str, Any]] = []
     for n in nodes:
@@ -240,63 +336,61 @@ def _to_proposed_changes(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]
 
 # --------- API ---------
 @app.post("/extract", response_model=ExtractResponse)
-def extract(req: ExtractRequest, request: Request):
+def extract(req: ExtractRequest, request: Request, response: Response):
     _auth_check(request)
     if not req.text and not req.url:
         raise HTTPException(status_code=400, detail="Provide 'text' or 'url'")
 
-    # Provider key: OpenAI path uses OPENAI_API_KEY; for Gemini, LANGEXTRACT_API_KEY
-    api_key = os.environ.get("OPENAI_API_KEY") or os.environ.get("LANGEXTRACT_API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="Missing OPENAI_API_KEY or LANGEXTRACT_API_KEY")
+    api_key = _api_key()
 
     t0 = time.time()
-    # Call LangExtract
-    try:
-        doc = lx.extract(
-            text_or_documents=req.url if req.url else req.text,
-            prompt_description=PROMPT,
-            examples=EXAMPLES,
-            model_id=req.model_id or "gpt-4o-mini",
-            api_key=api_key,
-            language_model_type=lx.inference.OpenAILanguageModel,
-            extraction_passes=max(1, int(req.extraction_passes or 1)),
-            max_workers=max(1, int(req.max_workers or 1)),
-            max_char_buffer=max(500, int(req.max_char_buffer or 1000)),
-            fence_output=True,               # required for OpenAI in LangExtract
-            use_schema_constraints=False,    # OpenAI path
+    text = req.text if req.text else _fetch_text(req.url)
+    settings = _settings(req, text)
+    key = settings["key"]
+    bypass = _bypass_cache(req, request)
+
+    cached = None
+    chunk_meta: Dict[str, Any] = {}
+    if bypass:
+        cache.bypasses += 1
+    elif cache.enabled:
+        cached = cache.get(key)
+
+    if cached is not None:
+        raw = cached["raw"]
+        cache_status = "HIT"
+    else:
+        # One executor call per chunk not in the chunk store, at most max_workers at a
+        # time; LLM budget is charged for those chunks only (sync endpoint: blocking is fine)
+        chunks = _chunks_for(text, settings)
+        futures, reused = _submit_chunks(
+            f"extract:{uuid.uuid4().hex[:12]}", [(chunk, settings) for chunk in chunks], req, api_key,
+            use_store=not bypass, admit_upfront=True, limit=settings["max_workers"],
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LangExtract failed: {e}")
-
-    raw = _result_to_dict(doc)
-    mapped = _map_extractions_to_graph(raw)
+        chunk_meta = {"chunks": len(chunks), "chunks_reused": len(reused)}
+        try:
+            raw = {"text": text, "extractions": [ex for future in futures for ex in future.result()]}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"LangExtract failed: {e}")
+        finally:
+            for future in futures:
+                future.cancel()
+        cache.put(key, raw, round(time.time() - t0, 3))
+        cache_status = "BYPASS" if bypass else "MISS"
+    response.headers["X-Cache"] = cache_status
+    response.headers["X-Cache-Key"] = key[:16]
+
+    mapped = map_extractions(raw)
     nodes, edges = mapped["nodes"], mapped["edges"]
     changes = _to_proposed_changes(nodes, edges)
 
+    if cached is None:
+        visuals.discard(key)  # rendered from the result this run replaced
     visualization_html = None
-    if req.include_visualization:
-        try:
-            # Generate HTML in-memory from a JSONL-like envelope
-            # Save to temp JSONL
-            from tempfile import NamedTemporaryFile
-            from pathlib import Path
-
-            tmp = NamedTemporaryFile("w", suffix=".jsonl", delete=False)
-            try:
-                # Wrap into the expected LX JSONL format
-                import json
-                tmp.write(json.dumps(raw) + "\n")
-                tmp.flush()
-                visualization_html = lx.visualize(tmp.name)
-            finally:
-                tmp.close()
-                try:
-                    Path(tmp.name).unlink(missing_ok=True)  # type: ignore[arg-type]
-                except Exception:
-                    pass
-        except Exception:
-            visualization_html = None
+    if req.include_visualization or not cache.enabled:
+        # Without the disk cache the lazy endpoint has nothing to render from later
+        page = visuals.render(key, raw, mapped)
+        visualization_html = page if req.include_visualization else None
 
     return ExtractResponse(
         raw=raw,
@@ -308,10 +402,526 @@ def extract(req: ExtractRequest, request: Request):
             "extraction_passes": req.extraction_passes,
             "max_workers": req.max_workers,
             "elapsed_sec": round(time.time() - t0, 3),
+            "cache": cache_status,
+            "cached_elapsed_sec": cached.get("elapsed_sec") if cached else None,
+            **chunk_meta,
         },
         visualization_html=visualization_html,
+        visualization_url=f"/extract/visualization/{key}",
     )
 
 
+@app.get("/extract/visualization/{key}", response_class=HTMLResponse)
+def get_visualization(key: str, request: Request):
+    """
+    HTML view of an /extract result (tools/visualize.py), by the key in its
+    visualization_url: from the in-memory page cache, else rendered from
+    the disk result cache.
+    """
+    _auth_check(request)
+    etag = f'"{key[:32]}-{RENDER_VERSION}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
+    if request.headers.get("if-none-match") == etag:
+        # Content-addressed: the key already names the text, settings and prompt
+        return Response(status_code=304, headers=headers)
+    page = visuals.get(key)
+    if page is None:
+        cached = cache.get(key)
+        if cached is None:
+            raise HTTPException(status_code=404, detail="No extraction result for this key; run /extract again")
+        page = visuals.render(key, cached["raw"], map_extractions(cached["raw"]))
+    return HTMLResponse(page, headers=headers)
+
+
+# --------- Background jobs ---------
+def _admit_chunk(req: ExtractRequest, text: str) -> Optional[Exception]:
+    """
+    Pooled chunks: back off and retry instead of failing the whole document
+    fast; returns the final rejection, if any. Runs on the submitting thread
+    before the chunk is queued, never on an executor worker, so the sleeps
+    don't hold an LLM slot.
+    """
+    if admission is None:
+        return None
+    for attempt in range(3):
+        try:
+            admission.acquire_sync(_estimate_tokens(req, text), BATCH)
+            return None
+        except AdmissionRejected as e:
+            if attempt == 2:
+                return e
+            time.sleep(e.retry_after)
+    return None
+
+
+def _chunks_for(text: str, settings: Dict[str, Any]) -> List[Chunk]:
+    # Content-defined boundaries: text shared with earlier documents yields chunks the store has seen
+    return content_chunks(text, settings["chunk_chars"])
+
+
+def _extract_chunk(chunk: Chunk, settings: Dict[str, Any], api_key: str) -> List[Dict[str, Any]]:
+    """One executor call: a chunk's extractions with spans in document coordinates."""
+    t0 = time.time()
+    # Parallelism comes from the executor, not from a per-call LangExtract fan-out
+    raw = _run_lx(chunk.text, {**settings, "max_workers": 1}, api_key)
+    extractions = list(iter_extractions(raw))
+    chunk_store.put(chunk.text, settings, PROMPT_VERSION, extractions, round(time.time() - t0, 3))
+    return shift_extractions(extractions, chunk.start)
+
+
+def _submit(owner: str, calls: List[Any], limit: Optional[int] = None, block: bool = False) -> List[Future]:
+    """Queue calls on the executor as one owner; a full queue is a 503."""
+    try:
+        return executor.submit_many(owner, calls, limit=limit, block=block)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
+def _submit_chunks(owner: str, items: List[Tuple[Chunk, Dict[str, Any]]], req: Any, api_key: str,
+                   use_store: bool = True, admit_upfront: bool = False, limit: Optional[int] = None,
+                   block: bool = False, timed: bool = False) -> Tuple[List[Future], Set[int]]:
+    """
+    One future per (chunk, settings) item, in order, and the indexes of the
+    items served from the chunk store: those come back already finished,
+    with no LLM call and no executor slot. The rest are admitted against the
+    LLM budget here, then queued as one owner: admit_upfront charges once
+    for all new chunks (fast 429), otherwise each chunk is admitted with
+    retries and a chunk still rejected comes back as a failed future.
+    """
+    futures: List[Optional[Future]] = []
+    reused: Set[int] = set()
+    calls: List[Any] = []
+    novel: List[str] = []
+    for i, (chunk, settings) in enumerate(items):
+        stored = chunk_store.get(chunk.text, settings, PROMPT_VERSION) if use_store else None
+        if stored is None:
+            rejected = None if admit_upfront else _admit_chunk(req, chunk.text)
+            if rejected is not None:
+                future: Future = Future()
+                future.set_exception(rejected)
+                futures.append(future)
+                continue
+            futures.append(None)
+            args = (chunk, settings, api_key)
+            calls.append((_timed, (_extract_chunk, *args)) if timed else (_extract_chunk, args))
+            novel.append(chunk.text)
+            continue
+        extractions = shift_extractions(stored, chunk.start)
+        now = time.time()
+        future = Future()
+        future.set_result((now, now, extractions) if timed else extractions)
+        futures.append(future)
+        reused.add(i)
+    if admit_upfront and novel:
+        _admit(req, "".join(novel))
+    queued = iter(_submit(owner, calls, limit=limit, block=block) if calls else [])
+    return [f if f is not None else next(queued) for f in futures], reused
+
+
+def _run_job(job: ExtractJob) -> Dict[str, Any]:
+    """Runs on an extract-job worker thread; see tools/extract_jobs.py."""
+    t0 = time.time()
+    req = ExtractJobRequest(**job.options)
+    settings = _settings(req, job.text)
+    if not req.no_cache:
+        cached = cache.get(job.key)
+        if cached is not None:
+            job.cache = "HIT"
+            job.chunks_total = 1
+            job.add_chunk(list(iter_extractions(cached["raw"])))
+            return cached["raw"]
+
+    api_key = _api_key()
+    chunks = _chunks_for(job.text, settings)
+    job.chunks_total = len(chunks)
+    # Jobs are already queued work: wait for room on the executor rather than fail
+    submitted, reused = _submit_chunks(
+        f"job:{job.id}", [(chunk, settings) for chunk in chunks], req, api_key,
+        use_store=not req.no_cache, limit=settings["max_workers"], block=True,
+    )
+    job.chunks_reused = len(reused)
+    futures = dict(zip(submitted, chunks))
+    by_chunk: Dict[int, List[Dict[str, Any]]] = {}
+    for future in as_completed(futures):
+        chunk = futures[future]
+        try:
+            by_chunk[chunk.index] = future.result()
+        except Exception as e:
+            # Keep going: the other chunks' extractions are still worth having
+            print(f"Extract job {job.id}: chunk {chunk.index} failed: {e}")
+            job.fail_chunk(chunk.index, str(e) or e.__class__.__name__)
+            continue
+        job.add_chunk(by_chunk[chunk.index])
+
+    if chunks and len(job.chunk_errors) == len(chunks):
+        raise RuntimeError(f"all {len(chunks)} chunks failed, first: {job.chunk_errors[0]['error']}")
+    # Document order, whatever order the chunks finished in
+    raw = {"text": job.text, "extractions": [ex for i in sorted(by_chunk) for ex in by_chunk[i]]}
+    if not job.chunk_errors:
+        # Incomplete results are not cached, so a retry runs the failed chunks again
+        cache.put(job.key, raw, round(time.time() - t0, 3))
+    visuals.discard(job.key)  # rendered from the result this run replaced
+    job.cache = "BYPASS" if req.no_cache else "MISS"
+    return raw
+
+
+jobs = ExtractJobManager.from_env(_run_job)
+
+
+def _job_response(job: ExtractJob) -> Dict[str, Any]:
+    out = job.to_dict()
+    # Finished: the full result; running: the graph mapped from the chunks done so far
+    raw = job.result if job.result is not None else {"extractions": list(job.extractions)}
+    mapped = map_extractions(raw)
+    if job.status == "succeeded":
+        out["result"] = {
+            "raw": raw,
+            "nodes": mapped["nodes"],
+            "edges": mapped["edges"],
+            "proposed_changes": _to_proposed_changes(mapped["nodes"], mapped["edges"]),
+        }
+        # Only complete results are cached under the job's key, so only those get the lazy URL and page cache
+        complete = not job.chunk_errors
+        out["result"]["visualization_url"] = f"/extract/visualization/{job.key}" if complete else None
+        if job.options.get("include_visualization"):
+            out["result"]["visualization_html"] = (
+                visuals.render(job.key, raw, mapped) if complete else render_html(raw, mapped)
+            )
+    else:
+        out["partial"] = {"nodes": mapped["nodes"], "edges": mapped["edges"]}
+    return out
+
+
+@app.post("/extract/jobs", status_code=202)
+def create_extract_job(req: ExtractJobRequest, request: Request, response: Response):
+    _auth_check(request)
+    if not req.text and not req.url:
+        raise HTTPException(status_code=400, detail="Provide 'text' or 'url'")
+    _api_key()
+    text = req.text if req.text else _fetch_text(req.url)
+    options = req.model_dump(exclude={"text", "url"})
+    options["no_cache"] = _bypass_cache(req, request)
+    try:
+        job, created = jobs.submit(_settings(req, text)["key"], text, options)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    response.headers["Location"] = f"/extract/jobs/{job.id}"
+    return {**job.to_dict(), "deduplicated": not created}
+
+
+@app.get("/extract/jobs")
+def list_extract_jobs(request: Request):
+    _auth_check(request)
+    return {"jobs": [job.to_dict() for job in jobs.list()], "stats": jobs.stats()}
+
+
+@app.get("/extract/jobs/{job_id}")
+def get_extract_job(job_id: str, request: Request):
+    _auth_check(request)
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+
+# --------- Streaming ---------
+def _ndjson(event: str, **data: Any) -> bytes:
+    return (json.dumps({"event": event, **data}, default=str) + "\n").encode("utf-8")
+
+
+@app.post("/extract/stream")
+def extract_stream(req: ExtractJobRequest, request: Request):
+    """
+    Streaming /extract: one NDJSON line per event instead of a single
+    response at the end.
+
+    - start:  {chunks, cache}, plus chunks_reused (served from the chunk store)
+    - chunk:  {chunk, start, end, nodes, updated_nodes, edges, progress}, as
+              each chunk finishes (in completion order). nodes/edges are only
+              the ones not sent before; updated_nodes were sent before and
+              got more attributes from this chunk.
+    - error:  {chunk, error} for a failed chunk; the stream carries on
+    - dangling: {edges} relations to entities no chunk produced, pointing at
+              the id such a node would get (tools/graph_mapper.py); a
+              relation is held back until both of its ends are known
+    - done:   {nodes, edges, failed_chunks, elapsed_sec}
+
+    The raw LangExtract result is not streamed. If the client goes away,
+    chunks that haven't started are cancelled.
+    """
+    _auth_check(request)
+    if not req.text and not req.url:
+        raise HTTPException(status_code=400, detail="Provide 'text' or 'url'")
+    api_key = _api_key()
+    text = req.text if req.text else _fetch_text(req.url)
+    settings = _settings(req, text)
+    bypass = _bypass_cache(req, request)
+    cached = None if bypass else cache.get(settings["key"])
+    cache_status = "HIT" if cached is not None else ("BYPASS" if bypass else "MISS")
+
+    t0 = time.time()
+    futures: Dict[Future, Chunk] = {}
+    if cached is None:
+        # Submitted up front, so a full executor is a 503 rather than a broken stream
+        chunks = _chunks_for(text, settings)
+        submitted, reused = _submit_chunks(
+            f"stream:{uuid.uuid4().hex[:12]}", [(chunk, settings) for chunk in chunks], req, api_key,
+            use_store=not bypass, limit=settings["max_workers"],
+        )
+        futures = dict(zip(submitted, chunks))
+
+    def events():
+        builder = GraphBuilder()
+        if cached is not None:
+            yield _ndjson("start", chunks=1, cache=cache_status)
+            delta = builder.add(iter_extractions(cached["raw"]))
+            yield _ndjson("chunk", chunk=0, start=0, end=len(text), progress=1.0, **delta)
+            dangling = builder.finish()["edges"]
+            if dangling:
+                yield _ndjson("dangling", edges=dangling)
+            yield _ndjson("done", nodes=len(builder.nodes), edges=len(builder.edges), failed_chunks=0,
+                          elapsed_sec=round(time.time() - t0, 3))
+            return
+
+        yield _ndjson("start", chunks=len(chunks), chunks_reused=len(reused), cache=cache_status)
+        by_chunk: Dict[int, List[Dict[str, Any]]] = {}
+        failed = 0
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                chunk = futures[future]
+                progress = round(done / len(chunks), 3)
+                try:
+                    by_chunk[chunk.index] = future.result()
+                except Exception as e:
+                    failed += 1
+                    yield _ndjson("error", chunk=chunk.index, error=str(e) or e.__class__.__name__, progress=progress)
+                    continue
+                delta = builder.add(by_chunk[chunk.index])
+                yield _ndjson("chunk", chunk=chunk.index, start=chunk.start, end=chunk.end, progress=progress, **delta)
+        finally:
+            # Client gone (GeneratorExit) or done: don't leave queued chunks on the executor
+            for future in futures:
+                future.cancel()
+        dangling = builder.finish()["edges"]
+        if dangling:
+            yield _ndjson("dangling", edges=dangling)
+        if chunks and not failed:
+            raw = {"text": text, "extractions": [ex for i in sorted(by_chunk) for ex in by_chunk[i]]}
+            cache.put(settings["key"], raw, round(time.time() - t0, 3))
+        yield _ndjson("done", nodes=len(builder.nodes), edges=len(builder.edges), failed_chunks=failed,
+                      elapsed_sec=round(time.time() - t0, 3))
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"X-Cache": cache_status, "X-Cache-Key": settings["key"][:16], "X-Accel-Buffering": "no"},
+    )
+
+
+# --------- Batch ---------
+def _merge_graphs(graphs: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    One graph across documents. Node ids are slugs of the entity text, so the
+    same entity in several CVs collapses into one node; the first document's
+    attributes win and later ones only fill gaps. Each merged node and edge
+    lists the documents it came from.
+    """
+    nodes: Dict[str, Dict[str, Any]] = {}
+    edges: Dict[str, Dict[str, Any]] = {}
+    for graph in graphs:
+        for node in graph["nodes"]:
+            merged = nodes.get(node["id"])
+            if merged is None:
+                nodes[node["id"]] = {**node, "documents": [graph["id"]]}
+                continue
+            for k, v in node.items():
+                merged.setdefault(k, v)
+            if graph["id"] not in merged["documents"]:
+                merged["documents"].append(graph["id"])
+        for edge in graph["edges"]:
+            merged = edges.get(edge["id"])
+            if merged is None:
+                edges[edge["id"]] = {**edge, "documents": [graph["id"]]}
+            elif graph["id"] not in merged["documents"]:
+                merged["documents"].append(graph["id"])
+    return {"nodes": list(nodes.values()), "edges": list(edges.values())}
+
+
+def _timed(fn, *args):
+    started = time.time()
+    result = fn(*args)
+    return started, time.time(), result
+
+
+@app.post("/extract/batch")
+def extract_batch(req: ExtractBatchRequest, request: Request):
+    """
+    Extract many documents in one call. All chunks of all documents go onto
+    the shared chunk pool at once, so the batch runs with the service-wide
+    concurrency instead of one document after another. Identical documents
+    are extracted once; cached documents cost nothing. A document that fails
+    is reported with its error; the rest of the batch still returns.
+    """
+    _auth_check(request)
+    if not req.documents:
+        raise HTTPException(status_code=400, detail="Provide at least one document")
+    if len(req.documents) > BATCH_MAX_DOCUMENTS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_DOCUMENTS} documents per batch")
+    api_key = _api_key()
+    t0 = time.time()
+    bypass = _bypass_cache(req, request)
+
+    docs: List[Dict[str, Any]] = []
+    for i, d in enumerate(req.documents):
+        doc = {"id": d.id or str(i), "error": None, "cache": None, "chunks": 0, "chunk_errors": []}
+        if d.text:
+            doc["text"] = d.text
+        elif d.url:
+            try:
+                doc["text"] = _fetch_text(d.url)
+            except HTTPException as e:
+                doc["error"] = e.detail
+        else:
+            doc["error"] = "Provide 'text' or 'url'"
+        docs.append(doc)
+
+    # Cache lookups, and one extraction per distinct content/settings
+    pending: Dict[str, Dict[str, Any]] = {}  # cache key -> first document with it
+    for doc in docs:
+        if doc["error"]:
+            continue
+        doc["settings"] = _settings(req, doc["text"])
+        doc["key"] = doc["settings"]["key"]
+        cached = None if bypass else cache.get(doc["key"])
+        if cached is not None:
+            doc["raw"], doc["cache"] = cached["raw"], "HIT"
+        elif doc["key"] in pending:
+            doc["cache"] = "DUPLICATE"
+        else:
+            doc["cache"] = "BYPASS" if bypass else "MISS"
+            pending[doc["key"]] = doc
+
+    items, owners = [], []
+    for doc in pending.values():
+        chunks = _chunks_for(doc["text"], doc["settings"])
+        doc["chunks"], doc["by_chunk"], doc["finished"] = len(chunks), {}, 0
+        doc["chunks_reused"] = 0
+        doc["submitted_at"] = time.time()
+        for chunk in chunks:
+            items.append((chunk, doc["settings"]))
+            owners.append((doc, chunk))
+    # The whole batch is one owner: it shares the executor fairly with other requests
+    submitted, reused = _submit_chunks(f"batch:{uuid.uuid4().hex[:12]}", items, req, api_key,
+                                       use_store=not bypass, timed=True)
+    for i in reused:
+        owners[i][0]["chunks_reused"] += 1
+    futures = dict(zip(submitted, owners))
+
+    for future in as_completed(futures):
+        doc, chunk = futures[future]
+        doc["finished"] += 1
+        try:
+            started, ended, extractions = future.result()
+            doc["by_chunk"][chunk.index] = extractions
+            doc["first_started_at"] = min(doc.get("first_started_at", started), started)
+            doc["finished_at"] = max(doc.get("finished_at", ended), ended)
+        except Exception as e:
+            doc["chunk_errors"].append({"chunk": chunk.index, "error": str(e) or e.__class__.__name__})
+            doc["finished_at"] = max(doc.get("finished_at", 0.0), time.time())
+
+    for doc in pending.values():
+        if doc["chunks"] and len(doc["chunk_errors"]) == doc["chunks"]:
+            doc["error"] = f"all {doc['chunks']} chunks failed, first: {doc['chunk_errors'][0]['error']}"
+            continue
+        by_chunk = doc.pop("by_chunk")
+        doc["raw"] = {"text": doc["text"], "extractions": [ex for i in sorted(by_chunk) for ex in by_chunk[i]]}
+        if not doc["chunk_errors"]:
+            cache.put(doc["key"], doc["raw"], round(doc["finished_at"] - doc["submitted_at"], 3))
+
+    results = []
+    graphs = []
+    for doc in docs:
+        source = pending.get(doc.get("key"), doc)
+        meta = {"cache": doc["cache"], "chunks": source["chunks"], "chunks_reused": source.get("chunks_reused", 0),
+                "chunk_errors": source["chunk_errors"]}
+        if "submitted_at" in source:
+            # queue: waiting for an executor slot; elapsed: submit to last chunk done
+            meta["queue_sec"] = round(source.get("first_started_at", source["finished_at"]) - source["submitted_at"], 3)
+            meta["elapsed_sec"] = round(source["finished_at"] - source["submitted_at"], 3)
+        error = doc["error"] or source["error"]
+        if error or "raw" not in source:
+            results.append({"id": doc["id"], "error": error or "extraction failed", "meta": meta})
+            continue
+        mapped = map_extractions(source["raw"])
+        graphs.append({"id": doc["id"], **mapped})
+        results.append({
+            "id": doc["id"],
+            "nodes": mapped["nodes"],
+            "edges": mapped["edges"],
+            "proposed_changes": _to_proposed_changes(mapped["nodes"], mapped["edges"]),
+            "meta": meta,
+        })
+
+    out: Dict[str, Any] = {
+        "documents": results,
+        "meta": {
+            "model_id": req.model_id,
+            "extraction_passes": req.extraction_passes,
+            "documents": len(docs),
+            "failed": sum(1 for r in results if "error" in r),
+            "chunks": sum(d["chunks"] for d in pending.values()),
+            "chunks_reused": sum(d["chunks_reused"] for d in pending.values()),
+            "llm_concurrency": executor.slots,
+            "elapsed_sec": round(time.time() - t0, 3),
+        },
+    }
+    if req.merge:
+        merged = _merge_graphs(graphs)
+        out["merged"] = {**merged, "proposed_changes": _to_proposed_changes(merged["nodes"], merged["edges"])}
+    return out
+
+
+@app.get("/cache/stats")
+def cache_stats(request: Request):
+    _auth_check(request)
+    return {**cache.stats(), "chunks": chunk_store.stats(), "visualizations": visuals.stats()}
+
+
+@app.delete("/cache")
+def clear_cache(request: Request):
+    _auth_check(request)
+    cache.clear()
+    chunk_store.clear()
+    visuals.clear()
+    return {"cleared": True}
+
+
+def _collect_metrics() -> None:
+    stats = executor.stats()
+    LLM_SLOTS.set(stats["slots"])
+    LLM_RUNNING.set(stats["running"])
+    LLM_QUEUED.set(stats["queued"])
+    LLM_OWNERS.set(stats["owners"])
+    for outcome in ("completed", "failed", "cancelled", "rejected"):
+        LLM_CALLS.labels(outcome).set(stats[outcome])
+    for result, count in (("hit", cache.hits), ("miss", cache.misses), ("bypass", cache.bypasses)):
+        CACHE_LOOKUPS.labels(result).set(count)
+    CHUNK_LOOKUPS.labels("hit").set(chunk_store.cache.hits)
+    CHUNK_LOOKUPS.labels("miss").set(chunk_store.cache.misses)
+
+
+if REGISTRY is not None:
+    REGISTRY.on_collect(_collect_metrics)
+
+
+@app.get("/metrics")
+def get_metrics(request: Request):
+    """Prometheus text: executor slots, queue depth, queue wait histogram, call outcomes, cache lookups."""
+    _auth_check(request)
+    if REGISTRY is None:  # without backend/metrics.py alongside: the same numbers as JSON
+        return {"executor": executor.stats(), "cache": cache.stats(), "jobs": jobs.stats()}
+    return Response(REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # Run: uvicorn tools.langextract_service:app --reload --port 8788
 
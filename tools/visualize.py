@@ -0,0 +1,183 @@
+"""
+HTML view of a LangExtract result, rendered in memory.
+
+/extract used to write the raw result to a temporary JSONL file and hand the
+path to lx.visualize, paying for disk I/O and a writable filesystem on every
+request. render_html() instead builds one self-contained page from the raw
+result and its mapped graph: the source text with every extraction
+highlighted by class (hover for its attributes), then the entities and
+relations as tables. No JavaScript, no external assets.
+
+Pages are kept in a small in-process LRU (VisualizationCache) keyed by the
+extraction's content address (tools/extract_cache.py), so repeated views of
+the same result are served without re-rendering and GET
+/extract/visualization/{key} can serve them lazily. RENDER_VERSION goes into
+the page's ETag, so browsers refetch after a markup change.
+
+Configuration (env):
+- LANGEXTRACT_VIS_CACHE_MB  size bound of the rendered pages kept (default: 32)
+"""
+import html
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools.graph_mapper import iter_extractions
+
+# Part of the pages' ETag: bump when the markup changes
+RENDER_VERSION = "1"
+
+COLORS = {
+    "Person": "#fde68a", "Education": "#bfdbfe", "Experience": "#bbf7d0", "Project": "#fbcfe8",
+    "Skill": "#ddd6fe", "Group": "#fed7aa", "Status": "#e5e7eb", "Relation": "#a5f3fc", "Edge": "#a5f3fc",
+}
+DEFAULT_COLOR = "#f5f5f4"
+
+STYLE = """
+body{font:14px/1.5 system-ui,sans-serif;margin:24px;color:#1c1917}
+h2{font-size:16px;margin:24px 0 8px}
+.text{white-space:pre-wrap;border:1px solid #e7e5e4;border-radius:6px;padding:12px;max-height:60vh;overflow:auto}
+mark{border-radius:3px;padding:0 1px}
+.legend span{display:inline-block;margin:0 8px 4px 0;padding:0 6px;border-radius:3px}
+table{border-collapse:collapse}td,th{border-bottom:1px solid #e7e5e4;padding:4px 8px;text-align:left;vertical-align:top}
+""".strip()
+
+
+def _interval(ex: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    interval = ex.get("char_interval")
+    if isinstance(interval, dict):
+        start = interval.get("start_pos", interval.get("start"))
+        end = interval.get("end_pos", interval.get("end"))
+        if isinstance(start, int) and isinstance(end, int) and end > start:
+            return start, end
+    return None
+
+
+def _attrs_title(clazz: str, attrs: Dict[str, Any]) -> str:
+    parts = [clazz] + [f"{k}: {v}" for k, v in attrs.items()]
+    return html.escape("\n".join(parts), quote=True)
+
+
+def _highlighted(text: str, extractions: List[Dict[str, Any]]) -> str:
+    """The text with non-overlapping extraction spans wrapped in <mark>; earlier, longer spans win."""
+    spans = []
+    for ex in extractions:
+        interval = _interval(ex)
+        if interval and interval[1] <= len(text):
+            spans.append((interval[0], -interval[1], ex))
+    spans.sort(key=lambda s: (s[0], s[1]))
+
+    out: List[str] = []
+    pos = 0
+    for start, neg_end, ex in spans:
+        end = -neg_end
+        if start < pos:
+            continue
+        clazz = str(ex.get("extraction_class") or ex.get("class") or "")
+        attrs = ex.get("attributes") if isinstance(ex.get("attributes"), dict) else {}
+        out.append(html.escape(text[pos:start]))
+        out.append(
+            f'<mark style="background:{COLORS.get(clazz, DEFAULT_COLOR)}" title="{_attrs_title(clazz, attrs)}">'
+            f"{html.escape(text[start:end])}</mark>"
+        )
+        pos = end
+    out.append(html.escape(text[pos:]))
+    return "".join(out)
+
+
+def render_html(raw: Dict[str, Any], graph: Dict[str, List[Dict[str, Any]]], title: str = "LangExtract result") -> str:
+    """One HTML page for a raw LangExtract result and its mapped graph."""
+    extractions = [ex for ex in iter_extractions(raw) if isinstance(ex, dict)]
+    text = raw.get("text") if isinstance(raw.get("text"), str) else ""
+    counts: Dict[str, int] = {}
+    for ex in extractions:
+        clazz = str(ex.get("extraction_class") or ex.get("class") or "Unknown")
+        counts[clazz] = counts.get(clazz, 0) + 1
+
+    labels = {n["id"]: str(n.get("label") or n["id"]) for n in graph.get("nodes", [])}
+    e = html.escape
+    parts = [
+        f"<!doctype html><html><head><meta charset=\"utf-8\"><title>{e(title)}</title><style>{STYLE}</style></head><body>",
+        f"<h1>{e(title)}</h1>",
+        '<div class="legend">' + "".join(
+            f'<span style="background:{COLORS.get(c, DEFAULT_COLOR)}">{e(c)} {n}</span>' for c, n in sorted(counts.items())
+        ) + "</div>",
+    ]
+    if text:
+        parts.append(f'<h2>Source text</h2><div class="text">{_highlighted(text, extractions)}</div>')
+    parts.append(f"<h2>Entities ({len(graph.get('nodes', []))})</h2><table><tr><th>Type</th><th>Label</th><th>Id</th></tr>")
+    parts.extend(
+        f"<tr><td>{e(str(n.get('type', '')))}</td><td>{e(labels[n['id']])}</td><td>{e(n['id'])}</td></tr>"
+        for n in graph.get("nodes", [])
+    )
+    parts.append(f"</table><h2>Relations ({len(graph.get('edges', []))})</h2>"
+                 "<table><tr><th>Source</th><th>Relation</th><th>Target</th></tr>")
+    parts.extend(
+        f"<tr><td>{e(labels.get(x['source'], x['source']))}</td><td>{e(x['relation'])}</td>"
+        f"<td>{e(labels.get(x['target'], x['target']))}</td></tr>"
+        for x in graph.get("edges", [])
+    )
+    parts.append("</table></body></html>")
+    return "".join(parts)
+
+
+class VisualizationCache:
+    def __init__(self, max_bytes: int = 32 << 20):
+        self.max_bytes = max_bytes
+        self._pages: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "VisualizationCache":
+        return cls(max_bytes=int(float(os.getenv("LANGEXTRACT_VIS_CACHE_MB", "32")) * (1 << 20)))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, key: str, page: str) -> None:
+        size = len(page)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._pages.pop(key, None)
+            self._bytes -= len(old) if old is not None else 0
+            self._pages[key] = page
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            old = self._pages.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+            self._bytes = 0
+
+    def render(self, key: str, raw: Dict[str, Any], graph: Dict[str, List[Dict[str, Any]]]) -> str:
+        """The cached page for key, rendering and storing it on a miss."""
+        page = self.get(key)
+        if page is None:
+            page = render_html(raw, graph)
+            self.put(key, page)
+        return page
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"pages": len(self._pages), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
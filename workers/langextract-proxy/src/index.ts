@@ -21,6 +21,27 @@ async function upstreamExtract(payload: any, env: Env): Promise<Response> {
   return fetch(env.UPSTREAM_URL, { method: "POST", headers, body: JSON.stringify(payload) });
 }
 
+// Long extractions run as upstream jobs (POST /extract/jobs, GET /extract/jobs/:id),
+// so no single request has to outlive the proxy's timeout; /extract/batch and the NDJSON
+// /extract/stream are passed through too (bodies are streamed, not buffered), as is the
+// lazily fetched HTML of GET /extract/visualization/:key
+async function handleJobs(request: Request, env: Env, url: URL) {
+  if (!env.UPSTREAM_URL) return json({ error: "Jobs require UPSTREAM_URL" }, { status: 501 });
+  if (request.method !== "POST" && request.method !== "GET") return json({ error: "Method not allowed" }, { status: 405 });
+  const base = env.UPSTREAM_URL.replace(/\/extract\/?$/, "");
+  const headers: Record<string, string> = { "content-type": "application/json" };
+  if (env.SERVICE_TOKEN) headers["Authorization"] = `Bearer ${env.SERVICE_TOKEN}`;
+  const r = await fetch(`${base}${url.pathname}`, {
+    method: request.method,
+    headers,
+    body: request.method === "POST" ? await request.text() : undefined,
+  });
+  const out: Record<string, string> = { "content-type": r.headers.get("content-type") || "application/json" };
+  const retryAfter = r.headers.get("retry-after");
+  if (retryAfter) out["retry-after"] = retryAfter;
+  return new Response(r.body, { status: r.status, headers: out });
+}
+
 async function workerNativeCurate(text: string, model: string, env: Env): Promise<any> {
   if (!env.OPENAI_API_KEY) return { error: "OPENAI_API_KEY not configured on Worker" };
   const system = `You convert resume/curriculum text into a knowledge graph with nodes and edges.\n` +
@@ -102,6 +123,9 @@ export default {
   async fetch(request: Request, env: Env, _ctx: any): Promise<Response> {
     const url = new URL(request.url);
     if (url.pathname === "/extract") return handleExtract(request, env);
+    if (url.pathname === "/extract/jobs" || url.pathname.startsWith("/extract/jobs/") || url.pathname === "/extract/batch" || url.pathname === "/extract/stream" || url.pathname.startsWith("/extract/visualization/")) {
+      return handleJobs(request, env, url);
+    }
     if (url.pathname === "/curate") return handleCurate(request, env);
     return json({ error: "Not found" }, { status: 404 });
   },